@@ -1,36 +1,76 @@
+import time
 import streamlit as st
+import numpy as np
 import pandas as pd
 from io import StringIO
 from src.model import BetModel
+from src.features import TeamFormEngine
 from src.finance import RiskManager
+from src.portfolio import PortfolioAllocator
 from src.backtest import Backtester
+from src.monte_carlo import MonteCarloSimulator
+from src.history_store import HistoryStore
+from src.cache import AuditCache
+from src.walk_forward import WalkForwardTrainer
+from src.profiling import Profiler, SamplingProfiler
+from src.live_odds import LiveOddsEngine
 
 # --- CONFIG ---
 st.set_page_config(page_title="BetSight v2.1", layout="wide", page_icon="🦅")
 st.markdown("""<style>.traffic-card { padding: 15px; border-radius: 8px; text-align: center; color: white; font-weight: bold; margin-bottom: 10px; }.green { background-color: #28a745; }.yellow { background-color: #ffc107; color: black; }.red { background-color: #dc3545; }</style>""", unsafe_allow_html=True)
 
+# --- DIAGNÓSTICO (oculto): ?debug=1 mostra o tempo por etapa; ?debug=profile liga também a amostragem de pilha ---
+# A coleta é por sessão (thread do script): outras sessões e o estado global do Profiler não são tocados
+debug_mode = st.query_params.get("debug")
+Profiler.end_session()
+if debug_mode:
+    debug_stats = Profiler.begin_session()
+    rerun_start = time.perf_counter()
+    sampler = SamplingProfiler().start() if debug_mode == "profile" else None
+
 # --- LOADERS (Versão Frozen) ---
 @st.cache_resource
 def init_system():
     # 1. Carrega IA Congelada
-    ai = BetModel()
-    
-    # 2. Carrega Histórico Processado (CSV Local)
+    with Profiler.stage('init_system.model'):
+        ai = BetModel()
+    return ai
+
+@st.cache_resource
+def load_history(window, columns):
+    # 2. Carrega Histórico Processado (Store colunar memory-mapped; CSV como fallback)
+    # Só a janela da auditoria sai do disco; odds ficam float32 até o Backtester recortar a janela
     try:
-        df = pd.read_csv("betsight_history.csv")
-        # Garante datas
-        df['Date'] = pd.to_datetime(df['Date'])
+        if HistoryStore.exists("betsight_history.store"):
+            with Profiler.stage('init_system.history'):
+                last = window if isinstance(window, int) else None
+                df = HistoryStore.read("betsight_history.store", columns=list(columns), last=last, exact=False)
+        else:
+            df = pd.read_csv("betsight_history.csv")
+            # Garante datas
+            df['Date'] = pd.to_datetime(df['Date'])
     except FileNotFoundError:
         st.error("⚠️ Histórico não encontrado. Execute o pipeline de treino.")
         df = pd.DataFrame()
         
-    return df, ai
+    return df
 
-df_hist, ai_engine = init_system()
+with Profiler.stage('init_system'):
+    ai_engine = init_system()
+
+@st.cache_resource
+def init_audit_cache():
+    # Resultados da auditoria persistidos em disco (reruns e restarts voltam na hora)
+    return AuditCache()
+
+audit_cache = init_audit_cache()
 
 # --- SIDEBAR ---
 st.sidebar.title("🦅 BetSight Ops")
 st.sidebar.info("Modo: Production (Frozen Model)")
+cache_stats = ai_engine.cache_stats()
+st.sidebar.caption(f"Cache IA: {cache_stats['hit_rate']:.0%} hits · {cache_stats['size']} jogos · "
+                   f"{cache_stats['evictions']} evictions · modelo {cache_stats['model_version']}")
 
 # INPUT MANUAL
 st.sidebar.header("📝 Jogos da Semana")
@@ -39,18 +79,70 @@ Arsenal,Liverpool,2.10,3.50,3.20
 Man City,Chelsea,1.50,4.50,6.00
 Fulham,Wolves,2.40,3.30,2.90"""
 input_csv = st.sidebar.text_area("CSV Input:", value=csv_template, height=150)
+# Odds ao vivo: decisões re-pontuadas pelo consumidor (python odds_feed.py)
+live_feed = st.sidebar.toggle("📡 Feed de Odds ao Vivo", value=False)
 
 st.sidebar.markdown("---")
 st.sidebar.header("💰 Gestão de Banca")
 bankroll = st.sidebar.number_input("Banca Inicial (R$)", 1000.0, step=100.0)
 kelly_frac = st.sidebar.slider("Fração de Kelly", 0.1, 0.5, 0.25)
 max_cap = st.sidebar.slider("Teto Máximo", 0.01, 0.10, 0.05)
+# Kelly de Portfólio: jogos simultâneos dividem a banca (exposição total limitada)
+portfolio_mode = st.sidebar.toggle("Kelly de Portfólio (jogos simultâneos)", value=False)
+# Exposição real nunca passa da Fração de Kelly (o otimizador escala o Kelly cheio por ela): o slider vai só até lá
+max_total = st.sidebar.slider("Exposição Máxima da Rodada", 0.05, kelly_frac, min(0.20, kelly_frac),
+                              help="Limitada pela Fração de Kelly: valores acima não mudariam os stakes.") \
+    if portfolio_mode else None
+
+st.sidebar.header("📉 Auditoria")
+audit_windows = {"Últimos 100 jogos": 100, "Última temporada (380)": 380, "Histórico completo": None}
+audit_window = audit_windows[st.sidebar.selectbox("Janela", list(audit_windows))]
+audit_modes = {"Modelo Congelado": None, "Walk-Forward (retreino por temporada)": 'season',
+               "Walk-Forward (retreino por rodada)": 'matchweek'}
+audit_block = audit_modes[st.sidebar.radio("Modelo da Auditoria", list(audit_modes))]
+
+# Modelo com forma: carrega as features pré-jogo gravadas (o snapshot só vale para jogos futuros)
+form_cols = [c for c in TeamFormEngine.FEATURES if c in ai_engine.features] if ai_engine.uses_form else []
+df_hist = load_history(audit_window, tuple(Backtester.AUDIT_COLUMNS + form_cols))
 
 # --- MAIN ---
 st.title("🦅 BetSight Intelligence")
 st.caption("Operation Truth | Dados Auditados")
 
-tab1, tab2 = st.tabs(["🚦 Radar (Live)", "📉 Auditoria"])
+@st.fragment(run_every="2s")
+def live_panel():
+    # Só este bloco reroda a cada 2s (lê o snapshot gravado pelo odds_feed.py)
+    st.subheader("📡 Feed de Odds ao Vivo")
+    snap = LiveOddsEngine.read_snapshot()
+    if snap is None:
+        st.info("Nenhum snapshot ainda. Rode: python odds_feed.py --file feed.jsonl")
+        return
+    stats = snap['stats']
+    age = time.time() - snap['updated_at']
+    st.caption(f"{stats['fixtures']} jogos · {stats['ticks']} ticks ({stats['ticks_per_s']:.0f}/s) · "
+               f"{stats['rescored']} re-scores em {stats['batches']} lotes · atualizado há {age:.0f}s")
+    if age > 30:
+        st.warning("⚠️ Nenhuma atualização do feed há mais de 30s.")
+    if stats.get('rescore_errors'):
+        st.warning(f"⚠️ {stats['rescore_errors']} lote(s) de re-score falharam. Último erro: {stats['last_error']}")
+    live = pd.DataFrame(snap['fixtures'])
+    if live.empty:
+        return
+    # Probabilidades vêm do feed; stake com a banca e o Kelly da barra lateral
+    p_home = live['H'].to_numpy()
+    odds_h = live['B365H'].to_numpy(dtype=float)
+    stakes = RiskManager.calculate_stakes(p_home, odds_h, bankroll, kelly_frac, max_cap)
+    if portfolio_mode:
+        stakes['stake_pct'] = PortfolioAllocator.allocate_by_group(p_home, odds_h, live['Date'].astype(str).to_numpy(),
+                                                                   kelly_frac, max_cap, max_total)
+        stakes['stake_val'] = bankroll * stakes['stake_pct']
+    signal = RiskManager.traffic_light(stakes['ev'], p_home)
+    live = live.assign(EV=stakes['ev'], Stake_Val=stakes['stake_val'].round(2),
+                       Decision=[RiskManager.SIGNALS[str(s)] for s in signal])
+    st.dataframe(live[['HomeTeam', 'AwayTeam', 'B365H', 'B365D', 'B365A', 'H', 'EV', 'Stake_Val', 'Decision']]
+                 .sort_values('EV', ascending=False), use_container_width=True, hide_index=True)
+
+tab1, tab2, tab3 = st.tabs(["🚦 Radar (Live)", "📉 Auditoria", "🎛️ Otimização"])
 
 # --- TAB 1 ---
 with tab1:
@@ -60,22 +152,31 @@ with tab1:
             st.subheader("Análise Tática")
             cols = st.columns(len(live_data))
             
-            for idx, row in live_data.iterrows():
-                probs = ai_engine.predict_match(row['HomeTeam'], row['AwayTeam'], row['B365H'], row['B365A'])
+            # Previsão em lote para todos os jogos colados
+            live_probs = ai_engine.predict_matches(live_data)
+            # Contribuição de cada feature (caminhos das árvores) para todos os jogos de uma vez
+            live_expl = ai_engine.explain_matches(live_data)
+            # Stake de todos os jogos numa chamada só
+            stakes = RiskManager.calculate_stakes(live_probs['H'].to_numpy(), live_data['B365H'].to_numpy(dtype=float),
+                                                  bankroll, kelly_frac, max_cap)
+            if portfolio_mode:
+                # Jogos colados = uma rodada (ou uma por data, se houver coluna Date)
+                slate = live_data['Date'].to_numpy() if 'Date' in live_data.columns else np.zeros(len(live_data))
+                stakes['stake_pct'] = PortfolioAllocator.allocate_by_group(
+                    live_probs['H'].to_numpy(), live_data['B365H'].to_numpy(dtype=float), slate,
+                    kelly_frac, max_cap, max_total)
+                stakes['stake_val'] = bankroll * stakes['stake_pct']
+            
+            for pos, (idx, row) in enumerate(live_data.iterrows()):
+                probs = live_probs.loc[idx]
                 p_home = probs['H']
-                decision = RiskManager.calculate_stake(p_home, row['B365H'], bankroll, kelly_frac, max_cap)
-                ev = decision['ev']
+                stake_val = round(float(stakes['stake_val'][pos]), 2)
+                ev = float(stakes['ev'][pos])
                 
-                status_color = "red"
-                status_text = "NÃO APOSTAR"
-                if ev > 0.05 and p_home > 0.55:
-                    status_color = "green"
-                    status_text = "APOSTAR"
-                elif ev > 0:
-                    status_color = "yellow"
-                    status_text = "OBSERVAR"
+                status_color = str(RiskManager.traffic_light(ev, p_home))
+                status_text = RiskManager.SIGNALS[status_color]
                 
-                reasons = ai_engine.explain_prediction(probs, probs['Mkt_Diff'])
+                reasons = ai_engine.explain_prediction(probs, probs['Mkt_Diff'], live_expl.loc[idx])
                 
                 with cols[idx]:
                     st.markdown(f'<div class="traffic-card {status_color}">{status_text}<br><small>{row["HomeTeam"]}</small></div>', unsafe_allow_html=True)
@@ -84,11 +185,14 @@ with tab1:
                     with st.expander("Por quê?"):
                         for r in reasons: st.write(f"- {r}")
                         st.markdown("---")
-                        if decision['stake_val'] > 0: st.success(f"Aposta: R$ {decision['stake_val']:.2f}")
+                        if stake_val > 0: st.success(f"Aposta: R$ {stake_val:.2f}")
                         else: st.error("Aposta: R$ 0.00")
         except Exception as e:
             st.error(f"Erro no CSV: {e}")
 
+    if live_feed:
+        live_panel()
+
 # --- TAB 2 ---
 with tab2:
     if df_hist.empty:
@@ -96,13 +200,74 @@ with tab2:
     else:
         st.subheader("Auditoria Financeira")
         with st.spinner("Rodando Simulação Walk-Forward..."):
-            audit_df, equity_curve = Backtester.run_cfo_audit(df_hist, ai_engine, bankroll)
+            if audit_block is None:
+                audit_df, equity_curve = Backtester.run_cfo_audit(df_hist, ai_engine, bankroll, window=audit_window,
+                                                                  fraction=kelly_frac, max_cap=max_cap, cache=audit_cache,
+                                                                  max_total=max_total)
+            else:
+                # Retreino exige as features do treino: lidas sob demanda do store
+                wf_cols = Backtester.AUDIT_COLUMNS + WalkForwardTrainer.FEATURES + ['Target', 'Season_ID']
+                df_wf = HistoryStore.read("betsight_history.store", columns=wf_cols) \
+                    if HistoryStore.exists("betsight_history.store") else pd.read_csv("betsight_history.csv", parse_dates=['Date'])
+                audit_df, equity_curve = Backtester.run_walk_forward_audit(df_wf, bankroll, block=audit_block,
+                                                                           fraction=kelly_frac, max_cap=max_cap, max_total=max_total,
+                                                                           window=audit_window, cache=audit_cache)
             
         fig_eq, fig_dd = Backtester.plot_dashboard(equity_curve)
         st.plotly_chart(fig_eq, use_container_width=True)
         st.plotly_chart(fig_dd, use_container_width=True)
         
-        # Audit Log
-        display_df = audit_df[['Date', 'Match', 'Model_Prob', 'Odds', 'Stake_Pct', 'Outcome', 'PnL', 'Drawdown']].copy()
+        # Audit Log (paginado no servidor: só a página atual vai para o navegador)
+        n_rows = len(audit_df)
+        pc1, pc2 = st.columns([1, 3])
+        page_size = pc1.selectbox("Linhas por página", [50, 100, 250, 500], index=1)
+        n_pages = max(1, -(-n_rows // page_size))
+        page = int(pc2.number_input(f"Página (de {n_pages})", min_value=1, max_value=n_pages, value=1))
+        # Mais recentes primeiro: o log já é cronológico, então basta fatiar do fim (sem ordenar tudo)
+        stop = n_rows - (page - 1) * page_size
+        page_df = audit_df.iloc[max(stop - page_size, 0):stop].iloc[::-1]
+        display_df = page_df[['Date', 'Match', 'Model_Prob', 'Odds', 'Stake_Pct', 'Outcome', 'PnL', 'Drawdown']].copy()
         display_df.columns = ['Data', 'Jogo', 'Prob. IA', 'Odds', '% Aposta', 'Resultado', 'R$ PnL', 'Queda Max']
-        st.dataframe(display_df.sort_values('Data', ascending=False), use_container_width=True)
\ No newline at end of file
+        st.dataframe(display_df, use_container_width=True)
+
+        with st.expander("🎲 Risco de Ruína (Monte Carlo)"):
+            mc_mode = st.radio("Reamostragem", ['model', 'bootstrap'], horizontal=True,
+                               format_func=lambda m: "Probabilidades do Modelo" if m == 'model' else "Bootstrap Histórico")
+            if st.button("🎲 SIMULAR 100k CAMINHOS"):
+                with st.spinner("Gerando caminhos..."):
+                    mc = MonteCarloSimulator.from_audit(audit_df, mode=mc_mode, fraction=kelly_frac, max_cap=max_cap,
+                                                        initial_bankroll=bankroll)
+                c1, c2 = st.columns(2)
+                c1.metric("Prob. de Ruína (-50%)", f"{mc['ruin_prob']:.2%}")
+                c2.metric("Prob. de Prejuízo", f"{mc['loss_prob']:.2%}")
+                st.dataframe(MonteCarloSimulator.summary_table(mc), use_container_width=True)
+
+# --- TAB 3 ---
+with tab3:
+    if df_hist.empty:
+        st.warning("Sem dados.")
+    else:
+        st.subheader("Varredura de Parâmetros (Kelly x Teto)")
+        ev_min = st.select_slider("EV Mínimo", options=[0.0, 0.02, 0.05, 0.10], value=0.0)
+        metric = st.selectbox("Métrica", ['Final_Bankroll', 'CAGR', 'Max_Drawdown', 'Bets'])
+        if st.button("🎛️ RODAR VARREDURA"):
+            with st.spinner("Avaliando 50x50 combinações..."):
+                sweep_df = Backtester.sweep_params(df_hist, ai_engine,
+                                                   fractions=np.linspace(0.05, 0.50, 50),
+                                                   caps=np.linspace(0.01, 0.10, 50),
+                                                   ev_thresholds=(ev_min,),
+                                                   initial_bankroll=bankroll, window=audit_window)
+            st.plotly_chart(Backtester.plot_sweep_heatmap(sweep_df, metric), use_container_width=True)
+            best = sweep_df.sort_values('Final_Bankroll', ascending=False).head(10)
+            st.dataframe(best, use_container_width=True)
+
+# --- PAINEL DE DIAGNÓSTICO (só com ?debug) ---
+if debug_mode:
+    Profiler.record('rerun', time.perf_counter() - rerun_start)
+    Profiler.end_session()
+    with st.expander("🩺 Diagnóstico do Rerun", expanded=True):
+        st.dataframe(Profiler.report(debug_stats), use_container_width=True)
+        if sampler is not None:
+            sampler.stop()
+            st.caption(f"Amostragem de pilha: {sampler.n_samples} amostras a cada {sampler.interval * 1000:.0f} ms")
+            st.dataframe(sampler.top(25), use_container_width=True)
\ No newline at end of file
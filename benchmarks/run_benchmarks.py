@@ -0,0 +1,357 @@
+# benchmarks/run_benchmarks.py
+# Suíte de benchmarks dos caminhos quentes (inferência, auditoria, carga de dados, startup)
+#
+# Uso (a partir da raiz do repositório):
+#   python benchmarks/run_benchmarks.py                          # roda tudo -> benchmarks/results/<data>.json
+#   python benchmarks/run_benchmarks.py --quick --only audit_100 predict_batch
+#   python benchmarks/run_benchmarks.py --compare benchmarks/results/base.json --threshold 0.2
+#
+# Cada caso é repetido --repeat vezes; o JSON guarda mediana, mínimo e métricas extras (ex: linhas/s).
+# Com --compare, casos com mediana acima de (1 + threshold) x referência são marcados como regressão
+# e o processo sai com código 1 (útil em CI).
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+warnings.filterwarnings('ignore')
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import SyntheticHistory
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+HISTORY_CSV = 'betsight_history.csv'
+HISTORY_STORE = 'betsight_history.store'
+
+BENCHMARKS = {}
+
+
+def benchmark(name, repeat=None):
+    """Registra um caso. A função recebe o contexto e devolve um callable medido (+ métricas extras)."""
+    def register(setup):
+        BENCHMARKS[name] = (setup, repeat)
+        return setup
+    return register
+
+
+def run_subprocess(code):
+    """Roda um trecho Python num processo novo e devolve o tempo que ele mesmo reporta (stdout)."""
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+class Context:
+    """Artefatos compartilhados entre os casos (carregados uma vez, fora da medição)."""
+
+    def __init__(self, quick=False, seed=42):
+        self.quick = quick
+        self.seed = seed
+        self._cache = {}
+
+    def get(self, key, factory):
+        if key not in self._cache:
+            self._cache[key] = factory()
+        return self._cache[key]
+
+    @property
+    def model(self):
+        from src.model import BetModel
+        return self.get('model', BetModel)
+
+    @property
+    def history(self):
+        def load():
+            df = pd.read_csv(HISTORY_CSV, float_precision='round_trip')
+            df['Date'] = pd.to_datetime(df['Date'])
+            return df
+        return self.get('history', load)
+
+    def synthetic(self, n_rows):
+        return self.get(('synthetic', n_rows), lambda: SyntheticHistory(seed=self.seed).generate(n_rows))
+
+
+# --- Casos ---
+@benchmark('model_cold_load', repeat=3)
+def bench_model_cold_load(ctx):
+    code = ("import time, warnings; warnings.filterwarnings('ignore'); t = time.perf_counter(); "
+            "from src.model import BetModel; BetModel(); print(time.perf_counter() - t)")
+    return lambda: {'seconds': run_subprocess(code)}
+
+
+@benchmark('model_load')
+def bench_model_load(ctx):
+    from src.model import BetModel
+    return lambda: BetModel()
+
+
+@benchmark('predict_match_single')
+def bench_predict_match_single(ctx):
+    model = ctx.model
+    games = ctx.synthetic(2_000).head(200 if ctx.quick else 1_000)
+    rows = list(zip(games['HomeTeam'], games['AwayTeam'], games['B365H'], games['B365A']))
+
+    def run():
+        model.cache.clear()
+        latencies = []
+        for row in rows:
+            t = time.perf_counter()
+            model.predict_match(*row)
+            latencies.append(time.perf_counter() - t)
+        ms = np.array(latencies) * 1000
+        return {'p50_ms': float(np.percentile(ms, 50)), 'p99_ms': float(np.percentile(ms, 99)),
+                'calls_per_s': len(rows) / ms.sum() * 1000}
+    return run
+
+
+@benchmark('predict_match_cached')
+def bench_predict_match_cached(ctx):
+    model = ctx.model
+    row = ('Arsenal', 'Chelsea', 2.1, 3.4)
+    model.predict_match(*row)
+
+    def run():
+        t = time.perf_counter()
+        for _ in range(500):
+            model.predict_match(*row)
+        return {'calls_per_s': 500 / (time.perf_counter() - t)}
+    return run
+
+
+@benchmark('predict_batch')
+def bench_predict_batch(ctx):
+    model = ctx.model
+    games = ctx.synthetic(10_000 if ctx.quick else 100_000)
+
+    def run():
+        model.cache.clear()
+        t = time.perf_counter()
+        model.predict_matches(games)
+        return {'rows': len(games), 'rows_per_s': len(games) / (time.perf_counter() - t)}
+    return run
+
+
+@benchmark('explain_batch')
+def bench_explain_batch(ctx):
+    # Mesmo lote do predict_batch: a explicação deve custar da mesma ordem da previsão
+    model = ctx.model
+    games = ctx.synthetic(10_000 if ctx.quick else 100_000)
+    model.explain_matches(games.head(10))   # Pré-computa as contribuições por nó (uma vez por modelo)
+
+    def run():
+        t = time.perf_counter()
+        model.explain_matches(games)
+        return {'rows': len(games), 'rows_per_s': len(games) / (time.perf_counter() - t)}
+    return run
+
+
+def _audit(ctx, df, window):
+    from src.backtest import Backtester
+    model = ctx.model
+
+    def run():
+        model.cache.clear()
+        history, _ = Backtester.run_cfo_audit(df, model, window=window)
+        return {'rows': len(history)}
+    return run
+
+
+@benchmark('audit_100')
+def bench_audit_100(ctx):
+    return _audit(ctx, ctx.history, 100)
+
+
+@benchmark('audit_1900')
+def bench_audit_1900(ctx):
+    return _audit(ctx, ctx.history, None)
+
+
+@benchmark('audit_synthetic_100k', repeat=3)
+def bench_audit_synthetic(ctx):
+    return _audit(ctx, ctx.synthetic(20_000 if ctx.quick else 100_000), None)
+
+
+@benchmark('live_odds_ticks', repeat=3)
+def bench_live_odds_ticks(ctx):
+    import asyncio
+    import json
+    from src.live_odds import LiveOddsEngine, ReplaySource
+    model = ctx.model
+    games = ctx.synthetic(2_000).head(500)
+    rng = np.random.default_rng(ctx.seed)
+    n_ticks = 20_000 if ctx.quick else 200_000
+    # Ticks JSONL: odds de jogos sorteados com ruído de ~1% (a maioria fica abaixo da tolerância)
+    pick = rng.integers(0, len(games), n_ticks)
+    noise = 1 + rng.normal(0, 0.01, (n_ticks, 3))
+    odds = np.round(games[['B365H', 'B365D', 'B365A']].to_numpy()[pick] * noise, 2)
+    ticks = [json.dumps({'Fixture': int(i), 'HomeTeam': h, 'AwayTeam': a, 'B365H': oh, 'B365D': od, 'B365A': oa}).encode()
+             for i, h, a, (oh, od, oa) in zip(pick, games['HomeTeam'].to_numpy()[pick],
+                                             games['AwayTeam'].to_numpy()[pick], odds.tolist())]
+
+    def run():
+        model.cache.clear()
+        engine = LiveOddsEngine(model, ReplaySource(ticks, 2_000), snapshot_path='')
+        t = time.perf_counter()
+        stats = asyncio.run(engine.run())
+        return {'ticks_per_s': n_ticks / (time.perf_counter() - t), 'rescored': stats['rescored'],
+                'batches': stats['batches']}
+    return run
+
+
+@benchmark('history_csv_parse')
+def bench_history_csv_parse(ctx):
+    return lambda: pd.read_csv(HISTORY_CSV)
+
+
+@benchmark('history_store_read')
+def bench_history_store_read(ctx):
+    from src.backtest import Backtester
+    from src.history_store import HistoryStore
+    return lambda: HistoryStore.read(HISTORY_STORE, columns=Backtester.AUDIT_COLUMNS)
+
+
+@benchmark('data_loader', repeat=3)
+def bench_data_loader(ctx):
+    from src.data_loader import DataLoader
+
+    def write_seasons():
+        # Temporadas sintéticas no layout do football-data, lidas do disco (sem rede)
+        source = tempfile.mkdtemp(prefix='betsight_bench_')
+        gen = SyntheticHistory(seed=ctx.seed)
+        df = gen.generate(len(DataLoader.SEASONS) * 380, start_year=2020)
+        df['Season'] = df['Season'].map(dict(zip(sorted(df['Season'].unique()), DataLoader.SEASONS)))
+        gen.write_football_data(df, source, league=DataLoader.LEAGUE)
+        return source
+    source = ctx.get('football_data_dir', write_seasons)
+
+    def run():
+        previous = os.environ.get('BETSIGHT_DATA_DIR')
+        os.environ['BETSIGHT_DATA_DIR'] = source
+        try:
+            df = DataLoader.load_data.__wrapped__()
+        finally:
+            if previous is None:
+                os.environ.pop('BETSIGHT_DATA_DIR', None)
+            else:
+                os.environ['BETSIGHT_DATA_DIR'] = previous
+        return {'rows': len(df)}
+    return run
+
+
+@benchmark('app_import', repeat=3)
+def bench_app_import(ctx):
+    code = ("import time, warnings; warnings.filterwarnings('ignore'); t = time.perf_counter(); "
+            "import streamlit, plotly.express, src.model, src.finance, src.backtest, src.monte_carlo, "
+            "src.history_store, src.cache, src.walk_forward; print(time.perf_counter() - t)")
+    return lambda: {'seconds': run_subprocess(code)}
+
+
+@benchmark('app_startup', repeat=3)
+def bench_app_startup(ctx):
+    # Primeira execução completa do script (init_system + abas), como no primeiro acesso ao dashboard
+    code = ("import time, warnings; warnings.filterwarnings('ignore'); "
+            "from streamlit.testing.v1 import AppTest; t = time.perf_counter(); "
+            f"AppTest.from_file({os.path.join(ROOT, 'app.py')!r}, default_timeout=600).run(); "
+            "print(time.perf_counter() - t)")
+    return lambda: {'seconds': run_subprocess(code)}
+
+
+# --- Execução ---
+def measure(fn, repeat):
+    """Mediana/mínimo de repeat execuções. Casos em subprocesso reportam o próprio tempo ('seconds')."""
+    times, extras = [], []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        extra = fn()
+        elapsed = time.perf_counter() - t
+        extra = extra if isinstance(extra, dict) else {}
+        times.append(extra.pop('seconds', elapsed))
+        extras.append(extra)
+    result = {'median_s': float(np.median(times)), 'min_s': float(np.min(times)), 'runs': repeat}
+    # Métricas extras: mediana entre as repetições
+    for key in extras[0]:
+        result[key] = float(np.median([e[key] for e in extras]))
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    import sklearn
+    return {
+        'timestamp': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__
+    }
+
+
+def run_suite(names=None, repeat=5, quick=False, seed=42):
+    ctx = Context(quick=quick, seed=seed)
+    results = {}
+    for name, (setup, fixed_repeat) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        n = 1 if quick else (fixed_repeat or repeat)
+        results[name] = measure(setup(ctx), n)
+        print(f"⏱️  {name:<24} {results[name]['median_s'] * 1000:>10.1f} ms  (min {results[name]['min_s'] * 1000:.1f} ms)")
+    return {'environment': environment(), 'quick': quick, 'results': results}
+
+
+def compare(current, baseline, threshold=0.2):
+    """Lista (nome, referência, atual, razão, regressão?) para os casos presentes nos dois runs."""
+    rows = []
+    for name, res in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = res['median_s'] / base['median_s'] if base['median_s'] > 0 else float('inf')
+        rows.append((name, base['median_s'], res['median_s'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks do BetSight (resultados em JSON)")
+    parser.add_argument("--only", nargs='+', choices=list(BENCHMARKS), help="Roda só estes casos")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action='store_true', help="1 repetição e dados sintéticos menores")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON (padrão: benchmarks/results/<data>.json)")
+    parser.add_argument("--compare", help="JSON de referência para detectar regressões")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Tolerância relativa (0.2 = +20%%)")
+    args = parser.parse_args()
+
+    report = run_suite(args.only, args.repeat, args.quick, args.seed)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"✅ Resultados em {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = 0
+        for name, base_s, cur_s, ratio, regressed in compare(report, baseline, args.threshold):
+            flag = '🔴 REGRESSÃO' if regressed else ('🟢' if ratio < 1 else '⚪')
+            print(f"{name:<24} {base_s * 1000:>10.1f} ms -> {cur_s * 1000:>10.1f} ms  x{ratio:.2f}  {flag}")
+            regressions += regressed
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,127 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Times que o encoder do modelo congelado conhece (o restante vira "time novo" -> fallback do mercado)
+KNOWN_TEAMS = ['Arsenal', 'Aston Villa', 'Bournemouth', 'Brentford', 'Brighton', 'Burnley', 'Chelsea',
+               'Crystal Palace', 'Everton', 'Fulham', 'Ipswich', 'Leeds', 'Leicester', 'Liverpool', 'Luton',
+               'Man City', 'Man United', 'Newcastle', "Nott'm Forest", 'Sheffield United', 'Southampton',
+               'Tottenham', 'Watford', 'West Brom', 'West Ham', 'Wolves', 'Norwich']
+
+SEASON_TEAMS = 20
+MAX_GOALS = 10
+
+
+class SyntheticHistory:
+    """
+    Gerador de históricos sintéticos no layout do football-data (Date, HomeTeam, ..., B365A).
+    Força de ataque/defesa por time (com deriva entre temporadas), gols Poisson com mando de campo,
+    odds da casa = probabilidade verdadeira + margem + ruído, arredondadas a 2 casas.
+    Mesma semente -> mesmo histórico (benchmarks reprodutíveis).
+    """
+
+    def __init__(self, seed=42, overround=1.05, odds_noise=0.04, home_adv=0.25, new_team_share=0.1):
+        self.rng = np.random.default_rng(seed)
+        self.overround = overround            # Margem da casa (soma das probabilidades implícitas)
+        self.odds_noise = odds_noise          # Desvio (log) do erro da casa em relação à probabilidade real
+        self.home_adv = home_adv              # Vantagem de mando (log da taxa de gols)
+        self.new_team_share = new_team_share  # Fração de times fora do encoder (ex: promovidos)
+
+    @staticmethod
+    def _round_robin(n_teams):
+        """Turno e returno pelo método do círculo: lista de rodadas com (mandante, visitante)."""
+        teams = list(range(n_teams))
+        rounds = []
+        for r in range(n_teams - 1):
+            pairs = [(teams[i], teams[n_teams - 1 - i]) for i in range(n_teams // 2)]
+            rounds.append([(a, b) if r % 2 == 0 else (b, a) for a, b in pairs])
+            teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+        return rounds + [[(b, a) for a, b in rnd] for rnd in rounds]
+
+    def _outcome_probs(self, lam_h, lam_a):
+        """P(H), P(D), P(A) a partir de gols Poisson independentes (grade até MAX_GOALS)."""
+        goals = np.arange(MAX_GOALS + 1)
+        log_fact = np.cumsum(np.log(np.maximum(goals, 1)))
+        pmf_h = np.exp(goals * np.log(lam_h[:, None]) - lam_h[:, None] - log_fact)
+        pmf_a = np.exp(goals * np.log(lam_a[:, None]) - lam_a[:, None] - log_fact)
+        joint = pmf_h[:, :, None] * pmf_a[:, None, :]
+        p_home = np.tril(np.ones((MAX_GOALS + 1, MAX_GOALS + 1)), -1)
+        ph = (joint * p_home).sum(axis=(1, 2))
+        pa = (joint * p_home.T).sum(axis=(1, 2))
+        p_draw = np.trace(joint, axis1=1, axis2=2)
+        total = ph + p_draw + pa
+        return ph / total, p_draw / total, pa / total
+
+    def generate(self, n_rows, start_year=2000) -> pd.DataFrame:
+        """Histórico com n_rows jogos (temporadas de 380 jogos, rodadas semanais aos sábados)."""
+        rng = self.rng
+        n_new = max(1, int(round(len(KNOWN_TEAMS) * self.new_team_share / (1 - self.new_team_share))))
+        pool = np.array(KNOWN_TEAMS + [f"Team {i:02d}" for i in range(n_new)])
+        attack_sd, defense_sd, persistence = 0.28, 0.2, 0.9
+        attack = rng.normal(0.0, attack_sd, len(pool))
+        defense = rng.normal(0.0, defense_sd, len(pool))
+        shock = np.sqrt(1 - persistence ** 2)
+        schedule = self._round_robin(SEASON_TEAMS)
+
+        homes, aways, dates, seasons = [], [], [], []
+        rates_h, rates_a = [], []
+        n_seasons = -(-n_rows // (SEASON_TEAMS * (SEASON_TEAMS - 1)))
+        for s in range(n_seasons):
+            year = start_year + s
+            teams = rng.choice(len(pool), SEASON_TEAMS, replace=False)
+            # Deriva de força entre temporadas (AR(1): a dispersão não explode em históricos longos)
+            attack = persistence * attack + rng.normal(0.0, attack_sd * shock, len(pool))
+            defense = persistence * defense + rng.normal(0.0, defense_sd * shock, len(pool))
+            first_day = pd.Timestamp(year=year, month=8, day=10)
+            first_day += pd.Timedelta(days=(5 - first_day.dayofweek) % 7)
+            season_h, season_a = [], []
+            for r, rnd in enumerate(schedule):
+                day = first_day + pd.Timedelta(weeks=r)
+                for h, a in rnd:
+                    season_h.append(teams[h])
+                    season_a.append(teams[a])
+                    dates.append(day)
+                    seasons.append(str(year))
+            # Taxas de gols com as forças desta temporada (a deriva chega aos resultados e às odds)
+            season_h, season_a = np.array(season_h), np.array(season_a)
+            rates_h.append(np.exp(0.15 + self.home_adv + attack[season_h] - defense[season_a]))
+            rates_a.append(np.exp(0.15 + attack[season_a] - defense[season_h]))
+            homes.append(season_h)
+            aways.append(season_a)
+
+        homes = np.concatenate(homes)[:n_rows]
+        aways = np.concatenate(aways)[:n_rows]
+        lam_h = np.concatenate(rates_h)[:n_rows]
+        lam_a = np.concatenate(rates_a)[:n_rows]
+        ph, pdraw, pa = self._outcome_probs(lam_h, lam_a)
+
+        fthg = rng.poisson(lam_h)
+        ftag = rng.poisson(lam_a)
+        ftr = np.where(fthg > ftag, 'H', np.where(fthg == ftag, 'D', 'A'))
+
+        def bookmaker(p):
+            noisy = p * np.exp(rng.normal(0.0, self.odds_noise, len(p)))
+            return np.maximum(np.round(1 / (noisy * self.overround), 2), 1.01)
+
+        return pd.DataFrame({
+            'Date': pd.to_datetime(dates[:n_rows]),
+            'HomeTeam': pool[homes],
+            'AwayTeam': pool[aways],
+            'FTHG': fthg,
+            'FTAG': ftag,
+            'FTR': ftr,
+            'B365H': bookmaker(ph),
+            'B365D': bookmaker(pdraw),
+            'B365A': bookmaker(pa),
+            'Season': seasons[:n_rows]
+        })
+
+    def write_football_data(self, df: pd.DataFrame, root, league='E0'):
+        """Grava no layout {root}/{temporada}/{liga}.csv (Latin-1, datas dd/mm/yyyy) lido pelo SeasonDownloader."""
+        for season, part in df.groupby('Season', sort=False):
+            folder = os.path.join(root, season)
+            os.makedirs(folder, exist_ok=True)
+            out = part.drop(columns='Season').assign(Div=league, Date=part['Date'].dt.strftime('%d/%m/%Y'))
+            out.to_csv(os.path.join(folder, f"{league}.csv"), index=False, encoding='ISO-8859-1')
+        return sorted(df['Season'].unique())
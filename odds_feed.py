@@ -0,0 +1,53 @@
+# odds_feed.py
+# Consumidor de odds ao vivo (asyncio) com re-score incremental
+#
+# Uso:
+#   python odds_feed.py --file feed.jsonl                 # acompanha o arquivo (tail -f)
+#   python odds_feed.py --port 8700                       # recebe ticks por TCP: nc localhost 8700 < feed.jsonl
+#   python odds_feed.py --file feed.jsonl --tolerance 0.03 --window-ms 100
+#
+# Cada tick é uma linha JSON: {"HomeTeam": "Arsenal", "AwayTeam": "Chelsea", "B365H": 2.1, "B365D": 3.4, "B365A": 3.5}
+# (Date ou Fixture opcionais identificam o jogo). Só jogos cujas odds moveram além da tolerância
+# são re-pontuados, em lotes; o dashboard (aba Radar, "Feed de Odds ao Vivo") lê o snapshot gravado.
+
+import argparse
+import asyncio
+import warnings
+
+from src.model import BetModel
+from src.live_odds import FileTailSource, SocketSource, LiveOddsEngine
+
+warnings.filterwarnings('ignore')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consumidor de odds ao vivo (re-score só dos jogos que mudaram)")
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument("--file", help="Arquivo JSONL acompanhado em tempo real")
+    source_group.add_argument("--port", type=int, help="Porta TCP local para receber ticks JSONL")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--replay", action='store_true', help="Com --file: lê até o fim e encerra")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Movimento relativo mínimo (0.02 = 2%%)")
+    parser.add_argument("--window-ms", type=float, default=50.0, help="Janela de coalescência do re-score")
+    parser.add_argument("--bankroll", type=float, default=1000.0)
+    parser.add_argument("--fraction", type=float, default=0.25, help="Fração de Kelly")
+    parser.add_argument("--max-cap", type=float, default=0.05, help="Teto por aposta")
+    parser.add_argument("--snapshot", default=LiveOddsEngine.SNAPSHOT_PATH, help="Snapshot JSON lido pelo dashboard")
+    args = parser.parse_args()
+
+    if args.file:
+        source = FileTailSource(args.file, follow=not args.replay)
+    else:
+        source = SocketSource(args.host, args.port)
+    engine = LiveOddsEngine(BetModel(), source, tolerance=args.tolerance, batch_window_ms=args.window_ms,
+                            bankroll=args.bankroll, fraction=args.fraction, max_cap=args.max_cap,
+                            snapshot_path=args.snapshot)
+
+    print(f"📡 Consumindo odds de {args.file or f'{args.host}:{args.port}'} -> {args.snapshot}")
+    try:
+        asyncio.run(engine.run())
+    except KeyboardInterrupt:
+        engine.write_snapshot()
+    stats = engine.snapshot()['stats']
+    print(f"✅ {stats['ticks']} ticks, {stats['rescored']} re-scores em {stats['batches']} lotes "
+          f"({stats['fixtures']} jogos, {stats['errors']} linhas inválidas, {stats['rescore_errors']} lotes com erro)")
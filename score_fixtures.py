@@ -0,0 +1,96 @@
+# score_fixtures.py
+# Pontuação em lote sem Streamlit (CLI headless)
+#
+# Uso:
+#   python score_fixtures.py jogos.csv -o decisoes.csv
+#   python score_fixtures.py jogos.jsonl --bankroll 5000 --chunk-size 50000 > decisoes.csv
+#
+# Lê CSV ou JSONL em blocos de tamanho fixo, pontua cada bloco de forma vetorizada
+# (BetModel.predict_matches + Kelly) e escreve o resultado em streaming: a memória
+# não cresce com o tamanho da entrada.
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.model import BetModel
+from src.finance import RiskManager
+
+REQUIRED = ['HomeTeam', 'AwayTeam', 'B365H', 'B365A']
+
+
+def read_chunks(path, chunk_size, fmt=None):
+    """Iterador de DataFrames com no máximo chunk_size linhas (CSV ou JSONL)."""
+    if fmt is None:
+        fmt = 'jsonl' if str(path).lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+    source = sys.stdin if path == '-' else path
+    if fmt == 'jsonl':
+        return pd.read_json(source, lines=True, chunksize=chunk_size)
+    return pd.read_csv(source, chunksize=chunk_size)
+
+
+def score_chunk(model, chunk, bankroll, fraction, max_cap):
+    """Probabilidades, EV, stake e semáforo para um bloco de jogos."""
+    missing = [c for c in REQUIRED if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes: {missing}")
+
+    probs = model.predict_matches(chunk)
+    p_home = probs['H'].to_numpy()
+    odds_h = chunk['B365H'].to_numpy(dtype=float)
+    stakes = RiskManager.calculate_stakes(p_home, odds_h, bankroll, fraction, max_cap)
+    signal = RiskManager.traffic_light(stakes['ev'], p_home)
+
+    out = chunk.copy()
+    out['Prob_H'] = p_home
+    out['Prob_D'] = probs['D'].to_numpy()
+    out['Prob_A'] = probs['A'].to_numpy()
+    out['EV'] = stakes['ev']
+    out['Stake_Pct'] = np.round(stakes['stake_pct'] * 100, 2)
+    out['Stake_Val'] = np.round(stakes['stake_val'], 2)
+    out['Decision'] = pd.Series(signal, index=chunk.index).map(RiskManager.SIGNALS)
+    return out
+
+
+def run(path, output=None, fmt=None, out_fmt='csv', chunk_size=10_000, bankroll=1000.0, fraction=0.25, max_cap=0.05):
+    # Sem cache de previsões: jogos de um lote raramente se repetem e o LRU cresceria com a entrada
+    model = BetModel(cache_size=0)
+    sink = sys.stdout if output in (None, '-') else open(output, 'w', encoding='utf-8', newline='')
+    n_rows = 0
+    start = time.perf_counter()
+    try:
+        for i, chunk in enumerate(read_chunks(path, chunk_size, fmt)):
+            scored = score_chunk(model, chunk, bankroll, fraction, max_cap)
+            if out_fmt == 'jsonl':
+                if not scored.empty:
+                    text = scored.to_json(orient='records', lines=True, force_ascii=False)
+                    sink.write(text if text.endswith('\n') else text + '\n')
+            else:
+                scored.to_csv(sink, index=False, header=(i == 0))
+            n_rows += len(chunk)
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    rate = n_rows / elapsed if elapsed > 0 else float('inf')
+    print(f"✅ {n_rows} jogos pontuados em {elapsed:.2f}s ({rate:,.0f} linhas/s)", file=sys.stderr)
+    return n_rows, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pontuação em lote de jogos (CSV/JSONL) com BetModel + RiskManager")
+    parser.add_argument("input", help="Arquivo CSV ou JSONL com HomeTeam, AwayTeam, B365H, B365A ('-' para stdin)")
+    parser.add_argument("-o", "--output", help="Arquivo de saída (padrão: stdout)")
+    parser.add_argument("--input-format", choices=['csv', 'jsonl'], help="Força o formato de entrada")
+    parser.add_argument("--output-format", choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--bankroll", type=float, default=1000.0)
+    parser.add_argument("--fraction", type=float, default=0.25, help="Fração de Kelly")
+    parser.add_argument("--max-cap", type=float, default=0.05, help="Teto por aposta")
+    args = parser.parse_args()
+    run(args.input, args.output, args.input_format, args.output_format, args.chunk_size,
+        args.bankroll, args.fraction, args.max_cap)
@@ -0,0 +1,279 @@
+# scoring_server.py
+# Serviço HTTP local de pontuação (sem Streamlit)
+#
+# Uso:
+#   python scoring_server.py --port 8600 --max-wait-ms 5 --max-batch 256
+#
+#   curl -s localhost:8600/predict -d '{"matches": [{"HomeTeam": "Arsenal", "AwayTeam": "Chelsea", "B365H": 2.1, "B365A": 3.4}]}'
+#   curl -s localhost:8600/stake -d '{"bankroll": 1000, "matches": [...]}'
+#   curl -s localhost:8600/stats
+#
+# O modelo é carregado uma vez (só artefatos locais). Requisições concorrentes entram numa fila;
+# um único thread junta tudo que chegar em até max_wait_ms (ou max_batch jogos) e responde o
+# lote inteiro com uma chamada ao BetModel.predict_matches (um predict_proba por lote).
+
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from src.model import BetModel
+from src.finance import RiskManager
+from src.portfolio import PortfolioAllocator
+
+REQUIRED = ['HomeTeam', 'AwayTeam', 'B365H', 'B365A']
+ODDS_COLUMNS = ['B365H', 'B365A']
+
+
+class MicroBatcher:
+    """Fila + thread de lote: junta jogos de várias requisições numa única previsão."""
+
+    def __init__(self, model, max_batch=256, max_wait_ms=5.0, stats_window=10_000):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.batch_sizes = deque(maxlen=stats_window)
+        self.n_batches = 0
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, matches: pd.DataFrame) -> Future:
+        """Enfileira um bloco de jogos; o Future recebe o DataFrame H, D, A, Mkt_Diff."""
+        future = Future()
+        self.queue.put((matches, future))
+        return future
+
+    def _loop(self):
+        while True:
+            items = [self.queue.get()]
+            n_rows = len(items[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            # Junta o que chegar até o prazo ou até encher o lote
+            while n_rows < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                items.append(item)
+                n_rows += len(item[0])
+            self._run_batch(items, n_rows)
+
+    def _run_batch(self, items, n_rows):
+        self.n_batches += 1
+        self.batch_sizes.append(n_rows)
+        try:
+            batch = pd.concat([m for m, _ in items], ignore_index=True)
+            probs = self.model.predict_matches(batch)
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        start = 0
+        for matches, future in items:
+            future.set_result(probs.iloc[start:start + len(matches)].reset_index(drop=True))
+            start += len(matches)
+
+    def stats(self):
+        sizes = np.asarray(self.batch_sizes, dtype=float)
+        return {
+            'batches': self.n_batches,
+            'queue_depth': self.queue.qsize(),
+            'batch_size_mean': float(sizes.mean()) if len(sizes) else 0.0,
+            'batch_size_p50': float(np.percentile(sizes, 50)) if len(sizes) else 0.0,
+            'batch_size_max': int(sizes.max()) if len(sizes) else 0
+        }
+
+
+class LatencyTracker:
+    """Latências recentes por endpoint (janela deslizante) -> p50 / p99 em ms."""
+
+    def __init__(self, window=10_000):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self.lock:
+            self.samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds * 1000)
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+
+    def stats(self):
+        with self.lock:
+            out = {}
+            for endpoint, values in self.samples.items():
+                ms = np.asarray(values)
+                out[endpoint] = {
+                    'requests': self.counts[endpoint],
+                    'p50_ms': float(np.percentile(ms, 50)),
+                    'p99_ms': float(np.percentile(ms, 99))
+                }
+            return out
+
+
+def parse_matches(payload):
+    """Aceita {"matches": [...]}, uma lista de jogos ou um jogo único. Odds viram float e precisam ser > 1."""
+    matches = payload.get('matches', payload) if isinstance(payload, dict) else payload
+    if isinstance(matches, dict):
+        matches = [matches]
+    if not isinstance(matches, list) or not all(isinstance(m, dict) for m in matches):
+        raise ValueError("Esperado um jogo, uma lista de jogos ou {\"matches\": [...]}")
+    df = pd.DataFrame(matches)
+    missing = [c for c in REQUIRED if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes: {missing}")
+    for col in ODDS_COLUMNS:
+        odds = pd.to_numeric(df[col], errors='coerce').astype(float)
+        bad = ~(np.isfinite(odds.to_numpy()) & (odds.to_numpy() > 1.0))
+        if bad.any():
+            raise ValueError(f"{col} inválida (odds decimais > 1) nos jogos {np.flatnonzero(bad).tolist()[:10]}")
+        df[col] = odds
+    return df
+
+
+def parse_stake_params(payload):
+    """Parâmetros de banca do /stake; o corpo precisa ser um objeto JSON."""
+    if not isinstance(payload, dict):
+        raise ValueError("/stake espera um objeto JSON: {\"bankroll\": ..., \"matches\": [...]}")
+    params = {'bankroll': float(payload.get('bankroll', 1000.0)),
+              'fraction': float(payload.get('fraction', 0.25)),
+              'max_cap': float(payload.get('max_cap', 0.05)),
+              'max_total': payload.get('max_total')}
+    if params['max_total'] is not None:
+        params['max_total'] = float(params['max_total'])
+    if not all(np.isfinite(v) for v in params.values() if v is not None):
+        raise ValueError("bankroll, fraction, max_cap e max_total precisam ser números finitos")
+    return params
+
+
+def stake_response(matches, probs, params):
+    """Stake + semáforo por jogo (Kelly individual, ou de portfólio se max_total vier no corpo)."""
+    bankroll, fraction, max_cap, max_total = (params['bankroll'], params['fraction'],
+                                              params['max_cap'], params['max_total'])
+
+    p_home = probs['H'].to_numpy()
+    odds_h = matches['B365H'].to_numpy(dtype=float)
+    stakes = RiskManager.calculate_stakes(p_home, odds_h, bankroll, fraction, max_cap)
+    if max_total is not None:
+        stakes['stake_pct'] = PortfolioAllocator.allocate(p_home, odds_h, fraction, max_cap, max_total)
+        stakes['stake_val'] = bankroll * stakes['stake_pct']
+    signal = RiskManager.traffic_light(stakes['ev'], p_home)
+
+    return [{
+        'HomeTeam': str(h), 'AwayTeam': str(a),
+        'H': float(ph), 'D': float(pdraw), 'A': float(pa),
+        'EV': float(ev),
+        'Stake_Pct': round(float(pct) * 100, 2),
+        'Stake_Val': round(float(val), 2),
+        'Decision': RiskManager.SIGNALS[str(sig)]
+    } for h, a, ph, pdraw, pa, ev, pct, val, sig in zip(
+        matches['HomeTeam'], matches['AwayTeam'], p_home, probs['D'], probs['A'],
+        stakes['ev'], stakes['stake_pct'], stakes['stake_val'], signal)]
+
+
+def make_handler(model, batcher, latency, timeout=30.0):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass  # Sem log por requisição (latência vai para /stats)
+
+        def _send(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'status': 'ok', 'model_version': model.model_version})
+            elif self.path == '/stats':
+                self._send(200, {'latency': latency.stats(), 'batching': batcher.stats(),
+                                 'model_cache': model.cache_stats()})
+            else:
+                self._send(404, {'error': f"Rota desconhecida: {self.path}"})
+
+        def do_POST(self):
+            start = time.perf_counter()
+            endpoint = self.path.rstrip('/')
+            if endpoint not in ('/predict', '/stake'):
+                self._send(404, {'error': f"Rota desconhecida: {self.path}"})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                matches = parse_matches(payload)
+                params = parse_stake_params(payload) if endpoint == '/stake' else None
+            except (ValueError, TypeError) as e:
+                self._send(400, {'error': str(e)})
+                return
+
+            try:
+                probs = batcher.submit(matches).result(timeout=timeout)
+                if endpoint == '/predict':
+                    body = {'predictions': probs[['H', 'D', 'A', 'Mkt_Diff']].to_dict(orient='records')}
+                else:
+                    body = {'stakes': stake_response(matches, probs, params)}
+            except Exception as e:
+                self._send(500, {'error': str(e)})
+                return
+            self._send(200, body)
+            latency.record(endpoint, time.perf_counter() - start)
+
+    return ScoringHandler
+
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    """
+    ThreadingHTTPServer com fila de conexões longa. O padrão do socketserver (5) faz o kernel
+    recusar/resetar conexões justamente na rajada de clientes que o micro-batching deveria juntar.
+    """
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, handler, backlog=None):
+        if backlog is not None:
+            self.request_queue_size = backlog   # Precisa valer antes do listen() no __init__
+        super().__init__(address, handler)
+
+
+def make_server(host='127.0.0.1', port=8600, max_batch=256, max_wait_ms=5.0, model=None, backlog=None):
+    """Monta o servidor (modelo carregado uma vez). Retorna (server, batcher, latency)."""
+    model = model or BetModel()
+    batcher = MicroBatcher(model, max_batch, max_wait_ms)
+    latency = LatencyTracker()
+    server = ScoringHTTPServer((host, port), make_handler(model, batcher, latency), backlog)
+    return server, batcher, latency
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor HTTP local de pontuação (BetModel + RiskManager)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-batch", type=int, default=256, help="Máximo de jogos por lote")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Espera máxima para fechar um lote")
+    parser.add_argument("--backlog", type=int, default=ScoringHTTPServer.request_queue_size,
+                        help="Fila de conexões pendentes do socket (clientes simultâneos)")
+    args = parser.parse_args()
+
+    server, _, _ = make_server(args.host, args.port, args.max_batch, args.max_wait_ms, backlog=args.backlog)
+    print(f"🦅 BetSight scoring em http://{args.host}:{args.port} (/predict, /stake, /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,6 +1,11 @@
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from src.finance import RiskManager
+from src.history_store import HistoryStore
+from src.portfolio import PortfolioAllocator
+from src.profiling import Profiler
 
 class Backtester:
     """
@@ -8,16 +13,79 @@ class Backtester:
     Simula Juros Compostos, Quarter Kelly e Drawdown.
     """
 
+    # Colunas do histórico que a auditoria realmente lê
+    AUDIT_COLUMNS = ['Date', 'HomeTeam', 'AwayTeam', 'FTR', 'B365H', 'B365A']
+
     @staticmethod
-    def run_cfo_audit(df: pd.DataFrame, model_engine, initial_bankroll=1000.0):
+    def select_window(df: pd.DataFrame, window=100):
         """
-        Simulação Walk-Forward rigorosa.
+        Recorta a janela da auditoria em ordem cronológica.
+        window: int (últimos N jogos), tupla (inicio, fim) de datas ou None (histórico completo).
         """
         # Ordenação cronológica vital
-        df = df.sort_values('Date').reset_index(drop=True)
-        # Pega amostra recente (ex: últimos 100 jogos) para performance recente
-        df = df.tail(100).copy()
-        
+        decimals = df.attrs.get('float_decimals')
+        df = df.sort_values('Date', kind='stable').reset_index(drop=True)
+
+        if window is None:
+            df = df.copy()
+        elif isinstance(window, (tuple, list)):
+            start, end = window
+            mask = np.ones(len(df), dtype=bool)
+            if start is not None:
+                mask &= (df['Date'] >= pd.Timestamp(start)).to_numpy()
+            if end is not None:
+                mask &= (df['Date'] <= pd.Timestamp(end)).to_numpy()
+            df = df[mask].reset_index(drop=True)
+        else:
+            df = df.tail(int(window)).reset_index(drop=True)
+
+        # Store lido com exact=False: odds float32 viram float64 exato só nas linhas da janela
+        if decimals:
+            df.attrs['float_decimals'] = decimals
+        return HistoryStore.restore_floats(df)
+
+    @staticmethod
+    @Profiler.timed()
+    def run_cfo_audit(df: pd.DataFrame, model_engine, initial_bankroll=1000.0, window=100,
+                      fraction=0.25, max_cap=0.05, engine='vectorized', cache=None, max_total=None):
+        """
+        Simulação Walk-Forward rigorosa.
+        engine='vectorized' pontua a janela inteira em lote; engine='loop' mantém a simulação linha a linha.
+        cache: AuditCache opcional; mudar só a banca reescala o resultado guardado.
+        max_total: liga o Kelly de Portfólio (jogos do mesmo dia apostados juntos, exposição total limitada).
+        """
+        if cache is not None and initial_bankroll > 0:
+            params = dict(window=window, fraction=fraction, max_cap=max_cap, engine=engine)
+            if max_total is not None:
+                params['max_total'] = max_total
+            # Features extras do modelo (ex.: forma pré-jogo) também entram na impressão digital dos dados
+            extra = [c for c in getattr(model_engine, 'features', []) if c in df.columns and c not in Backtester.AUDIT_COLUMNS]
+            key = cache.make_key(cache.fingerprint(df[Backtester.AUDIT_COLUMNS + extra]),
+                                 getattr(model_engine, 'model_version', None), **params)
+            cached = cache.get(key, initial_bankroll)
+            if cached is not None:
+                return cached
+            # Simula com banca unitária e guarda normalizado
+            result = Backtester.run_cfo_audit(df, model_engine, 1.0, window, fraction, max_cap, engine,
+                                              max_total=max_total)
+            cache.put(key, result)
+            return cache.rescale(result, initial_bankroll)
+
+        df = Backtester.select_window(df, window)
+
+        # Previsão em lote (uma chamada ao modelo para toda a janela)
+        df['Model_Prob'] = model_engine.predict_matches(df)['H'].to_numpy()
+
+        if engine == 'vectorized':
+            return Backtester._simulate_vectorized(df, initial_bankroll, fraction, max_cap, max_total)
+        if engine != 'loop':
+            raise ValueError(f"Engine desconhecido: {engine}")
+        if max_total is not None:
+            raise ValueError("Kelly de Portfólio disponível apenas no engine vetorizado.")
+        if df.empty:
+            # Janela sem jogos: mesmo formato do motor vetorizado (log vazio + só o ponto inicial)
+            return Backtester._simulate_vectorized(df, initial_bankroll, fraction, max_cap)
+
         history = []
         current_bank = initial_bankroll
         high_water_mark = initial_bankroll
@@ -28,28 +96,12 @@ class Backtester:
         for idx, row in df.iterrows():
             # 1. Dados
             odds_h = row['B365H']
-            odds_a = row['B365A']
             
             # 2. Previsão
-            probs = model_engine.predict_match(row['HomeTeam'], row['AwayTeam'], odds_h, odds_a)
-            prob_h = probs['H']
-            
-            # 3. Lógica Financeira (CFO Risk Engine)
-            # Kelly Criterion Pura
-            b = odds_h - 1
-            if b <= 0: b = 0.01
-            p = prob_h
-            q = 1 - p
-            
-            kelly_raw = ((b * p) - q) / b
+            prob_h = row['Model_Prob']
             
-            # Aplicação das Travas
-            stake_pct = 0.0
-            if kelly_raw > 0:
-                # Quarter Kelly
-                stake_pct = kelly_raw * 0.25
-                # Hard Cap 5%
-                if stake_pct > 0.05: stake_pct = 0.05
+            # 3. Lógica Financeira (CFO Risk Engine): Kelly + Travas do RiskManager
+            stake_pct = float(RiskManager.stake_fractions(prob_h, odds_h, fraction, max_cap))
             
             # 4. Execução da Aposta
             money_stake = current_bank * stake_pct
@@ -99,8 +151,248 @@ class Backtester:
         return pd.DataFrame(history), pd.DataFrame(equity_curve)
 
     @staticmethod
-    def plot_dashboard(equity_df):
+    def run_walk_forward_audit(df: pd.DataFrame, initial_bankroll=1000.0, block='season',
+                               fraction=0.25, max_cap=0.05, trainer=None, max_total=None, window=None, cache=None):
+        """
+        Auditoria fora da amostra: cada bloco é pontuado por um modelo retreinado só com o passado.
+        df precisa das features do treino e do Target (ver WalkForwardTrainer.FEATURES).
+        window recorta os jogos pontuados (mesma regra do select_window); o treino usa sempre todo o passado.
+        cache: AuditCache opcional, com a mesma normalização por banca do run_cfo_audit.
+        """
+        from src.walk_forward import WalkForwardTrainer
+        trainer = trainer or WalkForwardTrainer(block=block)
+        if cache is not None and initial_bankroll > 0:
+            cols = [c for c in Backtester.AUDIT_COLUMNS + trainer.FEATURES + ['Target', 'Season_ID'] if c in df.columns]
+            params = dict(window=window, fraction=fraction, max_cap=max_cap, block=trainer.block,
+                          min_train_rows=trainer.min_train_rows, trainer_params=trainer.params)
+            if max_total is not None:
+                params['max_total'] = max_total
+            key = cache.make_key(cache.fingerprint(df[cols]), 'walk_forward', **params)
+            cached = cache.get(key, initial_bankroll)
+            if cached is not None:
+                return cached
+            result = Backtester.run_walk_forward_audit(df, 1.0, block, fraction, max_cap, trainer, max_total, window)
+            cache.put(key, result)
+            return cache.rescale(result, initial_bankroll)
+
+        scored = Backtester.select_window(trainer.predict(df), window)
+        scored['Model_Prob'] = scored['H']
+        return Backtester._simulate_vectorized(scored, initial_bankroll, fraction, max_cap, max_total)
+
+    @staticmethod
+    def _simulate_vectorized(df: pd.DataFrame, initial_bankroll, fraction, max_cap, max_total=None):
+        """
+        Motor vetorizado: stakes, PnL e resultados em arrays.
+        Só a capitalização composta é sequencial (cumprod); o topo vem de maximum.accumulate.
+        Com max_total, os jogos de cada data formam uma rodada: stakes do PortfolioAllocator
+        sobre a banca do início do dia.
+        """
+        odds_h = df['B365H'].to_numpy(dtype=float)
+        prob_h = df['Model_Prob'].to_numpy(dtype=float)
+        result = df['FTR'].to_numpy()
+
+        # 1. Kelly + Travas (mesma regra do RiskManager) ou Kelly de Portfólio por data
+        if max_total is None:
+            stake_pct = RiskManager.stake_fractions(prob_h, odds_h, fraction, max_cap)
+        else:
+            stake_pct = PortfolioAllocator.allocate_by_group(prob_h, odds_h, df['Date'].to_numpy(),
+                                                             fraction, max_cap, max_total)
+
+        # 2. Retorno por unidade apostada
+        win = result == 'H'
+        placed = stake_pct > 0
+        unit_ret = np.where(placed, np.where(win, odds_h - 1, -1.0), 0.0)
+
+        if max_total is None:
+            # 3. Juros compostos: B_t = B_{t-1} * (1 + f_t * r_t)
+            bankroll = initial_bankroll * np.cumprod(1 + stake_pct * unit_ret)
+            bank_before = np.concatenate(([initial_bankroll], bankroll[:-1]))
+            money_stake = bank_before * stake_pct
+            profit_loss = money_stake * unit_ret
+        else:
+            # 3. Juros compostos por rodada: todas as apostas do dia usam a banca da abertura
+            day, _ = pd.factorize(df['Date'].to_numpy())
+            day_growth = 1 + np.bincount(day, weights=stake_pct * unit_ret)
+            day_open = initial_bankroll * np.concatenate(([1.0], np.cumprod(day_growth)[:-1]))
+            money_stake = day_open[day] * stake_pct
+            profit_loss = money_stake * unit_ret
+            bankroll = initial_bankroll + np.cumsum(profit_loss)
+
+        # 4. Drawdown a partir do topo histórico
+        high_water_mark = np.maximum.accumulate(np.concatenate(([initial_bankroll], bankroll)))[1:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown_pct = np.where(high_water_mark > 0, (high_water_mark - bankroll) / high_water_mark, 0.0)
+
+        outcome = np.where(placed, np.where(win, 'Win', 'Loss'), 'Skip')
+
+        history = pd.DataFrame({
+            'Date': df['Date'].to_numpy(),
+            'Match': df['HomeTeam'].astype(str) + ' vs ' + df['AwayTeam'].astype(str),
+            'Model_Prob': prob_h,
+            'Odds': odds_h,
+            'Stake_Pct': stake_pct,
+            'Stake_Val': money_stake,
+            'Result': result,
+            'Outcome': outcome,
+            'PnL': profit_loss,
+            'Bankroll': bankroll,
+            'Drawdown': drawdown_pct
+        })
+
+        # Ponto inicial + um ponto por jogo (janela vazia: só o ponto inicial, sem data)
+        dates = df['Date'].to_numpy()
+        start = dates[:1] if len(dates) else np.full(1, np.datetime64('NaT'))
+        equity_curve = pd.DataFrame({
+            'Date': np.concatenate((start, dates)),
+            'Bankroll': np.concatenate(([initial_bankroll], bankroll)),
+            'Drawdown_Pct': np.concatenate(([0.0], drawdown_pct))
+        })
+
+        return history, equity_curve
+
+    @staticmethod
+    @Profiler.timed()
+    def sweep_params(df: pd.DataFrame, model_engine, fractions, caps, ev_thresholds=(0.0,),
+                     initial_bankroll=1000.0, window=None, max_cells=2_000_000):
+        """
+        Varredura de parâmetros (Fração de Kelly x Teto x EV mínimo).
+        O modelo pontua a janela uma única vez; cada combinação é avaliada por broadcast NumPy.
+        max_cells limita o bloco (frações x tetos x jogos) avaliado de cada vez: a memória de pico
+        não cresce com o tamanho da grade.
+        Retorna uma linha por combinação com Banca Final, CAGR, Drawdown Máximo e nº de apostas.
+        """
+        df = Backtester.select_window(df, window)
+        columns = ['Fraction', 'Max_Cap', 'EV_Min', 'Final_Bankroll', 'CAGR', 'Max_Drawdown', 'Bets']
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+
+        prob_h = model_engine.predict_matches(df)['H'].to_numpy(dtype=float)
+        odds_h = df['B365H'].to_numpy(dtype=float)
+        win = df['FTR'].to_numpy() == 'H'
+
+        fractions = np.asarray(fractions, dtype=float)
+        caps = np.asarray(caps, dtype=float)
+
+        unit_ret = np.where(win, odds_h - 1, -1.0)
+
+        # Anos cobertos pela janela (para o CAGR)
+        years = 0.0
+        if len(df) > 1:
+            years = (df['Date'].iloc[-1] - df['Date'].iloc[0]).days / 365.25
+
+        # Frações por bloco: cada bloco aloca (step, C, N)
+        step = max(1, int(max_cells) // max(len(caps) * len(df), 1))
+        shape = (len(fractions), len(caps))
+
+        rows = []
+        for ev_min in ev_thresholds:
+            log_final = np.empty(shape)
+            max_dd = np.empty(shape)
+            n_bets = np.empty(shape, dtype=np.int64)
+            for lo in range(0, len(fractions), step):
+                hi = lo + step
+                # (f, C, N): stake de cada jogo para cada combinação do bloco (broadcast no RiskManager)
+                stake_pct = RiskManager.stake_fractions(prob_h, odds_h, fractions[lo:hi, None, None],
+                                                        caps[None, :, None], min_ev=ev_min)
+
+                # Log-crescimento acumulado (capitalização composta sem loop)
+                log_eq = np.cumsum(np.log1p(stake_pct * unit_ret), axis=-1)
+                peak = np.maximum(np.maximum.accumulate(log_eq, axis=-1), 0.0)
+                max_dd[lo:hi] = (1 - np.exp(log_eq - peak)).max(axis=-1)
+                log_final[lo:hi] = log_eq[..., -1]
+                n_bets[lo:hi] = (stake_pct > 0).sum(axis=-1)
+
+            final_bank = initial_bankroll * np.exp(log_final)
+            cagr = np.full(final_bank.shape, np.nan)
+            if years > 0:
+                cagr = (final_bank / initial_bankroll) ** (1 / years) - 1
+
+            ff, cc = np.meshgrid(fractions, caps, indexing='ij')
+            rows.append(pd.DataFrame({
+                'Fraction': ff.ravel(),
+                'Max_Cap': cc.ravel(),
+                'EV_Min': ev_min,
+                'Final_Bankroll': final_bank.ravel(),
+                'CAGR': cagr.ravel(),
+                'Max_Drawdown': max_dd.ravel(),
+                'Bets': n_bets.ravel()
+            }, columns=columns))
+
+        return pd.concat(rows, ignore_index=True)
+
+    @staticmethod
+    def plot_sweep_heatmap(sweep_df, metric='Final_Bankroll'):
+        """Mapa de calor Fração x Teto para uma métrica da varredura."""
+        grid = sweep_df.pivot_table(index='Fraction', columns='Max_Cap', values=metric)
+        fig = px.imshow(grid.to_numpy(), x=grid.columns.to_numpy(), y=grid.index.to_numpy(),
+                        origin='lower', aspect='auto', color_continuous_scale='RdYlGn',
+                        labels={'x': 'Teto Máximo', 'y': 'Fração de Kelly', 'color': metric},
+                        title=f'🎛️ Varredura de Parâmetros: {metric}')
+        return fig
+
+    @staticmethod
+    def _lttb(y, n_out):
+        """
+        Largest-Triangle-Three-Buckets sobre o índice: escolhe n_out pontos que preservam a forma da curva.
+        Retorna as posições escolhidas (sempre inclui o primeiro e o último ponto).
+        """
+        n = len(y)
+        if n_out >= n or n_out < 3:
+            return np.arange(n)
+        x = np.arange(n, dtype=float)
+        edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+        chosen = np.empty(n_out, dtype=np.int64)
+        chosen[0], chosen[-1] = 0, n - 1
+        prev = 0
+        for i in range(n_out - 2):
+            lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+            # Média do próximo bucket (ou o último ponto) como terceiro vértice do triângulo
+            nlo, nhi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+            nx, ny = (x[nlo:nhi].mean(), y[nlo:nhi].mean()) if nhi > nlo else (x[-1], y[-1])
+            area = np.abs((x[prev] - nx) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (ny - y[prev]))
+            prev = lo + int(np.argmax(area))
+            chosen[i + 1] = prev
+        return chosen
+
+    @staticmethod
+    def _minmax(y, n_buckets):
+        """Mínimo e máximo de cada bucket (nenhum pico ou vale some na redução)."""
+        n = len(y)
+        if n_buckets * 2 >= n:
+            return np.arange(n)
+        edges = np.linspace(0, n, n_buckets + 1).astype(int)
+        starts = edges[:-1]
+        arg_max = [s + int(np.argmax(y[s:e])) for s, e in zip(starts, edges[1:])]
+        arg_min = [s + int(np.argmin(y[s:e])) for s, e in zip(starts, edges[1:])]
+        return np.union1d(arg_max, arg_min)
+
+    @staticmethod
+    def downsample(equity_df: pd.DataFrame, max_points=2000) -> pd.DataFrame:
+        """
+        Reduz a curva de equidade/drawdown a ~max_points linhas preservando a forma.
+        LTTB na banca + min/max por bucket no drawdown; o pior drawdown, o topo que o antecede
+        e os extremos da banca entram sempre.
+        """
+        n = len(equity_df)
+        if max_points is None or n <= max_points:
+            return equity_df
+
+        bank = equity_df['Bankroll'].to_numpy(dtype=float)
+        dd = equity_df['Drawdown_Pct'].to_numpy(dtype=float)
+        trough = int(np.argmax(dd))
+        peak = int(np.argmax(bank[:trough + 1]))
+        keep = np.union1d(Backtester._lttb(bank, max_points // 2),
+                          Backtester._minmax(dd, max_points // 4))
+        keep = np.union1d(keep, [0, n - 1, trough, peak, int(np.argmax(bank)), int(np.argmin(bank))])
+        return equity_df.iloc[keep].reset_index(drop=True)
+
+    @staticmethod
+    @Profiler.timed()
+    def plot_dashboard(equity_df, max_points=2000):
         """Gera os gráficos de Equity e Drawdown traduzidos."""
+        # Curvas longas: só os pontos que o gráfico consegue mostrar vão para o navegador
+        equity_df = Backtester.downsample(equity_df, max_points)
+
         # Configuração de Labels para PT-BR
         labels_pt = {
             'Date': 'Data', 
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+class LRUCache:
+    """
+    Cache em memória limitado por tamanho (LRU) e, opcionalmente, por idade (TTL).
+    Expõe contadores de hit/miss/eviction para confirmar que os reruns saem da memória.
+    Thread-safe: o mesmo BetModel atende as sessões do Streamlit, o servidor e o feed ao vivo.
+    """
+
+    def __init__(self, max_size=50_000, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, stamp = entry
+            if self.ttl is not None and time.monotonic() - stamp > self.ttl:
+                # Expirado conta como miss (e sai do cache)
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+class AuditCache:
+    """
+    Cache em disco dos resultados do Backtester (sobrevive a reruns e restarts).
+    Chave = hash dos dados + versão do modelo + parâmetros de risco (sem a banca).
+    Os resultados ficam normalizados para banca 1.0 e são reescalados na leitura.
+    O diretório é limitado em bytes: os arquivos menos usados saem primeiro.
+    """
+
+    CACHE_DIR = os.path.join(".betsight_cache", "audit")
+
+    # Colunas que escalam linearmente com a banca inicial
+    MONEY_COLUMNS = ('Stake_Val', 'PnL', 'Bankroll')
+
+    def __init__(self, cache_dir=None, max_bytes=200 * 1024 * 1024):
+        self.cache_dir = cache_dir or self.CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def fingerprint(df: pd.DataFrame) -> str:
+        """Hash do conteúdo do DataFrame (independe do objeto/índice)."""
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        h = hashlib.sha256(row_hashes.tobytes())
+        h.update(','.join(map(str, df.columns)).encode())
+        return h.hexdigest()
+
+    @staticmethod
+    def make_key(data_fingerprint, model_version, **params) -> str:
+        payload = json.dumps({'data': data_fingerprint, 'model': model_version, **params},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    @staticmethod
+    def rescale(frames, factor):
+        out = []
+        for frame in frames:
+            frame = frame.copy()
+            for col in AuditCache.MONEY_COLUMNS:
+                if col in frame.columns:
+                    frame[col] = frame[col] * factor
+            out.append(frame)
+        return tuple(out)
+
+    def get(self, key, bankroll=1.0):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                frames = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        # Marca como recém-usado (LRU pelo mtime)
+        os.utime(path)
+        self.hits += 1
+        return self.rescale(frames, bankroll)
+
+    def put(self, key, frames, bankroll=1.0):
+        """Guarda os frames normalizados (divididos pela banca usada na simulação)."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        frames = self.rescale(frames, 1.0 / bankroll)
+        tmp_path = self._path(key) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(frames, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pkl'):
+                st_ = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((st_.st_mtime, st_.st_size, name))
+        total = sum(e[1] for e in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -1,34 +1,41 @@
 import pandas as pd
 import streamlit as st
+from src.ingest import SeasonDownloader
+from src.profiling import Profiler
 
 class DataLoader:
     """
     Pipeline ETL conforme especificações do Data Master.
     """
     
-    # URL template para a Premier League (E0)
-    BASE_URL = "https://www.football-data.co.uk/mmz4281/{season}/E0.csv"
+    # URL template (football-data.co.uk) e liga: Premier League (E0)
+    BASE_URL = SeasonDownloader.BASE_URL
+    LEAGUE = 'E0'
     
     # Temporadas solicitadas: 20/21 até 24/25
     SEASONS = ['2021', '2122', '2223', '2324', '2425']
 
     @staticmethod
     @st.cache_data(ttl=3600)
-    def load_data():
+    @Profiler.timed('DataLoader.load_data')
+    def load_data(league=None, seasons=None):
         """
-        Baixa, consolida e limpa os dados.
+        Baixa, consolida e limpa os dados (padrão: Premier League, temporadas de SEASONS).
+        Para várias ligas e temporadas longas, use o LeaguePipeline (particionado por liga/temporada).
         """
+        league = league or DataLoader.LEAGUE
+        seasons = list(seasons or DataLoader.SEASONS)
         all_data = []
         
         # Schema Obrigatório do Data Master
         cols_req = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR', 'B365H', 'B365D', 'B365A']
 
-        for season in DataLoader.SEASONS:
-            url = DataLoader.BASE_URL.format(season=season)
+        # Download paralelo com cache em disco (só a temporada atual é revalidada)
+        downloader = SeasonDownloader(league=league)
+        frames = downloader.load(seasons)
+
+        for season, df in frames.items():
             try:
-                # Baixa apenas colunas que existem no CSV (para evitar erro em anos antigos)
-                df = pd.read_csv(url, encoding="ISO-8859-1")
-                
                 # Filtra colunas de interesse
                 cols_found = [c for c in cols_req if c in df.columns]
                 df = df[cols_found].copy()
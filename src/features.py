@@ -0,0 +1,125 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+class TeamFormEngine:
+    """
+    Motor incremental de forma dos times (Elo + gols EWM + descanso).
+    Uma única passada cronológica gera as features pré-jogo do treino em O(n);
+    o estado compacto por time vira snapshot para o BetModel calcular jogos novos em O(1).
+    """
+
+    FEATURES = ['Elo_H', 'Elo_A', 'Elo_Diff', 'GF_H', 'GA_H', 'GF_A', 'GA_A', 'Rest_H', 'Rest_A']
+
+    def __init__(self, k=20.0, home_adv=60.0, alpha=0.2, base_elo=1500.0, new_team_elo=1450.0,
+                 base_goals=1.4, rest_cap=14.0, warmup=50):
+        self.k = k                          # Velocidade de ajuste do Elo
+        self.home_adv = home_adv            # Vantagem de mando (pontos Elo)
+        self.alpha = alpha                  # Peso do último jogo na média exponencial de gols
+        self.base_elo = base_elo
+        self.new_team_elo = new_team_elo    # Time que sobe da segunda divisão começa abaixo da média
+        self.base_goals = base_goals
+        self.rest_cap = rest_cap            # Descanso em dias, truncado (e valor do 1º jogo)
+        self.warmup = warmup                # Jogos iniciais em que todo time novo é da liga original
+        self.n_matches = 0
+        # Estado por time: [elo, gols pró EWM, gols contra EWM, último jogo (dia ordinal), jogos]
+        self.teams = {}
+
+    def _state(self, team):
+        state = self.teams.get(team)
+        if state is None:
+            elo = self.base_elo if self.n_matches < self.warmup else self.new_team_elo
+            state = [elo, self.base_goals, self.base_goals, None, 0]
+        return state
+
+    def _rest(self, state, day):
+        if state[3] is None or day is None:
+            return self.rest_cap
+        return float(min(max(day - state[3], 0), self.rest_cap))
+
+    @staticmethod
+    def _day(date):
+        return None if date is None or pd.isna(date) else pd.Timestamp(date).toordinal()
+
+    def features(self, home, away, date=None):
+        """Features pré-jogo de um confronto (O(1), não altera o estado)."""
+        h, a = self._state(str(home)), self._state(str(away))
+        day = self._day(date)
+        return [h[0], a[0], h[0] + self.home_adv - a[0], h[1], h[2], a[1], a[2],
+                self._rest(h, day), self._rest(a, day)]
+
+    def update(self, home, away, date, home_goals, away_goals):
+        """Aplica o resultado de um jogo ao estado dos dois times."""
+        home, away = str(home), str(away)
+        h, a = self._state(home), self._state(away)
+        day = self._day(date)
+
+        expected_h = 1 / (1 + 10 ** (-(h[0] + self.home_adv - a[0]) / 400))
+        score_h = 1.0 if home_goals > away_goals else (0.5 if home_goals == away_goals else 0.0)
+        delta = self.k * (score_h - expected_h)
+
+        alpha = self.alpha
+        self.teams[home] = [h[0] + delta, (1 - alpha) * h[1] + alpha * home_goals,
+                            (1 - alpha) * h[2] + alpha * away_goals, day, h[4] + 1]
+        self.teams[away] = [a[0] - delta, (1 - alpha) * a[1] + alpha * away_goals,
+                            (1 - alpha) * a[2] + alpha * home_goals, day, a[4] + 1]
+        self.n_matches += 1
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Passada única e cronológica: features pré-jogo de cada linha, depois atualiza o estado.
+        df precisa de Date, HomeTeam, AwayTeam, FTHG e FTAG. Retorna frame alinhado ao índice de entrada.
+        """
+        order = np.argsort(pd.to_datetime(df['Date']).to_numpy(), kind='stable')
+        dates = pd.to_datetime(df['Date']).to_numpy()[order]
+        homes = df['HomeTeam'].astype(str).to_numpy()[order]
+        aways = df['AwayTeam'].astype(str).to_numpy()[order]
+        hg = df['FTHG'].to_numpy()[order]
+        ag = df['FTAG'].to_numpy()[order]
+
+        out = np.empty((len(df), len(self.FEATURES)))
+        for i in range(len(df)):
+            out[order[i]] = self.features(homes[i], aways[i], dates[i])
+            self.update(homes[i], aways[i], dates[i], hg[i], ag[i])
+        return pd.DataFrame(out, columns=self.FEATURES, index=df.index)
+
+    def as_of(self):
+        """Dia (ordinal) do último jogo incorporado ao estado; None se o estado está vazio."""
+        days = [s[3] for s in self.teams.values() if s[3] is not None]
+        return max(days) if days else None
+
+    def live_features(self, df: pd.DataFrame, date=None) -> pd.DataFrame:
+        """
+        Features para jogos futuros a partir do snapshot (coluna Date opcional).
+        Jogos com data até o último jogo do snapshot são recusados: o estado já conteria
+        o resultado deles (vazamento); para o histórico use as colunas pré-jogo do transform().
+        """
+        dates = df['Date'] if 'Date' in df.columns else [date] * len(df)
+        as_of = self.as_of()
+        if as_of is not None:
+            stale = sum(1 for d in dates if (day := self._day(d)) is not None and day <= as_of)
+            if stale:
+                raise ValueError(f"{stale} jogo(s) com data até {pd.Timestamp.fromordinal(as_of).date()} "
+                                 f"(snapshot de forma): use as colunas pré-jogo do histórico")
+        rows = [self.features(h, a, d) for h, a, d in zip(df['HomeTeam'], df['AwayTeam'], dates)]
+        return pd.DataFrame(rows, columns=self.FEATURES, index=df.index)
+
+    # --- Snapshot ---
+    def snapshot(self):
+        params = {k: getattr(self, k) for k in ('k', 'home_adv', 'alpha', 'base_elo', 'new_team_elo',
+                                                'base_goals', 'rest_cap', 'warmup')}
+        return {'params': params, 'n_matches': self.n_matches, 'teams': self.teams}
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=1)
+
+    @staticmethod
+    def load(path):
+        with open(path, encoding='utf-8') as f:
+            snap = json.load(f)
+        engine = TeamFormEngine(**snap['params'])
+        engine.n_matches = snap['n_matches']
+        engine.teams = {t: list(s) for t, s in snap['teams'].items()}
+        return engine
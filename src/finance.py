@@ -1,40 +1,79 @@
+import numpy as np
+
 class RiskManager:
     """
     Gestor de Risco para Apostas Individuais (Live).
     """
     
+    # Códigos de status do staking vetorizado -> motivo exibido
+    STATUS_OK, STATUS_NEGATIVE_EV, STATUS_INVALID = 0, 1, 2
+    REASONS = {
+        0: '✅ Aposta Aprovada (Otimizada)',
+        1: '⛔ EV Negativo ou Neutro',
+        2: 'Erro nos dados'
+    }
+
+    # Layout do array estruturado devolvido por calculate_stakes
+    STAKE_DTYPE = np.dtype([('stake_val', 'f8'), ('stake_pct', 'f8'), ('ev', 'f8'), ('status', 'i1')])
+
     @staticmethod
-    def calculate_stake(probability: float, odds: float, bankroll: float, fraction: float = 0.25, max_cap: float = 0.05) -> dict:
-        if probability <= 0 or odds <= 1:
-            return {'stake_val': 0.0, 'stake_pct': 0.0, 'reason': 'Erro nos dados', 'ev': 0.0}
-
-        # EV
-        ev = (probability * odds) - 1
-        
-        if ev <= 0:
-            return {
-                'stake_val': 0.0, 
-                'stake_pct': 0.0, 
-                'reason': '⛔ EV Negativo ou Neutro',
-                'ev': ev
-            }
+    def stake_fractions(probability, odds, fraction=0.25, max_cap=0.05, min_ev=0.0):
+        """
+        Núcleo vetorizado: % da banca por aposta (Kelly fracionário + teto), sem arredondar.
+        Aceita arrays com broadcasting (ex: grade de frações x jogos). Entradas inválidas ou com EV <= min_ev viram 0.
+        """
+        p = np.asarray(probability, dtype=float)
+        odds = np.asarray(odds, dtype=float)
+        valid = (p > 0) & (odds > 1)
+        ev = (p * odds) - 1
 
         # Kelly
-        b = odds - 1
-        p = probability
-        q = 1 - p
-        kelly_full = (b * p - q) / b
-        
+        b = np.where(valid, odds - 1, 1.0)
+        kelly_full = (b * p - (1 - p)) / b
+
         # Quarter Kelly + Hard Cap
-        stake_pct = kelly_full * fraction
-        stake_pct = min(stake_pct, max_cap)
-        stake_pct = max(0.0, stake_pct)
-        
-        stake_val = bankroll * stake_pct
-        
+        stake_pct = np.clip(np.minimum(kelly_full * fraction, max_cap), 0.0, None)
+        return np.where(valid & (ev > min_ev), stake_pct, 0.0)
+
+    @staticmethod
+    def calculate_stakes(probability, odds, bankroll, fraction=0.25, max_cap=0.05, min_ev=0.0):
+        """
+        Staking para arrays de oportunidades (Radar, Backtest, CLI, varreduras).
+        Retorna array estruturado com stake_val, stake_pct (fração da banca, sem arredondar), ev e status.
+        """
+        p, odds, bankroll = np.broadcast_arrays(np.asarray(probability, dtype=float),
+                                                np.asarray(odds, dtype=float),
+                                                np.asarray(bankroll, dtype=float))
+        valid = (p > 0) & (odds > 1)
+        ev = np.where(valid, (p * odds) - 1, 0.0)
+        stake_pct = RiskManager.stake_fractions(p, odds, fraction, max_cap, min_ev)
+
+        out = np.empty(p.shape, dtype=RiskManager.STAKE_DTYPE)
+        out['stake_pct'] = stake_pct
+        out['stake_val'] = bankroll * stake_pct
+        out['ev'] = ev
+        out['status'] = np.where(~valid, RiskManager.STATUS_INVALID,
+                                 np.where(ev > min_ev, RiskManager.STATUS_OK, RiskManager.STATUS_NEGATIVE_EV))
+        return out
+
+    @staticmethod
+    def calculate_stake(probability: float, odds: float, bankroll: float, fraction: float = 0.25, max_cap: float = 0.05) -> dict:
+        """Versão escalar (um jogo): wrapper fino sobre calculate_stakes."""
+        r = RiskManager.calculate_stakes(probability, odds, bankroll, fraction, max_cap)
+        status = int(r['status'])
         return {
-            'stake_val': round(stake_val, 2),
-            'stake_pct': round(stake_pct * 100, 2),
-            'reason': '✅ Aposta Aprovada (Otimizada)',
-            'ev': ev
-        }
\ No newline at end of file
+            'stake_val': round(float(r['stake_val']), 2),
+            'stake_pct': round(float(r['stake_pct']) * 100, 2),
+            'reason': RiskManager.REASONS[status],
+            'ev': float(r['ev'])
+        }
+
+    # Semáforo do Radar: cor -> texto exibido
+    SIGNALS = {'green': 'APOSTAR', 'yellow': 'OBSERVAR', 'red': 'NÃO APOSTAR'}
+
+    @staticmethod
+    def traffic_light(ev, p_home):
+        """Semáforo (vetorizado): verde = EV > 5% e prob > 55%, amarelo = EV positivo, vermelho = resto."""
+        ev = np.asarray(ev, dtype=float)
+        p_home = np.asarray(p_home, dtype=float)
+        return np.where((ev > 0.05) & (p_home > 0.55), 'green', np.where(ev > 0, 'yellow', 'red'))
\ No newline at end of file
@@ -0,0 +1,146 @@
+import numpy as np
+
+class FlatForest:
+    """
+    Random Forest "compilado" em arrays NumPy contíguos.
+    Exportado a partir do modelo sklearn no treino; a inferência percorre todas as
+    árvores para um lote de jogos de uma vez, sem importar sklearn.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, classes, feature_names, team_classes, max_depth):
+        self.feature = feature          # (T, M) índice da feature em cada nó (0 nas folhas)
+        self.threshold = threshold      # (T, M) limiar do split
+        self.left = left                # (T, M) filho esquerdo (-1 nas folhas)
+        self.right = right              # (T, M) filho direito (-1 nas folhas)
+        self.value = value              # (T, M, C) distribuição de classes normalizada por nó
+        self.classes_ = classes
+        self.feature_names = list(feature_names)
+        self.team_classes = list(team_classes)
+        self.max_depth = int(max_depth)
+        self._flat = None
+        self._paths = None
+
+    @property
+    def n_trees(self):
+        return self.feature.shape[0]
+
+    @staticmethod
+    def from_sklearn(model, team_classes, feature_names=None):
+        """Achata um RandomForestClassifier treinado (árvores com tamanhos diferentes viram padding)."""
+        trees = [est.tree_ for est in model.estimators_]
+        n_trees = len(trees)
+        n_nodes = max(t.node_count for t in trees)
+        n_classes = len(model.classes_)
+
+        feature = np.zeros((n_trees, n_nodes), dtype=np.int32)
+        threshold = np.zeros((n_trees, n_nodes), dtype=np.float64)
+        left = np.full((n_trees, n_nodes), -1, dtype=np.int32)
+        right = np.full((n_trees, n_nodes), -1, dtype=np.int32)
+        value = np.zeros((n_trees, n_nodes, n_classes), dtype=np.float64)
+
+        for i, t in enumerate(trees):
+            k = t.node_count
+            is_split = t.children_left[:k] != -1
+            feature[i, :k] = np.where(is_split, t.feature[:k], 0)
+            threshold[i, :k] = t.threshold[:k]
+            left[i, :k] = t.children_left[:k]
+            right[i, :k] = t.children_right[:k]
+            # Mesma normalização do DecisionTreeClassifier.predict_proba
+            counts = t.value[:k, 0, :n_classes]
+            value[i, :k] = counts / counts.sum(axis=1, keepdims=True)
+
+        if feature_names is None:
+            feature_names = list(getattr(model, 'feature_names_in_', []))
+        max_depth = max(t.max_depth for t in trees)
+        return FlatForest(feature, threshold, left, right, value, np.asarray(model.classes_),
+                          feature_names, team_classes, max_depth)
+
+    def save(self, path):
+        np.savez(path, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                 value=self.value, classes=self.classes_, feature_names=np.asarray(self.feature_names, dtype=str),
+                 team_classes=np.asarray(self.team_classes, dtype=str), max_depth=self.max_depth)
+
+    @staticmethod
+    def load(path):
+        with np.load(path, allow_pickle=False) as z:
+            return FlatForest(z['feature'], z['threshold'], z['left'], z['right'], z['value'], z['classes'],
+                              z['feature_names'].tolist(), z['team_classes'].tolist(), z['max_depth'])
+
+    def _flat_nodes(self):
+        """
+        Nós de todas as árvores num único vetor (índice global = árvore * M + nó).
+        Folhas apontam para si mesmas, então descer além da folha não muda nada.
+        """
+        if self._flat is None:
+            n_trees, n_nodes = self.feature.shape
+            offsets = (np.arange(n_trees) * n_nodes)[:, None]
+            own = offsets + np.arange(n_nodes)[None, :]
+            leaf = self.left == -1
+            left = np.where(leaf, own, self.left + offsets).ravel()
+            right = np.where(leaf, own, self.right + offsets).ravel()
+            self._flat = (self.feature.ravel().astype(np.intp), self.threshold.ravel(),
+                          left.astype(np.intp), right.astype(np.intp), offsets.ravel().astype(np.intp))
+        return self._flat
+
+    def apply(self, X):
+        """Índice global da folha alcançada por cada (jogo, árvore): shape (n, T)."""
+        feature, threshold, left, right, offsets = self._flat_nodes()
+        # sklearn compara em float32; mesma conversão para bater split a split
+        X = np.ascontiguousarray(X, dtype=np.float32).astype(np.float64)
+        n, n_features = X.shape
+        x_flat = X.ravel()
+        row_base = (np.arange(n) * n_features)[:, None]
+        node = np.broadcast_to(offsets, (n, len(offsets))).copy()
+
+        # Uma iteração por nível: todas as árvores e todos os jogos descem juntos
+        for _ in range(self.max_depth):
+            go_left = x_flat[row_base + feature[node]] <= threshold[node]
+            node = np.where(go_left, left[node], right[node])
+        return node
+
+    def predict_proba(self, X, chunk_size=20_000):
+        """Média das distribuições das folhas (igual ao RandomForestClassifier.predict_proba)."""
+        X = np.asarray(X)
+        n_classes = self.value.shape[2]
+        value = self.value.reshape(-1, n_classes)
+        out = np.empty((X.shape[0], n_classes))
+        for start in range(0, X.shape[0], chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            out[start:start + chunk_size] = value[leaves].mean(axis=1)
+        return out
+
+    def _path_contributions(self):
+        """
+        Saabas pré-computado: para cada nó, soma das variações de valor (filho - pai) ao longo do caminho
+        raiz -> nó, separada pela feature de cada split. Shape (T * M, F, C); calculado uma vez, nível a nível.
+        """
+        if self._paths is None:
+            feature, _, left, right, offsets = self._flat_nodes()
+            n_classes = self.value.shape[2]
+            value = self.value.reshape(-1, n_classes)
+            n_features = max(len(self.feature_names), int(self.feature.max()) + 1)
+            paths = np.zeros((len(value), n_features, n_classes))
+            frontier = offsets
+            for _ in range(self.max_depth):
+                parent = frontier[left[frontier] != frontier]
+                for child in (left[parent], right[parent]):
+                    paths[child] = paths[parent]
+                    paths[child, feature[parent]] += value[child] - value[parent]
+                frontier = np.r_[left[parent], right[parent]]
+            self._paths = paths
+        return self._paths
+
+    def contributions(self, X, chunk_size=2_000):
+        """
+        Atribuição exata por feature (Saabas) para um lote: bias (C,) e contribuições (n, F, C),
+        com bias + contribuições.sum(axis=1) == predict_proba(X). Custo = apply + um gather por árvore.
+        """
+        X = np.asarray(X)
+        paths = self._path_contributions()
+        n_classes = self.value.shape[2]
+        bias = self.value[:, 0, :].mean(axis=0)
+        out = np.empty((X.shape[0], paths.shape[1], n_classes))
+        for start in range(0, X.shape[0], chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            out[start:start + chunk_size] = paths[leaves].mean(axis=1)
+        return bias, out
@@ -0,0 +1,211 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+class HistoryStore:
+    """
+    Armazenamento colunar do histórico processado (substitui o re-parse do CSV).
+    Uma pasta com um .npy por coluna + meta.json, ordenada por data (índice de datas).
+    Leitura via memory-map: só as colunas e o intervalo de datas pedidos saem do disco.
+    """
+
+    DATE_COLUMN = 'Date'
+    META_FILENAME = 'meta.json'
+
+    @staticmethod
+    def _float_spec(values):
+        """
+        Menor dtype seguro para uma coluna float.
+        float32 só quando o valor original volta exato após arredondar às casas decimais (ex: odds).
+        """
+        finite = values[np.isfinite(values)]
+        for decimals in range(7):
+            if np.array_equal(np.round(finite, decimals), finite):
+                restored = np.round(finite.astype(np.float32).astype(np.float64), decimals)
+                if np.array_equal(restored, finite):
+                    return np.float32, decimals
+                break
+        return np.float64, None
+
+    @staticmethod
+    def _int_dtype(values):
+        """Menor inteiro que comporta o intervalo da coluna."""
+        if len(values) == 0:
+            return np.int8
+        lo, hi = int(values.min()), int(values.max())
+        for dtype in (np.int8, np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if info.min <= lo and hi <= info.max:
+                return dtype
+        return np.int64
+
+    @staticmethod
+    def write(df: pd.DataFrame, path):
+        """Grava o DataFrame no formato colunar (escrita atômica em pasta temporária)."""
+        date_col = HistoryStore.DATE_COLUMN
+        df = df.copy()
+        df[date_col] = pd.to_datetime(df[date_col])
+        df = df.sort_values(date_col, kind='stable').reset_index(drop=True)
+
+        tmp_path = str(path) + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        meta = {'n_rows': len(df), 'date_column': date_col, 'columns': {}}
+        for col in df.columns:
+            series = df[col]
+            spec = {}
+            if col == date_col:
+                data = series.to_numpy(dtype='datetime64[ns]')
+                spec['kind'] = 'datetime'
+            elif pd.api.types.is_float_dtype(series):
+                values = series.to_numpy(dtype=np.float64)
+                dtype, decimals = HistoryStore._float_spec(values)
+                data = values.astype(dtype)
+                spec.update(kind='float', decimals=decimals)
+            elif pd.api.types.is_integer_dtype(series):
+                values = series.to_numpy()
+                data = values.astype(HistoryStore._int_dtype(values))
+                spec['kind'] = 'int'
+            else:
+                # Texto (times, resultado) vira categórico: códigos inteiros + lista de categorias
+                cat = pd.Categorical(series.astype(str))
+                data = cat.codes.astype(HistoryStore._int_dtype(cat.codes))
+                spec.update(kind='category', categories=list(cat.categories))
+            spec['dtype'] = str(data.dtype)
+            np.save(os.path.join(tmp_path, f"{col}.npy"), data)
+            meta['columns'][col] = spec
+
+        with open(os.path.join(tmp_path, HistoryStore.META_FILENAME), 'w') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=1)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def splice(path, df: pd.DataFrame, start):
+        """
+        Troca as linhas [start:] por df (já ordenado por data) sem re-codificar o início:
+        as colunas antigas vêm por memory-map e categorias novas entram no fim da lista.
+        """
+        meta = HistoryStore.read_meta(path)
+        if list(df.columns) != list(meta['columns']):
+            head = HistoryStore.read(path).iloc[:start]
+            HistoryStore.write(pd.concat([head, df], ignore_index=True), path)
+            return
+
+        tmp_path = str(path) + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        for col, spec in meta['columns'].items():
+            head = np.load(os.path.join(path, f"{col}.npy"), mmap_mode='r')[:start]
+            series = df[col]
+            if spec['kind'] == 'datetime':
+                tail = pd.to_datetime(series).to_numpy().astype('datetime64[ns]')
+            elif spec['kind'] == 'float':
+                tail = series.to_numpy(dtype=np.float64)
+                if spec['decimals'] is not None and HistoryStore._float_spec(tail) != (np.float32, spec['decimals']) \
+                        and len(tail[np.isfinite(tail)]):
+                    # Valor novo não cabe no float32 compacto: a coluna passa a float64 exato
+                    head = np.round(head.astype(np.float64), spec['decimals'])
+                    spec.update(decimals=None)
+                else:
+                    tail = tail.astype(head.dtype)
+            elif spec['kind'] == 'int':
+                tail = series.to_numpy()
+                tail = tail.astype(np.result_type(head.dtype, HistoryStore._int_dtype(tail)))
+            else:
+                lookup = {c: i for i, c in enumerate(spec['categories'])}
+                for value in series.astype(str).unique():
+                    if value not in lookup:
+                        lookup[value] = len(spec['categories'])
+                        spec['categories'].append(value)
+                tail = series.astype(str).map(lookup).to_numpy()
+                tail = tail.astype(np.result_type(head.dtype, HistoryStore._int_dtype(tail)))
+            data = np.concatenate([np.asarray(head).astype(tail.dtype), tail])
+            spec['dtype'] = str(data.dtype)
+            np.save(os.path.join(tmp_path, f"{col}.npy"), data)
+        meta['n_rows'] = start + len(df)
+
+        with open(os.path.join(tmp_path, HistoryStore.META_FILENAME), 'w') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=1)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, HistoryStore.META_FILENAME))
+
+    @staticmethod
+    def read_meta(path):
+        with open(os.path.join(path, HistoryStore.META_FILENAME)) as f:
+            return json.load(f)
+
+    @staticmethod
+    def read(path, columns=None, start=None, end=None, last=None, exact=True) -> pd.DataFrame:
+        """
+        Lê colunas e intervalo de datas [start, end] via memory-map.
+        O recorte por data é uma busca binária no índice de datas (ordenado); last=N fica só
+        com as N últimas linhas do recorte (mesma ordem do tail() após ordenar por data).
+        exact=False mantém as colunas float32 compactas (casas decimais em df.attrs['float_decimals']);
+        quem precisar do float64 exato chama restore_floats() só nas linhas que vai usar.
+        """
+        meta = HistoryStore.read_meta(path)
+        date_col = meta['date_column']
+        columns = list(meta['columns']) if columns is None else list(columns)
+
+        dates = np.load(os.path.join(path, f"{date_col}.npy"), mmap_mode='r')
+        lo, hi = 0, len(dates)
+        if start is not None:
+            lo = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start), 'ns'), side='left'))
+        if end is not None:
+            hi = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end), 'ns'), side='right'))
+        if last is not None:
+            lo = max(lo, hi - int(last))
+
+        out = {}
+        decimals = {}
+        for col in columns:
+            spec = meta['columns'][col]
+            data = np.load(os.path.join(path, f"{col}.npy"), mmap_mode='r')[lo:hi]
+            if spec['kind'] == 'category':
+                out[col] = pd.Categorical.from_codes(np.asarray(data), categories=spec['categories'])
+            elif spec['kind'] == 'float' and spec.get('decimals') is not None:
+                if exact:
+                    # float32 compacto no disco, float64 exato na memória
+                    out[col] = np.round(data.astype(np.float64), spec['decimals'])
+                else:
+                    out[col] = np.asarray(data)
+                    decimals[col] = spec['decimals']
+            else:
+                out[col] = data
+        df = pd.DataFrame(out, columns=columns)
+        if decimals:
+            df.attrs['float_decimals'] = decimals
+        return df
+
+    @staticmethod
+    def restore_floats(df: pd.DataFrame) -> pd.DataFrame:
+        """float64 exato para as colunas float32 de um read(exact=False); outros frames voltam intactos."""
+        decimals = df.attrs.get('float_decimals')
+        if not decimals:
+            return df
+        df = df.copy()
+        for col, places in decimals.items():
+            if col in df.columns:
+                df[col] = np.round(df[col].to_numpy(dtype=np.float64), places)
+        df.attrs.pop('float_decimals', None)
+        return df
+
+if __name__ == "__main__":
+    # Conversão avulsa: python -m src.history_store betsight_history.csv betsight_history.store
+    import sys
+    src_csv = sys.argv[1] if len(sys.argv) > 1 else "betsight_history.csv"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "betsight_history.store"
+    HistoryStore.write(pd.read_csv(src_csv, float_precision="round_trip"), dst)
+    print(f"✅ {src_csv} -> {dst}")
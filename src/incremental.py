@@ -0,0 +1,255 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.features import TeamFormEngine
+from src.history_store import HistoryStore
+
+class IncrementalHistory:
+    """
+    Atualização incremental (append-only) do histórico processado (CSV + HistoryStore).
+    Um índice ao lado do CSV guarda, por linha: hash da chave (Date, HomeTeam, AwayTeam), hash do conteúdo
+    (placar + odds), data e offset em bytes. Só jogos novos ou corrigidos recebem features; o arquivo continua
+    ordenado por data com merge-insert: só a cauda a partir da primeira linha afetada é lida e reescrita
+    (numa atualização semanal, só os jogos novos).
+    """
+
+    KEY_COLUMNS = ['Date', 'HomeTeam', 'AwayTeam']
+    SOURCE_COLUMNS = ['FTHG', 'FTAG', 'FTR', 'B365H', 'B365D', 'B365A']
+    RESULT_COLUMNS = ['FTHG', 'FTAG', 'FTR']
+    TARGET_MAP = {'H': 0, 'D': 1, 'A': 2}
+
+    def __init__(self, csv_path, store_path=None, team_classes=(), form=None, index_path=None):
+        self.csv_path = csv_path
+        self.store_path = store_path
+        self.index_path = index_path or os.path.splitext(csv_path)[0] + ".index.npz"
+        self.team_classes = [str(t) for t in team_classes]
+        self.form = form
+        self.index = None
+
+    # --- Hashes ---
+    @staticmethod
+    def match_keys(df: pd.DataFrame) -> np.ndarray:
+        """Hash estável (uint64) de (Date, HomeTeam, AwayTeam): igual entre processos e execuções."""
+        keys = pd.DataFrame({
+            'Date': pd.to_datetime(df['Date']).to_numpy().astype('datetime64[ns]'),
+            'HomeTeam': df['HomeTeam'].astype(str).to_numpy(),
+            'AwayTeam': df['AwayTeam'].astype(str).to_numpy()
+        })
+        return pd.util.hash_pandas_object(keys, index=False).to_numpy(dtype=np.uint64)
+
+    @staticmethod
+    def content_hashes(df: pd.DataFrame) -> np.ndarray:
+        """Hash do placar e das odds: muda quando a linha de origem foi corrigida."""
+        values = pd.DataFrame({
+            'FTHG': df['FTHG'].to_numpy(dtype=np.int64), 'FTAG': df['FTAG'].to_numpy(dtype=np.int64),
+            'FTR': df['FTR'].astype(str).to_numpy(),
+            **{c: df[c].to_numpy(dtype=np.float64) for c in ('B365H', 'B365D', 'B365A')}
+        })
+        return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+    # --- Índice ---
+    def _read_csv(self, data, header):
+        df = pd.read_csv(io.BytesIO(data), names=header, header=None, float_precision='round_trip')
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df
+
+    def _header(self):
+        with open(self.csv_path, 'rb') as f:
+            line = f.readline()
+        return line.decode('utf-8').rstrip('\r\n').split(','), len(line), line.endswith(b'\r\n')
+
+    @staticmethod
+    def _row_starts(data, base):
+        """Offset (absoluto) do início de cada linha num bloco de linhas completas."""
+        ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord('\n')) + 1
+        return np.r_[0, ends[:-1]].astype(np.int64) + base if len(ends) else np.zeros(0, dtype=np.int64)
+
+    def build_index(self):
+        """Índice completo a partir do CSV (só na primeira vez ou se o CSV foi regravado por fora)."""
+        header, header_len, _ = self._header()
+        with open(self.csv_path, 'rb') as f:
+            data = f.read()
+        if not data.endswith(b'\n'):
+            with open(self.csv_path, 'ab') as f:
+                f.write(b'\n')
+            data += b'\n'
+        body = data[header_len:]
+        df = self._read_csv(body, header)
+        starts = self._row_starts(body, header_len)
+        if len(starts) != len(df):
+            raise ValueError(f"{self.csv_path}: {len(df)} jogos mas {len(starts)} linhas (campos com quebra de linha?)")
+        self.index = {
+            'hashes': self.match_keys(df), 'content': self.content_hashes(df),
+            'dates': df['Date'].to_numpy().astype('datetime64[ns]'),
+            'offsets': np.r_[starts, len(data)].astype(np.int64)
+        }
+        self._save_index()
+        return self.index
+
+    def _save_index(self):
+        idx = self.index
+        order = np.argsort(idx['hashes'], kind='stable')
+        stat = os.stat(self.csv_path)
+        idx.update(order=order, csv_size=np.int64(stat.st_size), csv_mtime=np.int64(stat.st_mtime_ns))
+        tmp = self.index_path + ".tmp.npz"
+        np.savez(tmp, **idx)
+        os.replace(tmp, self.index_path)
+
+    def load_index(self):
+        """Índice salvo, ou reconstruído se não bate com o CSV atual (tamanho/mtime)."""
+        if os.path.exists(self.index_path):
+            with np.load(self.index_path) as z:
+                idx = {k: z[k] for k in z.files}
+            stat = os.stat(self.csv_path)
+            if int(idx['csv_size']) == stat.st_size and int(idx['csv_mtime']) == stat.st_mtime_ns:
+                self.index = idx
+                return idx
+        return self.build_index()
+
+    def lookup(self, keys):
+        """Posição (ordem do arquivo) de cada chave no histórico, -1 se ausente. Busca binária no hash ordenado."""
+        idx = self.index
+        sorted_hashes = idx['hashes'][idx['order']]
+        if not len(sorted_hashes):
+            return np.full(len(keys), -1, dtype=np.int64)
+        i = np.minimum(np.searchsorted(sorted_hashes, keys), len(sorted_hashes) - 1)
+        return np.where(sorted_hashes[i] == keys, idx['order'][i], -1)
+
+    # --- Features das linhas novas/corrigidas ---
+    def _team_codes(self, teams):
+        lookup = {t: i for i, t in enumerate(self.team_classes)}
+        codes = np.empty(len(teams), dtype=np.int64)
+        for i, team in enumerate(teams):
+            code = lookup.get(team)
+            if code is None:
+                # Time novo (promovido): próximo código livre, os antigos não mudam
+                code = lookup[team] = len(self.team_classes)
+                self.team_classes.append(team)
+            codes[i] = code
+        return codes
+
+    def derive(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Mesmas features de mercado do train_model, só para as linhas recebidas."""
+        df = df.copy()
+        df['Implied_Prob_H'] = 1 / df['B365H']
+        df['Implied_Prob_A'] = 1 / df['B365A']
+        df['Market_Diff'] = df['Implied_Prob_H'] - df['Implied_Prob_A']
+        df['Target'] = df['FTR'].map(self.TARGET_MAP)
+        df['HomeTeam_Code'] = self._team_codes(df['HomeTeam'].astype(str).to_list())
+        df['AwayTeam_Code'] = self._team_codes(df['AwayTeam'].astype(str).to_list())
+        return df
+
+    # --- Atualização ---
+    def update(self, raw: pd.DataFrame) -> dict:
+        """
+        Aplica jogos baixados (já limpos, com Season_ID) ao histórico.
+        Jogos iguais são ignorados; novos entram em ordem de data; corrigidos são substituídos.
+        A forma (Elo, gols, descanso) continua do snapshot quando tudo entra depois do último jogo;
+        um resultado corrigido ou jogo atrasado no meio do histórico força o recálculo da forma.
+        """
+        idx = self.load_index()
+        header, _, crlf = self._header()
+        n = len(idx['hashes'])
+
+        raw = raw.copy()
+        raw['Date'] = pd.to_datetime(raw['Date'])
+        raw = raw.sort_values('Date', kind='stable').reset_index(drop=True)
+        keys = self.match_keys(raw)
+        # Chave repetida no lote: vale a última versão
+        keep = ~pd.Series(keys).duplicated(keep='last').to_numpy()
+        raw, keys = raw[keep].reset_index(drop=True), keys[keep]
+
+        pos = self.lookup(keys)
+        content = self.content_hashes(raw)
+        present = pos >= 0
+        changed = present & (idx['content'][np.maximum(pos, 0)] != content)
+        is_new = ~present
+        stats = {'new': int(is_new.sum()), 'corrected': int(changed.sum()),
+                 'unchanged': int((present & ~changed).sum()), 'rewritten_rows': 0, 'form_recomputed': False}
+        if not (is_new.any() or changed.any()):
+            return stats
+
+        new_rows = raw[is_new].reset_index(drop=True)
+        fixes = raw[changed].reset_index(drop=True)
+        fix_pos = pos[changed]
+
+        # Forma: continua do snapshot só se nada muda antes do último jogo já processado
+        has_form = all(c in header for c in TeamFormEngine.FEATURES)
+        last_date = idx['dates'][-1] if n else None
+        reset_form = False
+        if has_form:
+            late = n > 0 and len(new_rows) > 0 and new_rows['Date'].to_numpy().astype('datetime64[ns]').min() < last_date
+            if self.form is None or late:
+                reset_form = True
+            elif len(fixes):
+                # Mudança só de odds não afeta a forma; mudança de resultado sim
+                with open(self.csv_path, 'rb') as f:
+                    old = [self._row(f, int(p), header) for p in fix_pos]
+                old = pd.concat(old, ignore_index=True)
+                reset_form = bool((old[self.RESULT_COLUMNS].astype(str).to_numpy()
+                                   != fixes[self.RESULT_COLUMNS].astype(str).to_numpy()).any())
+
+        # Primeira linha afetada: tudo antes dela fica intacto no disco
+        insert_at = np.searchsorted(idx['dates'], new_rows['Date'].to_numpy().astype('datetime64[ns]'), side='right')
+        start = 0 if reset_form else int(min(insert_at.min(initial=n), fix_pos.min(initial=n)))
+
+        with open(self.csv_path, 'rb') as f:
+            f.seek(int(idx['offsets'][start]))
+            tail = self._read_csv(f.read(), header) if start < n else pd.DataFrame()
+
+        # Correções: substitui as colunas de origem e refaz as derivadas dessas linhas
+        if len(fixes):
+            rows = fix_pos - start
+            for col in self.SOURCE_COLUMNS:
+                tail.loc[rows, col] = fixes[col].to_numpy()
+            fixed = self.derive(tail.loc[rows, self.KEY_COLUMNS + self.SOURCE_COLUMNS])
+            for col in ('Implied_Prob_H', 'Implied_Prob_A', 'Market_Diff', 'Target'):
+                tail.loc[rows, col] = fixed[col].to_numpy()
+
+        added = self.derive(new_rows)
+        if has_form and not reset_form:
+            added[TeamFormEngine.FEATURES] = self.form.transform(added)
+
+        # Merge-insert (os dois lados já estão em ordem de data): novos entram depois dos jogos da mesma data
+        if len(tail) == 0:
+            merged = added.reindex(columns=header)
+        else:
+            ins = insert_at - start
+            old_to = np.arange(len(tail)) + np.searchsorted(ins, np.arange(len(tail)), side='right')
+            new_to = ins + np.arange(len(ins))
+            merged = pd.concat([tail, added.reindex(columns=header)], ignore_index=True)
+            merged = merged.iloc[np.argsort(np.r_[old_to, new_to])].reset_index(drop=True)
+
+        if reset_form:
+            params = self.form.snapshot()['params'] if self.form is not None else {}
+            self.form = TeamFormEngine(**params)
+            merged[TeamFormEngine.FEATURES] = self.form.transform(merged)
+        merged = merged[header]
+
+        self._write_tail(merged, start, crlf)
+        if self.store_path is not None and HistoryStore.exists(self.store_path):
+            HistoryStore.splice(self.store_path, merged, start)
+        stats.update(rewritten_rows=len(merged), form_recomputed=reset_form)
+        return stats
+
+    def _row(self, f, pos, header):
+        f.seek(int(self.index['offsets'][pos]))
+        return self._read_csv(f.read(int(self.index['offsets'][pos + 1] - self.index['offsets'][pos])), header)
+
+    def _write_tail(self, merged, start, crlf):
+        """Trunca o CSV na primeira linha afetada, grava a nova cauda e atualiza o índice."""
+        data = merged.to_csv(header=False, index=False, lineterminator='\r\n' if crlf else '\n').encode('utf-8')
+        base = int(self.index['offsets'][start])
+        with open(self.csv_path, 'r+b') as f:
+            f.truncate(base)
+            f.seek(base)
+            f.write(data)
+        idx = self.index
+        idx['hashes'] = np.r_[idx['hashes'][:start], self.match_keys(merged)].astype(np.uint64)
+        idx['content'] = np.r_[idx['content'][:start], self.content_hashes(merged)].astype(np.uint64)
+        idx['dates'] = np.r_[idx['dates'][:start], merged['Date'].to_numpy().astype('datetime64[ns]')]
+        idx['offsets'] = np.r_[idx['offsets'][:start], self._row_starts(data, base), base + len(data)].astype(np.int64)
+        self._save_index()
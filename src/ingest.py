@@ -0,0 +1,139 @@
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+class SeasonDownloader:
+    """
+    Camada única de ingestão das temporadas (football-data.co.uk).
+    Baixa em paralelo, guarda cache em disco por temporada e só revalida a temporada atual.
+    Pode apontar para um diretório local ou um servidor HTTP local (execuções offline e testes).
+    """
+
+    BASE_URL = "https://www.football-data.co.uk/mmz4281/{season}/{league}.csv"
+    CACHE_DIR = os.path.join(".betsight_cache", "seasons")
+
+    def __init__(self, league='E0', base_url=None, source_dir=None, cache_dir=None, max_workers=8, timeout=30):
+        self.league = league
+        # Overrides por ambiente para rodar sem internet
+        self.base_url = base_url or os.environ.get("BETSIGHT_DATA_URL") or self.BASE_URL
+        self.source_dir = source_dir or os.environ.get("BETSIGHT_DATA_DIR")
+        self.cache_dir = cache_dir or self.CACHE_DIR
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.errors = {}
+
+    # --- Cache em disco ---
+    def _cache_paths(self, season):
+        stem = os.path.join(self.cache_dir, f"{self.league}_{season}")
+        return stem + ".csv", stem + ".meta.json"
+
+    def _read_cache(self, season):
+        data_path, meta_path = self._cache_paths(season)
+        if not os.path.exists(data_path):
+            return None, {}
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        with open(data_path, 'rb') as f:
+            return f.read(), meta
+
+    def _write_cache(self, season, content, meta):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path, meta_path = self._cache_paths(season)
+        # Escrita atômica: nunca deixa um CSV pela metade no cache
+        tmp_path = data_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, data_path)
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+
+    # --- Fontes ---
+    def _fetch_local(self, season):
+        """Diretório local no mesmo layout da URL: {source_dir}/{season}/{league}.csv"""
+        path = os.path.join(self.source_dir, season, f"{self.league}.csv")
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _fetch_http(self, season, revalidate):
+        """Baixa uma temporada. Temporadas passadas vêm do cache; a atual é revalidada por ETag/Last-Modified."""
+        cached, meta = self._read_cache(season)
+        if cached is not None and not revalidate:
+            return cached
+
+        headers = {}
+        if cached is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        url = self.base_url.format(season=season, league=self.league)
+        try:
+            resp = requests.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            # Sem rede: melhor um cache antigo do que nada
+            if cached is not None:
+                return cached
+            raise
+
+        if resp.status_code == 304 and cached is not None:
+            return cached
+        resp.raise_for_status()
+
+        self._write_cache(season, resp.content, {
+            'url': url,
+            'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified')
+        })
+        return resp.content
+
+    def _fetch_one(self, season, revalidate):
+        if self.source_dir:
+            return self._fetch_local(season)
+        return self._fetch_http(season, revalidate)
+
+    # --- API ---
+    def fetch(self, seasons, current_season=None):
+        """
+        Busca o conteúdo bruto (bytes) das temporadas em paralelo.
+        Só a temporada atual (por padrão a última da lista) é baixada de novo.
+        Falhas ficam em self.errors e a temporada é omitida do resultado.
+        """
+        seasons = list(seasons)
+        if current_season is None and seasons:
+            current_season = seasons[-1]
+
+        self.errors = {}
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {s: pool.submit(self._fetch_one, s, s == current_season) for s in seasons}
+            for season, fut in futures.items():
+                try:
+                    results[season] = fut.result()
+                except Exception as e:
+                    self.errors[season] = e
+        return results
+
+    @staticmethod
+    def parse(content) -> pd.DataFrame:
+        """CSV do football-data (Latin-1) para DataFrame."""
+        return pd.read_csv(io.BytesIO(content), encoding="ISO-8859-1")
+
+    def load(self, seasons, current_season=None):
+        """Retorna {temporada: DataFrame} na ordem pedida."""
+        raw = self.fetch(seasons, current_season)
+        frames = {}
+        for season in seasons:
+            if season not in raw:
+                continue
+            try:
+                frames[season] = self.parse(raw[season])
+            except Exception as e:
+                self.errors[season] = e
+        return frames
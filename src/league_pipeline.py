@@ -0,0 +1,249 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.ingest import SeasonDownloader
+from src.partitions import PartitionedHistory
+from src.features import TeamFormEngine
+from src.forest import FlatForest
+
+RAW_COLUMNS = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR', 'B365H', 'B365D', 'B365A']
+TARGET_MAP = {'H': 0, 'D': 1, 'A': 2}
+
+def _build_league(args):
+    """
+    Worker: features de uma liga (todas as temporadas, em ordem cronológica) gravadas por partição.
+    Só essa liga fica em memória no processo. Encoder de times restrito à liga.
+    """
+    raw_root, feature_root, league, seasons = args
+    df = PartitionedHistory(raw_root).read_many([league], seasons)
+    df = df.sort_values('Date', kind='stable').reset_index(drop=True)
+    df['HomeTeam'] = df['HomeTeam'].astype(str)
+    df['AwayTeam'] = df['AwayTeam'].astype(str)
+
+    teams = sorted(set(df['HomeTeam']) | set(df['AwayTeam']))
+    index = {t: i for i, t in enumerate(teams)}
+
+    df['Implied_Prob_H'] = 1 / df['B365H']
+    df['Implied_Prob_A'] = 1 / df['B365A']
+    df['Market_Diff'] = df['Implied_Prob_H'] - df['Implied_Prob_A']
+    df['Target'] = df['FTR'].astype(str).map(TARGET_MAP)
+    df = df.dropna(subset=['Target']).reset_index(drop=True)
+    df['Target'] = df['Target'].astype(np.int8)
+    df['HomeTeam_Code'] = df['HomeTeam'].map(index)
+    df['AwayTeam_Code'] = df['AwayTeam'].map(index)
+
+    form = TeamFormEngine()
+    df[TeamFormEngine.FEATURES] = form.transform(df)
+
+    features = PartitionedHistory(feature_root)
+    for season, part in df.groupby('Season', sort=False):
+        features.write(league, season, part.drop(columns=['League', 'Season']))
+    return league, teams, form.snapshot()
+
+def _fit_league(args):
+    """Worker: treina o modelo de uma liga lendo só as partições de treino dela."""
+    from sklearn.ensemble import RandomForestClassifier
+    feature_root, league, train_seasons, test_season, features, params, teams, out_path = args
+    store = PartitionedHistory(feature_root)
+    train = store.read_many([league], train_seasons, features + ['Target'])
+    if train.empty:
+        return league, None
+    # Paralelismo já é entre ligas (processos): cada floresta usa um núcleo, mesmo se params trouxer n_jobs
+    model = RandomForestClassifier(**{**params, 'n_jobs': 1})
+    model.fit(train[features].to_numpy(dtype=np.float32), train['Target'].to_numpy())
+    FlatForest.from_sklearn(model, teams, features).save(out_path)
+
+    acc = None
+    if test_season and store.exists(league, test_season):
+        test = store.read(league, test_season, features + ['Target'])
+        acc = float(model.score(test[features].to_numpy(dtype=np.float32), test['Target'].to_numpy()))
+    return league, acc
+
+
+class LeaguePipeline:
+    """
+    Pipeline multi-liga particionado (football-data.co.uk).
+    1. ingest: baixa liga a liga e grava partições brutas {liga}/{temporada}.
+    2. build_features: features por liga em paralelo (cada processo carrega só a sua liga).
+    3. train: um modelo por liga, ou um global com League_Code + códigos de time restritos à liga.
+    A memória acompanha as partições em uso, não o histórico inteiro.
+    """
+
+    # Ligas principais do football-data (códigos dos arquivos CSV)
+    LEAGUES = ['E0', 'E1', 'E2', 'E3', 'EC', 'SC0', 'SC1', 'SC2', 'SC3', 'D1', 'D2', 'I1', 'I2',
+               'SP1', 'SP2', 'F1', 'F2', 'N1', 'B1', 'P1', 'T1', 'G1']
+    FEATURES = ['Implied_Prob_H', 'Implied_Prob_A', 'Market_Diff', 'HomeTeam_Code', 'AwayTeam_Code']
+    DEFAULT_PARAMS = {'n_estimators': 100, 'max_depth': 5, 'random_state': 42}
+
+    RAW_ROOT = os.path.join(".betsight_cache", "partitions", "raw")
+    FEATURE_ROOT = os.path.join(".betsight_cache", "partitions", "features")
+    MODELS_DIR = "betsight_models"
+    ENCODERS_FILENAME = "league_encoders.json"
+    FORM_STATE_FILENAME = "league_team_state.json"
+    GLOBAL_MODEL = "global"
+
+    def __init__(self, leagues=None, seasons=None, raw_root=None, feature_root=None, models_dir=None,
+                 n_jobs=None, use_form=False):
+        self.leagues = list(leagues or self.LEAGUES)
+        self.seasons = list(seasons or self.season_range(2005, 2024))
+        self.raw = PartitionedHistory(raw_root or self.RAW_ROOT)
+        self.features = PartitionedHistory(feature_root or self.FEATURE_ROOT)
+        self.models_dir = models_dir or self.MODELS_DIR
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.feature_names = self.FEATURES + (TeamFormEngine.FEATURES if use_form else [])
+        self.errors = {}
+
+    @staticmethod
+    def season_range(first_year, last_year):
+        """Códigos do football-data: season_range(2020, 2024) -> ['2021', '2122', '2223', '2324', '2425']."""
+        return [f"{y % 100:02d}{(y + 1) % 100:02d}" for y in range(first_year, last_year + 1)]
+
+    @staticmethod
+    def clean(df: pd.DataFrame) -> pd.DataFrame:
+        """Mesmas regras do DataLoader: schema mínimo, sem odds/resultado faltando, datas dd/mm."""
+        cols = [c for c in RAW_COLUMNS if c in df.columns]
+        df = df[cols].dropna(subset=[c for c in ('FTR', 'B365H', 'B365D', 'B365A') if c in cols]).copy()
+        df['Date'] = pd.to_datetime(df['Date'], dayfirst=True, errors='coerce')
+        return df.dropna(subset=['Date'])
+
+    # --- 1. Ingestão ---
+    def ingest(self, refresh=False):
+        """
+        Baixa e grava as partições brutas, uma liga por vez (downloads da liga em paralelo).
+        Partições já gravadas são puladas; a temporada atual (última) é sempre revalidada.
+        Retorna {liga: jogos gravados}.
+        """
+        written = {}
+        current = self.seasons[-1]
+        for league in self.leagues:
+            todo = [s for s in self.seasons if refresh or s == current or not self.raw.exists(league, s)]
+            if not todo:
+                continue
+            downloader = SeasonDownloader(league=league)
+            frames = downloader.load(todo, current_season=current if current in todo else None)
+            for season, err in downloader.errors.items():
+                self.errors[(league, season)] = err
+            written[league] = 0
+            for season, df in frames.items():
+                df = self.clean(df)
+                if df.empty or not {'B365H', 'B365A', 'FTR'} <= set(df.columns):
+                    self.errors[(league, season)] = "sem odds/resultados"
+                    continue
+                self.raw.write(league, season, df)
+                written[league] += len(df)
+        return written
+
+    # --- 2. Features ---
+    def build_features(self):
+        """Features por liga em paralelo; salva encoders por liga e o estado de forma dos times."""
+        leagues = [lg for lg in self.leagues if self.raw.seasons(lg)]
+        tasks = [(self.raw.root, self.features.root, lg, self.seasons) for lg in leagues]
+        if self.n_jobs == 1 or len(tasks) <= 1:
+            results = list(map(_build_league, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_jobs) as pool:
+                results = list(pool.map(_build_league, tasks))
+
+        encoders = {league: teams for league, teams, _ in results}
+        states = {league: snap for league, _, snap in results}
+        os.makedirs(self.models_dir, exist_ok=True)
+        with open(os.path.join(self.models_dir, self.ENCODERS_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(encoders, f, ensure_ascii=False, indent=1)
+        with open(os.path.join(self.models_dir, self.FORM_STATE_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(states, f, ensure_ascii=False)
+        return encoders
+
+    def encoders(self):
+        with open(os.path.join(self.models_dir, self.ENCODERS_FILENAME), encoding='utf-8') as f:
+            return json.load(f)
+
+    def league_codes(self):
+        """League_Code do modelo global: ordem das ligas no arquivo de encoders (estável entre treino e uso)."""
+        return {league: i for i, league in enumerate(self.encoders())}
+
+    # --- 3. Treino ---
+    def train(self, mode='per_league', test_season=None, params=None):
+        """
+        mode='per_league': um .npz por liga (encoder da liga embutido), treinos em paralelo.
+        mode='global': um único modelo com League_Code; cada partição entra como bloco float32.
+        test_season (padrão: a última) fica fora do treino e mede a acurácia. Retorna {modelo: acurácia}.
+        """
+        params = dict(self.DEFAULT_PARAMS, **(params or {}))
+        test_season = test_season or self.seasons[-1]
+        train_seasons = [s for s in self.seasons if s != test_season]
+        encoders = self.encoders()
+        leagues = [lg for lg in self.leagues if lg in encoders]
+        os.makedirs(self.models_dir, exist_ok=True)
+
+        if mode == 'per_league':
+            tasks = [(self.features.root, lg, train_seasons, test_season, self.feature_names, params,
+                      encoders[lg], os.path.join(self.models_dir, f"{lg}.npz")) for lg in leagues]
+            if self.n_jobs == 1 or len(tasks) <= 1:
+                results = list(map(_fit_league, tasks))
+            else:
+                with ProcessPoolExecutor(max_workers=self.n_jobs) as pool:
+                    results = list(pool.map(_fit_league, tasks))
+            return dict(results)
+        if mode != 'global':
+            raise ValueError(f"Modo desconhecido: {mode}")
+        return self._train_global(leagues, train_seasons, test_season, params)
+
+    def _global_matrix(self, leagues, seasons):
+        """X (float32) e y montados partição a partição, só com as colunas do modelo."""
+        blocks, targets = [], []
+        codes = self.league_codes()
+        columns = self.feature_names + ['Target']
+        for league, _, part in self.features.iter_partitions(leagues, seasons, columns):
+            X = np.empty((len(part), len(self.feature_names) + 1), dtype=np.float32)
+            X[:, 0] = codes[league]
+            X[:, 1:] = part[self.feature_names].to_numpy(dtype=np.float32)
+            blocks.append(X)
+            targets.append(part['Target'].to_numpy())
+        if not blocks:
+            return np.empty((0, len(self.feature_names) + 1), dtype=np.float32), np.empty(0)
+        return np.concatenate(blocks), np.concatenate(targets)
+
+    def _train_global(self, leagues, train_seasons, test_season, params):
+        from sklearn.ensemble import RandomForestClassifier
+        names = ['League_Code'] + self.feature_names
+        X, y = self._global_matrix(leagues, train_seasons)
+        model = RandomForestClassifier(**{**params, 'n_jobs': self.n_jobs})
+        model.fit(X, y)
+        model.n_jobs = None
+        FlatForest.from_sklearn(model, [], names).save(os.path.join(self.models_dir, f"{self.GLOBAL_MODEL}.npz"))
+
+        X_test, y_test = self._global_matrix(leagues, [test_season])
+        acc = float(model.score(X_test, y_test)) if len(y_test) else None
+        return {self.GLOBAL_MODEL: acc}
+
+    # --- Inferência ---
+    def predict(self, league, df: pd.DataFrame, mode='per_league') -> pd.DataFrame:
+        """
+        H, D, A para jogos de uma liga (HomeTeam, AwayTeam, B365H, B365A) com o modelo treinado.
+        Times fora do encoder da liga caem na probabilidade implícita do mercado.
+        Só as features de mercado (modelos com forma exigem o estado dos times).
+        """
+        name = league if mode == 'per_league' else self.GLOBAL_MODEL
+        forest = FlatForest.load(os.path.join(self.models_dir, f"{name}.npz"))
+        expected = self.FEATURES if mode == 'per_league' else ['League_Code'] + self.FEATURES
+        if list(forest.feature_names) != expected:
+            raise ValueError(f"Modelo {name} usa features {forest.feature_names}; predict só monta {expected}.")
+        index = {t: i for i, t in enumerate(self.encoders()[league])}
+
+        imp_h = 1 / df['B365H'].to_numpy(dtype=float)
+        imp_a = 1 / df['B365A'].to_numpy(dtype=float)
+        h_code = df['HomeTeam'].astype(str).map(index).fillna(-1).to_numpy()
+        a_code = df['AwayTeam'].astype(str).map(index).fillna(-1).to_numpy()
+        X = np.column_stack([imp_h, imp_a, imp_h - imp_a, h_code, a_code])
+        if mode != 'per_league':
+            X = np.column_stack([np.full(len(df), self.league_codes()[league]), X])
+
+        probs = np.column_stack([imp_h, np.zeros(len(df)), imp_a])
+        known = (h_code >= 0) & (a_code >= 0)
+        if known.any():
+            probs[known] = forest.predict_proba(X[known])
+        return pd.DataFrame(probs, columns=['H', 'D', 'A'], index=df.index)
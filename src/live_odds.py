@@ -0,0 +1,330 @@
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.finance import RiskManager
+
+
+def parse_tick(line):
+    """Uma linha JSON -> tick (dict com HomeTeam, AwayTeam, B365H/D/A e opcionalmente Date/Fixture)."""
+    tick = json.loads(line)
+    if not isinstance(tick, dict) or 'HomeTeam' not in tick or 'AwayTeam' not in tick:
+        raise ValueError("Tick sem HomeTeam/AwayTeam")
+    return tick
+
+
+def _split_lines(buffer, chunk):
+    """Junta o pedaço lido ao resto da leitura anterior; devolve (linhas completas, resto)."""
+    data = buffer + chunk
+    lines = data.split(b'\n')
+    return lines[:-1], lines[-1]
+
+
+# --- Fontes (plugáveis): cada uma chama push(lista de linhas) a cada pedaço lido ---
+class FileTailSource:
+    """Acompanha um arquivo JSONL (tail -f). Lê em blocos; se o arquivo for truncado, recomeça do início."""
+
+    def __init__(self, path, poll_interval=0.05, from_start=True, follow=True, chunk_size=1 << 20):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.from_start = from_start
+        self.follow = follow          # False = lê até o fim e encerra (replay de um arquivo gravado)
+        self.chunk_size = chunk_size
+
+    async def run(self, push):
+        while not os.path.exists(self.path):
+            await asyncio.sleep(self.poll_interval)
+        with open(self.path, 'rb') as f:
+            if not self.from_start:
+                f.seek(0, os.SEEK_END)
+            buffer = b''
+            while True:
+                chunk = f.read(self.chunk_size)
+                if chunk:
+                    lines, buffer = _split_lines(buffer, chunk)
+                    push(lines)
+                    await asyncio.sleep(0)    # Cede o loop para o re-score entre blocos
+                    continue
+                if not self.follow:
+                    if buffer.strip():
+                        push([buffer])
+                    return
+                if os.path.getsize(self.path) < f.tell():
+                    f.seek(0)
+                    buffer = b''
+                await asyncio.sleep(self.poll_interval)
+
+
+class SocketSource:
+    """Servidor TCP local que recebe ticks JSONL (ex: nc localhost 8700 < feed.jsonl). Aceita várias conexões."""
+
+    def __init__(self, host='127.0.0.1', port=8700, chunk_size=1 << 16):
+        self.host = host
+        self.port = port
+        self.chunk_size = chunk_size
+        self.server = None
+
+    async def run(self, push):
+        async def handle(reader, writer):
+            buffer = b''
+            try:
+                while True:
+                    chunk = await reader.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    lines, buffer = _split_lines(buffer, chunk)
+                    push(lines)
+                if buffer.strip():
+                    push([buffer])
+            finally:
+                writer.close()
+
+        self.server = await asyncio.start_server(handle, self.host, self.port)
+        async with self.server:
+            await self.server.serve_forever()
+
+
+class ReplaySource:
+    """Ticks já em memória (testes e benchmarks), entregues em blocos de chunk_size."""
+
+    def __init__(self, ticks, chunk_size=1000):
+        self.ticks = ticks
+        self.chunk_size = chunk_size
+
+    async def run(self, push):
+        for start in range(0, len(self.ticks), self.chunk_size):
+            push(self.ticks[start:start + self.chunk_size])
+            await asyncio.sleep(0)
+
+
+class LiveOddsEngine:
+    """
+    Consumidor de odds ao vivo. Mantém a tabela de odds correntes por jogo e só re-pontua os jogos
+    cujas odds do mandante ou do visitante (as que entram no modelo) moveram mais que tolerance
+    (relativo) desde a última pontuação. Os jogos sujos se acumulam por batch_window_ms e são
+    re-pontuados juntos (um predict_matches por lote, numa thread para não travar a ingestão).
+    As decisões atualizadas vão para os assinantes (subscribe) e para um snapshot JSON que o dashboard lê.
+    """
+
+    SNAPSHOT_PATH = os.path.join(".betsight_cache", "live", "odds_snapshot.json")
+
+    def __init__(self, model, source, tolerance=0.02, batch_window_ms=50.0, max_batch=5000,
+                 bankroll=1000.0, fraction=0.25, max_cap=0.05, snapshot_path=None, snapshot_interval=0.5):
+        self.model = model
+        self.source = source
+        self.tolerance = tolerance
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+        self.bankroll = bankroll
+        self.fraction = fraction
+        self.max_cap = max_cap
+        self.snapshot_path = snapshot_path if snapshot_path is not None else self.SNAPSHOT_PATH
+        self.snapshot_interval = snapshot_interval
+
+        # fixture -> [HomeTeam, AwayTeam, Date, B365H, B365D, B365A, odds H pontuada, odds A pontuada, decisão]
+        self.table = {}
+        self.dirty = {}             # fixture -> None (dict preserva a ordem de chegada)
+        self.subscribers = []
+        self.stats = {'ticks': 0, 'errors': 0, 'moved': 0, 'rescored': 0, 'batches': 0,
+                      'rescore_errors': 0, 'last_error': None, 'last_batch_ms': 0.0, 'started_at': None}
+        self._wakeup = None
+        self._closing = False
+        self._snapshot_pending = False
+        self._executor = None       # Thread de re-score, criada em run() e liberada em stop()
+
+    @staticmethod
+    def fixture_key(tick):
+        key = tick.get('Fixture')
+        if key is not None:
+            return str(key)
+        date = tick.get('Date')
+        return f"{date}|{tick['HomeTeam']}|{tick['AwayTeam']}" if date else f"{tick['HomeTeam']}|{tick['AwayTeam']}"
+
+    # --- Ingestão (caminho quente: só dicionário e comparação, sem pandas) ---
+    def push(self, items):
+        """Recebe linhas (bytes/str) ou ticks já decodificados; atualiza a tabela e marca jogos sujos."""
+        table, dirty, tol = self.table, self.dirty, self.tolerance
+        n_moved = 0
+        for item in items:
+            try:
+                tick = item if isinstance(item, dict) else parse_tick(item) if item.strip() else None
+                if tick is None:
+                    continue
+                key = self.fixture_key(tick)
+                odds_h, odds_a = float(tick['B365H']), float(tick['B365A'])
+                odds_d = float(tick.get('B365D', 'nan'))
+            except (ValueError, KeyError, TypeError):
+                self.stats['errors'] += 1
+                continue
+            self.stats['ticks'] += 1
+
+            entry = table.get(key)
+            if entry is None:
+                entry = [str(tick['HomeTeam']), str(tick['AwayTeam']), tick.get('Date'), odds_h, odds_d, odds_a,
+                         None, None, None]
+                table[key] = entry
+            else:
+                entry[3], entry[4], entry[5] = odds_h, odds_d, odds_a
+
+            scored_h, scored_a = entry[6], entry[7]
+            if scored_h is None or abs(odds_h - scored_h) > tol * scored_h or abs(odds_a - scored_a) > tol * scored_a:
+                if key not in dirty:
+                    dirty[key] = None
+                    n_moved += 1
+        self.stats['moved'] += n_moved
+        if dirty and self._wakeup is not None:
+            self._wakeup.set()
+
+    # --- Re-score em lote ---
+    def _score(self, frame: pd.DataFrame):
+        """Roda na thread de re-score: previsão + stake + semáforo do lote inteiro."""
+        probs = self.model.predict_matches(frame)
+        p_home = probs['H'].to_numpy()
+        odds_h = frame['B365H'].to_numpy(dtype=float)
+        stakes = RiskManager.calculate_stakes(p_home, odds_h, self.bankroll, self.fraction, self.max_cap)
+        signal = RiskManager.traffic_light(stakes['ev'], p_home)
+        return probs, stakes, signal
+
+    async def _rescore(self, keys):
+        rows = [self.table[k] for k in keys]
+        frame = pd.DataFrame({
+            'HomeTeam': [r[0] for r in rows], 'AwayTeam': [r[1] for r in rows],
+            'B365H': np.array([r[3] for r in rows]), 'B365D': np.array([r[4] for r in rows]),
+            'B365A': np.array([r[5] for r in rows])
+        })
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        probs, stakes, signal = await loop.run_in_executor(self._executor, self._score, frame)
+        self.stats['last_batch_ms'] = (time.perf_counter() - start) * 1000
+
+        updated_at = time.time()
+        updates = []
+        for i, (key, row) in enumerate(zip(keys, rows)):
+            # Referência = odds efetivamente pontuadas (ticks que chegaram durante o lote já marcaram o jogo de novo)
+            row[6], row[7] = float(frame['B365H'].iat[i]), float(frame['B365A'].iat[i])
+            row[8] = {
+                'Fixture': key, 'HomeTeam': row[0], 'AwayTeam': row[1], 'Date': row[2],
+                'B365H': row[6], 'B365D': float(frame['B365D'].iat[i]), 'B365A': row[7],
+                'H': float(probs['H'].iat[i]), 'D': float(probs['D'].iat[i]), 'A': float(probs['A'].iat[i]),
+                'EV': float(stakes['ev'][i]),
+                'Stake_Pct': round(float(stakes['stake_pct'][i]) * 100, 2),
+                'Stake_Val': round(float(stakes['stake_val'][i]), 2),
+                'Signal': str(signal[i]),
+                'Decision': RiskManager.SIGNALS[str(signal[i])],
+                'Updated': updated_at
+            }
+            updates.append(row[8])
+
+            # Tick chegou durante o lote e ficou dentro da tolerância da referência antiga, mas não da nova
+            tol = self.tolerance
+            if abs(row[3] - row[6]) > tol * row[6] or abs(row[5] - row[7]) > tol * row[7]:
+                self.dirty.setdefault(key, None)
+
+        self.stats['rescored'] += len(keys)
+        self.stats['batches'] += 1
+        self._snapshot_pending = True
+        for queue in self.subscribers:
+            queue.put_nowait(updates)
+
+    async def _rescore_loop(self):
+        while True:
+            if not self.dirty:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                if not self._closing:
+                    # Janela de coalescência: ticks que chegam agora entram no mesmo lote
+                    await asyncio.sleep(self.batch_window)
+                continue
+            keys = list(itertools.islice(self.dirty, self.max_batch))
+            for key in keys:
+                del self.dirty[key]
+            try:
+                await self._rescore(keys)
+            except Exception as e:
+                # Lote perdido não derruba o consumidor: os jogos guardam a decisão anterior e voltam
+                # à fila no próximo tick que mover as odds além da tolerância
+                self.stats['rescore_errors'] += 1
+                self.stats['last_error'] = f"{type(e).__name__}: {e}"
+                print(f"⚠️ Re-score de {len(keys)} jogos falhou: {self.stats['last_error']}", file=sys.stderr)
+
+    # --- Saída para o dashboard ---
+    def subscribe(self) -> asyncio.Queue:
+        """Fila que recebe a lista de decisões atualizadas a cada lote."""
+        queue = asyncio.Queue()
+        self.subscribers.append(queue)
+        return queue
+
+    def decisions(self) -> pd.DataFrame:
+        return pd.DataFrame([row[8] for row in self.table.values() if row[8] is not None])
+
+    def snapshot(self):
+        elapsed = time.time() - self.stats['started_at'] if self.stats['started_at'] else 0.0
+        stats = dict(self.stats, fixtures=len(self.table), pending=len(self.dirty),
+                     ticks_per_s=self.stats['ticks'] / elapsed if elapsed > 0 else 0.0)
+        return {'updated_at': time.time(), 'stats': stats,
+                'fixtures': [row[8] for row in self.table.values() if row[8] is not None]}
+
+    def write_snapshot(self):
+        """Grava o snapshot de forma atômica (arquivo temporário + rename): o leitor nunca vê JSON pela metade."""
+        if not self.snapshot_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+        tmp = f"{self.snapshot_path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False)
+        os.replace(tmp, self.snapshot_path)
+        self._snapshot_pending = False
+
+    @staticmethod
+    def read_snapshot(path=None):
+        """Último snapshot gravado pelo consumidor (None se ainda não existe)."""
+        path = path or LiveOddsEngine.SNAPSHOT_PATH
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    async def _snapshot_loop(self):
+        while not self._closing:
+            await asyncio.sleep(self.snapshot_interval)
+            if self._snapshot_pending:
+                self.write_snapshot()
+
+    # --- Execução ---
+    async def run(self):
+        """Consome a fonte até ela terminar (fontes contínuas: até o cancelamento); depois esvazia a fila."""
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self.stats['started_at'] = time.time()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-rescore")
+        rescorer = asyncio.create_task(self._rescore_loop())
+        snapshots = asyncio.create_task(self._snapshot_loop())
+        try:
+            await self.source.run(self.push)
+        finally:
+            self._closing = True
+            self._wakeup.set()
+            try:
+                await rescorer
+            finally:
+                snapshots.cancel()
+                self.write_snapshot()
+                self.stop()
+        return self.stats
+
+    def stop(self):
+        """Libera a thread de re-score (idempotente; run() chama ao terminar)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -1,6 +1,12 @@
+import hashlib
+import os
+import numpy as np
 import pandas as pd
-import joblib
 import streamlit as st
+from src.forest import FlatForest
+from src.cache import LRUCache
+from src.features import TeamFormEngine
+from src.profiling import Profiler
 
 class BetModel:
     """
@@ -8,50 +14,267 @@ class BetModel:
     Carrega o cérebro pré-treinado do Data Master.
     """
 
-    def __init__(self):
+    # Ordem exata das features usada no treino
+    FEATURES = ['Implied_Prob_H', 'Implied_Prob_A', 'Market_Diff', 'HomeTeam_Code', 'AwayTeam_Code']
+
+    # Artefatos (a floresta compilada .npz tem prioridade sobre o pickle)
+    MODEL_PATH = "betsight_model_v1.pkl"
+    ENCODER_PATH = "team_encoder_v1.pkl"
+    FOREST_PATH = "betsight_model_v1.npz"
+    FORM_STATE_PATH = "team_state_v1.json"
+
+    # Precisão das odds na chave do cache (football-data publica 2 casas)
+    ODDS_DECIMALS = 2
+
+    # Coluna de cada resultado no predict_proba (Target do treino: H=0, D=1, A=2)
+    OUTCOMES = {'H': 0, 'D': 1, 'A': 2}
+
+    # Rótulos das features nas explicações
+    FEATURE_LABELS = {
+        'Implied_Prob_H': 'Odd do mandante', 'Implied_Prob_A': 'Odd do visitante',
+        'Market_Diff': 'Diferença de mercado', 'HomeTeam_Code': 'Histórico do mandante',
+        'AwayTeam_Code': 'Histórico do visitante', 'Elo_H': 'Elo do mandante', 'Elo_A': 'Elo do visitante',
+        'Elo_Diff': 'Diferença de Elo', 'GF_H': 'Ataque do mandante', 'GA_H': 'Defesa do mandante',
+        'GF_A': 'Ataque do visitante', 'GA_A': 'Defesa do visitante',
+        'Rest_H': 'Descanso do mandante', 'Rest_A': 'Descanso do visitante'
+    }
+
+    def __init__(self, cache_size=50_000, cache_ttl=6 * 3600):
+        # Memoização das previsões: chave = (código mandante, código visitante, odds arredondadas)
+        self.cache = LRUCache(max_size=cache_size, ttl=cache_ttl)
+        self._load_artifacts()
+
+    @Profiler.timed('BetModel.load')
+    def _load_artifacts(self):
         # Carrega artefatos estáticos
+        self.le_teams = None
+        self.artifact_path = None
+        self._explainer = None
+        team_classes = []
         try:
-            self.model = joblib.load("betsight_model_v1.pkl")
-            self.le_teams = joblib.load("team_encoder_v1.pkl")
+            if os.path.exists(self.FOREST_PATH):
+                # Floresta compilada: cold start sem importar sklearn/joblib
+                self.model = FlatForest.load(self.FOREST_PATH)
+                self.artifact_path = self.FOREST_PATH
+                team_classes = self.model.team_classes
+            else:
+                import joblib
+                self.model = joblib.load(self.MODEL_PATH)
+                self.le_teams = joblib.load(self.ENCODER_PATH)
+                self.artifact_path = self.MODEL_PATH
+                team_classes = self.le_teams.classes_
         except FileNotFoundError:
             st.error("⚠️ Artefatos do modelo não encontrados. Rode 'python train_model.py' localmente e suba os arquivos .pkl")
             self.model = None
 
+        # Lookup pré-computado (evita LabelEncoder.transform por jogo)
+        self.team_index = {str(t): i for i, t in enumerate(team_classes)}
+
+        # Features que o artefato espera (modelos novos podem incluir a forma dos times)
+        names = getattr(self.model, 'feature_names', None)
+        if names is None:
+            names = getattr(self.model, 'feature_names_in_', None)
+        self.features = list(names) if names is not None and len(names) else list(self.FEATURES)
+        self.uses_form = any(f in TeamFormEngine.FEATURES for f in self.features)
+
+        # Snapshot do estado dos times (Elo/forma) gerado pelo train_model
+        self.form_engine = None
+        if os.path.exists(self.FORM_STATE_PATH):
+            self.form_engine = TeamFormEngine.load(self.FORM_STATE_PATH)
+
+        # Versão do artefato (hash): muda => cache invalidado
+        self._artifact_stat = None
+        self.model_version = None
+        if self.artifact_path is not None:
+            self._artifact_stat = self._stat(self.artifact_path)
+            self.model_version = self._hash_file(self.artifact_path)
+
+    @staticmethod
+    def _stat(path):
+        st_ = os.stat(path)
+        return (st_.st_mtime_ns, st_.st_size)
+
+    @staticmethod
+    def _hash_file(path):
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        return h.hexdigest()[:16]
+
+    def check_artifact(self):
+        """
+        Recarrega o modelo se o artefato mudou em disco (retreino).
+        Só re-hasheia quando mtime/tamanho mudam; hash diferente limpa o cache.
+        """
+        if self.artifact_path is None or not os.path.exists(self.artifact_path):
+            return False
+        stat = self._stat(self.artifact_path)
+        if stat == self._artifact_stat:
+            return False
+        if self._hash_file(self.artifact_path) == self.model_version:
+            self._artifact_stat = stat
+            return False
+        self._load_artifacts()
+        self.cache.clear()
+        return True
+
+    def cache_stats(self):
+        """Contadores do cache de previsões (hits, misses, evictions, size, hit_rate)."""
+        return dict(self.cache.stats(), model_version=self.model_version)
+
+    def encode_teams(self, teams):
+        """Converte nomes em códigos do encoder. Times desconhecidos viram -1."""
+        index = self.team_index
+        if isinstance(teams, pd.Categorical):
+            # Coluna categórica (HistoryStore): traduz só as categorias e indexa pelos códigos
+            lookup = np.array([index.get(str(t), -1) for t in teams.categories] + [-1], dtype=np.int64)
+            return lookup[teams.codes]
+        return np.fromiter((index.get(str(t), -1) for t in teams), dtype=np.int64, count=len(teams))
+
+    @Profiler.timed()
+    def predict_matches(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Previsão em lote (uma única chamada ao predict_proba).
+        Espera colunas HomeTeam, AwayTeam, B365H e B365A.
+        Retorna DataFrame alinhado ao índice de entrada com H, D, A e Mkt_Diff.
+        """
+        odds_h = df['B365H'].to_numpy(dtype=float)
+        odds_a = df['B365A'].to_numpy(dtype=float)
+        n = len(df)
+
+        out = pd.DataFrame({'H': np.zeros(n), 'D': np.zeros(n), 'A': np.zeros(n), 'Mkt_Diff': np.zeros(n)}, index=df.index)
+        if self.model is None or n == 0:
+            return out
+
+        # Hot-swap antes de montar as features: códigos de time e snapshot de forma vêm do artefato novo
+        self.check_artifact()
+        columns, known, form = self._feature_columns(df)
+        imp_h, imp_a, mkt_diff = columns['Implied_Prob_H'], columns['Implied_Prob_A'], columns['Market_Diff']
+        h_code, a_code = columns['HomeTeam_Code'], columns['AwayTeam_Code']
+
+        probs = np.column_stack([imp_h, np.zeros(n), imp_a])
+        diff = np.zeros(n)
+
+        if known.any():
+            rows = np.flatnonzero(known)
+
+            # 1. Cache: só os jogos ainda não vistos vão para o modelo (cache_size=0 desliga)
+            keys, miss = None, np.ones(len(rows), dtype=bool)
+            if self.cache.max_size > 0:
+                keys = list(zip(h_code[rows].tolist(), a_code[rows].tolist(),
+                                np.round(odds_h[rows], self.ODDS_DECIMALS).tolist(),
+                                np.round(odds_a[rows], self.ODDS_DECIMALS).tolist()))
+                if form is not None:
+                    # Com features de forma, o estado do time entra na chave
+                    form_keys = map(tuple, np.round(form.to_numpy(dtype=float)[rows], 4).tolist())
+                    keys = [k + f for k, f in zip(keys, form_keys)]
+                cached = [self.cache.get(k) for k in keys]
+                miss = np.array([c is None for c in cached], dtype=bool)
+                hit_rows = rows[~miss]
+                if len(hit_rows):
+                    probs[hit_rows] = [c for c in cached if c is not None]
+
+            # 2. Features exatas do treino, montadas de uma vez para os misses
+            miss_rows = rows[miss]
+            if len(miss_rows):
+                X = pd.DataFrame({f: columns[f][miss_rows] for f in self.features}, columns=self.features)
+                fresh = self.model.predict_proba(X)
+                probs[miss_rows] = fresh
+                if keys is not None:
+                    for k, p in zip((keys[i] for i in np.flatnonzero(miss)), fresh):
+                        self.cache.put(k, tuple(p))
+            diff[known] = mkt_diff[known]
+
+        out['H'] = probs[:, 0]
+        out['D'] = probs[:, 1]
+        out['A'] = probs[:, 2]
+        out['Mkt_Diff'] = diff
+        return out
+
+    def _feature_columns(self, df: pd.DataFrame):
+        """Features candidatas do lote + máscara dos jogos que o modelo pontua (times conhecidos) + forma."""
+        imp_h = 1 / df['B365H'].to_numpy(dtype=float)
+        imp_a = 1 / df['B365A'].to_numpy(dtype=float)
+        mkt_diff = imp_h - imp_a
+
+        h_code = self.encode_teams(df['HomeTeam'].array)
+        a_code = self.encode_teams(df['AwayTeam'].array)
+
+        # Fallback (Time novo que subiu da segunda divisão): probabilidade implícita do mercado
+        known = (h_code >= 0) & (a_code >= 0) & np.isfinite(mkt_diff)
+
+        # Todas as features candidatas; o modelo carregado escolhe as suas (self.features)
+        columns = {
+            'Implied_Prob_H': imp_h,
+            'Implied_Prob_A': imp_a,
+            'Market_Diff': mkt_diff,
+            'HomeTeam_Code': h_code,
+            'AwayTeam_Code': a_code
+        }
+        form = None
+        if self.uses_form:
+            form = self.form_features(df)
+            if form is None:
+                known[:] = False
+            else:
+                columns.update({c: form[c].to_numpy(dtype=float) for c in TeamFormEngine.FEATURES})
+        return columns, known, form
+
+    def _flat_forest(self):
+        """Floresta em arrays para as explicações (o pickle sklearn é achatado uma vez, sob demanda)."""
+        if isinstance(self.model, FlatForest):
+            return self.model
+        if self._explainer is None:
+            self._explainer = FlatForest.from_sklearn(self.model, list(self.team_index), self.features)
+        return self._explainer
+
+    @Profiler.timed()
+    def explain_matches(self, df: pd.DataFrame, outcome='H') -> pd.DataFrame:
+        """
+        Explicação em lote (Saabas, exata): quanto cada feature moveu a probabilidade de outcome
+        em relação à taxa base da floresta. Base + soma das colunas = probabilidade do modelo.
+        Jogos fora do modelo (fallback de mercado) ficam NaN. Custo ~ uma previsão do lote.
+        """
+        out = pd.DataFrame(np.nan, index=df.index, columns=['Base'] + self.features)
+        if self.model is None or len(df) == 0:
+            return out
+        self.check_artifact()
+        columns, known, _ = self._feature_columns(df)
+        rows = np.flatnonzero(known)
+        if len(rows):
+            X = np.column_stack([np.asarray(columns[f], dtype=float)[rows] for f in self.features])
+            bias, contrib = self._flat_forest().contributions(X)
+            c = self.OUTCOMES[outcome]
+            values = np.column_stack([np.full(len(rows), bias[c]), contrib[:, :len(self.features), c]])
+            out.iloc[rows] = values
+        return out
+
+    def form_features(self, df: pd.DataFrame):
+        """
+        Features de forma (Elo, gols EWM, descanso) para os jogos do df.
+        Usa as colunas pré-jogo se o df já as tiver (histórico); senão o snapshot do TeamFormEngine em O(1) por jogo,
+        que só aceita jogos posteriores ao snapshot (ValueError para linhas históricas sem as colunas).
+        """
+        if all(c in df.columns for c in TeamFormEngine.FEATURES):
+            return df[TeamFormEngine.FEATURES]
+        if self.form_engine is None:
+            return None
+        return self.form_engine.live_features(df)
+
+    @Profiler.timed()
     def predict_match(self, home, away, odds_h, odds_a):
-        """Previsão usando o modelo congelado."""
+        """Previsão usando o modelo congelado (atalho para um único jogo)."""
         if self.model is None: return {'H':0, 'D':0, 'A':0, 'Mkt_Diff':0}
 
-        try:
-            # Tratamento de input igual ao do treino
-            h_str = str(home)
-            a_str = str(away)
-            
-            # Encoder
-            h_code = self.le_teams.transform([h_str])[0]
-            a_code = self.le_teams.transform([a_str])[0]
-            
-            imp_h = 1/odds_h
-            imp_a = 1/odds_a
-            mkt_diff = imp_h - imp_a
-            
-            # Features exatas do treino
-            input_data = pd.DataFrame([{
-                'Implied_Prob_H': imp_h,
-                'Implied_Prob_A': imp_a,
-                'Market_Diff': mkt_diff,
-                'HomeTeam_Code': h_code,
-                'AwayTeam_Code': a_code
-            }])
-            
-            probs = self.model.predict_proba(input_data)[0]
-            return {'H': probs[0], 'D': probs[1], 'A': probs[2], 'Mkt_Diff': mkt_diff}
-            
-        except Exception as e:
-            # Fallback (Time novo que subiu da segunda divisão)
-            return {'H': 1/odds_h, 'D': 0.0, 'A': 1/odds_a, 'Mkt_Diff': 0.0}
+        row = pd.DataFrame({'HomeTeam': [home], 'AwayTeam': [away], 'B365H': [odds_h], 'B365A': [odds_a]})
+        return self.predict_matches(row).iloc[0].to_dict()
 
-    def explain_prediction(self, probs, mkt_diff):
-        """Tradutor NeuroCopy."""
+    def explain_prediction(self, probs, mkt_diff, contributions=None, top=3):
+        """
+        Tradutor NeuroCopy.
+        contributions: linha do explain_matches (Base + features); adiciona os fatores que mais pesaram.
+        """
         reasons = []
         p_home = probs['H']
         
@@ -66,5 +289,15 @@ class BetModel:
             reasons.append("🤖 **Sinal Forte:** IA confirma favoritismo.")
         elif p_home < 0.40:
             reasons.append("⚠️ **Risco:** IA cética com o mandante.")
+
+        if contributions is not None and pd.notna(contributions.get('Base')):
+            factors = contributions.drop('Base').astype(float)
+            for feature, value in factors.reindex(factors.abs().sort_values(ascending=False).index).head(top).items():
+                if abs(value) < 0.005:
+                    break
+                icon = "📈" if value > 0 else "📉"
+                label = self.FEATURE_LABELS.get(feature, feature)
+                reasons.append(f"{icon} **{label}:** {value * 100:+.1f} p.p. na vitória do mandante "
+                               f"(base {contributions['Base']:.0%})")
             
         return reasons
\ No newline at end of file
@@ -0,0 +1,184 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.finance import RiskManager
+
+# Arrays do treino abertos por memory-map em cada worker (gravados uma vez, nunca copiados por tarefa)
+_WORKER_ARRAYS = None
+
+def _init_worker(paths):
+    global _WORKER_ARRAYS
+    _WORKER_ARRAYS = {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+
+def _evaluate_fold(args):
+    """Treina um candidato em [0, train_end) e mede log-loss e ROI em [val_start, val_end)."""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import log_loss
+    cand_id, params, fold_id, train_end, val_start, val_end, fraction, max_cap = args
+    X, y, odds_h = _WORKER_ARRAYS['X'], _WORKER_ARRAYS['y'], _WORKER_ARRAYS['odds_h']
+
+    model = RandomForestClassifier(**params)
+    model.fit(np.asarray(X[:train_end]), np.asarray(y[:train_end]))
+
+    # Probabilidades nas 3 classes (H, D, A) mesmo que alguma falte no treino
+    proba = np.zeros((val_end - val_start, 3))
+    proba[:, model.classes_] = model.predict_proba(np.asarray(X[val_start:val_end]))
+    y_val = np.asarray(y[val_start:val_end])
+
+    # ROI da estratégia do app (Kelly + teto no mandante) sobre o valor apostado
+    odds = np.asarray(odds_h[val_start:val_end], dtype=float)
+    stake = RiskManager.stake_fractions(proba[:, 0], odds, fraction, max_cap)
+    pnl = stake * np.where(y_val == 0, odds - 1, -1.0)
+    staked = stake.sum()
+    return {
+        'cand_id': cand_id,
+        'fold': fold_id,
+        'log_loss': float(log_loss(y_val, np.clip(proba, 1e-15, 1), labels=[0, 1, 2])),
+        'roi': float(pnl.sum() / staked) if staked > 0 else 0.0,
+        'bets': int((stake > 0).sum())
+    }
+
+
+class ModelSearch:
+    """
+    Busca de hiperparâmetros com validação cruzada temporal por temporada (janela expansiva).
+    Folds = fatias de uma única matriz ordenada por data, gravada uma vez e lida por memory-map.
+    Os candidatos rodam em paralelo fold a fold; depois de cada fold, candidatos claramente dominados
+    (log-loss pior por mais de prune_margin sem ROI melhor) saem da disputa.
+    Ranking final nos dois critérios: frente de Pareto (log-loss, ROI) primeiro; dentro da frente,
+    quem empata no log-loss (até prune_margin do melhor) é ordenado pelo ROI, o resto pelo log-loss.
+    """
+
+    DEFAULT_GRID = {
+        'n_estimators': [100, 300],
+        'max_depth': [3, 5, 8],
+        'min_samples_leaf': [1, 10, 30],
+        'max_features': ['sqrt', None]
+    }
+    CACHE_DIR = os.path.join(".betsight_cache", "search")
+
+    def __init__(self, grid=None, n_iter=None, n_jobs=None, min_train_seasons=1, prune_margin=0.01,
+                 fraction=0.25, max_cap=0.05, seed=42, cache_dir=None):
+        self.grid = grid or self.DEFAULT_GRID
+        self.n_iter = n_iter                    # None = grade completa; N = amostra aleatória de N combinações
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.min_train_seasons = min_train_seasons
+        self.prune_margin = prune_margin
+        self.fraction = fraction
+        self.max_cap = max_cap
+        self.seed = seed
+        self.cache_dir = cache_dir or self.CACHE_DIR
+        self.results = None
+        self.best_params = None
+
+    def candidates(self):
+        from sklearn.model_selection import ParameterGrid, ParameterSampler
+        if self.n_iter is None:
+            combos = list(ParameterGrid(self.grid))
+        else:
+            n_total = len(ParameterGrid(self.grid))
+            combos = list(ParameterSampler(self.grid, min(self.n_iter, n_total), random_state=self.seed))
+        return [dict(c, random_state=self.seed) for c in combos]
+
+    def folds(self, seasons):
+        """(fim do treino, inicio da validação, fim da validação) por temporada validada."""
+        seasons = np.asarray(seasons).astype(str)
+        starts = np.flatnonzero(np.r_[True, seasons[1:] != seasons[:-1]])
+        ends = np.r_[starts[1:], len(seasons)]
+        return [(int(s), int(s), int(e)) for s, e in list(zip(starts, ends))[self.min_train_seasons:]]
+
+    def _write_arrays(self, X, y, odds_h, run_dir):
+        paths = {}
+        for name, arr in (('X', np.asarray(X, dtype=np.float64)), ('y', np.asarray(y, dtype=np.int64)),
+                          ('odds_h', np.asarray(odds_h, dtype=np.float64))):
+            paths[name] = os.path.join(run_dir, f"{name}.npy")
+            np.save(paths[name], arr)
+        return paths
+
+    def _prune(self, scores, alive):
+        """Remove candidatos dominados: outro tem log-loss melhor por > prune_margin e ROI >= ao seu."""
+        ll = scores.loc[alive, 'log_loss'].to_numpy()
+        roi = scores.loc[alive, 'roi'].to_numpy()
+        dominated = ((ll[None, :] + self.prune_margin < ll[:, None]) & (roi[None, :] >= roi[:, None])).any(axis=1)
+        return [c for c, d in zip(alive, dominated) if not d]
+
+    @staticmethod
+    def pareto_fronts(log_loss, roi):
+        """Camada de Pareto de cada candidato (1 = não dominado em log-loss menor e ROI maior)."""
+        log_loss, roi = np.asarray(log_loss, dtype=float), np.asarray(roi, dtype=float)
+        front = np.zeros(len(log_loss), dtype=int)
+        layer = 0
+        while (front == 0).any():
+            layer += 1
+            left = np.flatnonzero(front == 0)
+            ll, r = log_loss[left], roi[left]
+            dominated = ((ll[None, :] <= ll[:, None]) & (r[None, :] >= r[:, None]) &
+                         ((ll[None, :] < ll[:, None]) | (r[None, :] > r[:, None]))).any(axis=1)
+            front[left[~dominated]] = layer
+        return front
+
+    def rank(self, board: pd.DataFrame) -> pd.DataFrame:
+        """
+        Ordena o leaderboard: mais folds avaliados, depois frente de Pareto; dentro da frente, candidatos
+        com log-loss até prune_margin do melhor dela empatam na calibração e desempatam pelo ROI.
+        """
+        board = board.copy()
+        board['front'] = 0
+        for _, rows in board.groupby('folds').groups.items():
+            board.loc[rows, 'front'] = self.pareto_fronts(board.loc[rows, 'log_loss'], board.loc[rows, 'roi'])
+        best_ll = board.groupby(['folds', 'front'])['log_loss'].transform('min')
+        tied = board['log_loss'] <= best_ll + self.prune_margin
+        # Chave dentro da frente: empatados por -ROI (antes), demais pelo log-loss
+        board['_tier'] = np.where(tied, 0, 1)
+        board['_key'] = np.where(tied, -board['roi'], board['log_loss'])
+        board = board.sort_values(['folds', 'front', '_tier', '_key'], ascending=[False, True, True, True],
+                                  kind='stable')
+        return board.drop(columns=['_tier', '_key']).reset_index(drop=True)
+
+    def run(self, X, y, seasons, odds_h, verbose=True) -> pd.DataFrame:
+        """
+        X, y, seasons e odds_h em ordem cronológica. Retorna o ranking (média nos folds avaliados)
+        e guarda os melhores parâmetros em self.best_params.
+        """
+        candidates = self.candidates()
+        folds = self.folds(seasons)
+        if not folds:
+            raise ValueError("Temporadas insuficientes para validação cruzada temporal.")
+        # Pasta própria por execução: duas buscas simultâneas não sobrescrevem os arrays uma da outra
+        os.makedirs(self.cache_dir, exist_ok=True)
+        run_dir = tempfile.mkdtemp(prefix="run-", dir=self.cache_dir)
+        try:
+            paths = self._write_arrays(X, y, odds_h, run_dir)
+
+            rows = []
+            alive = list(range(len(candidates)))
+            with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker, initargs=(paths,)) as pool:
+                for fold_id, (train_end, val_start, val_end) in enumerate(folds):
+                    tasks = [(c, candidates[c], fold_id, train_end, val_start, val_end, self.fraction, self.max_cap)
+                             for c in alive]
+                    rows.extend(pool.map(_evaluate_fold, tasks))
+
+                    scores = pd.DataFrame(rows).groupby('cand_id')[['log_loss', 'roi']].mean()
+                    if fold_id < len(folds) - 1:
+                        survivors = self._prune(scores, alive)
+                        if verbose:
+                            print(f"   -> Fold {fold_id + 1}/{len(folds)}: {len(alive)} candidatos, "
+                                  f"{len(alive) - len(survivors)} dominados descartados")
+                        alive = survivors
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+        per_fold = pd.DataFrame(rows)
+        board = per_fold.groupby('cand_id').agg(log_loss=('log_loss', 'mean'), roi=('roi', 'mean'),
+                                               bets=('bets', 'sum'), folds=('fold', 'count'))
+        board['params'] = [candidates[c] for c in board.index]
+        # Só quem passou por todos os folds disputa o primeiro lugar
+        board = self.rank(board.reset_index())
+        self.results = board
+        self.best_params = board.loc[0, 'params']
+        return board
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from src.finance import RiskManager
+from src.profiling import Profiler
+
+class MonteCarloSimulator:
+    """
+    Simulador de Risco de Banca (Monte Carlo).
+    Reamostra o resultado de cada aposta e gera milhares de curvas de banca
+    com as mesmas travas do RiskManager (Quarter Kelly + Teto).
+    """
+
+    QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+    @staticmethod
+    def _simulate_chunk(args):
+        """
+        Gera um bloco de caminhos e devolve (log da banca final, drawdown máximo, mínimo do log).
+        Trabalha em log-espaço: capitalização composta vira cumsum.
+        """
+        seed, n_paths, stake_pct, prob, unit_win, hist_ret, mode = args
+        rng = np.random.default_rng(seed)
+        n_bets = len(stake_pct)
+
+        if mode == 'bootstrap':
+            # Reamostra apostas históricas (stake e retorno realizado) com reposição
+            idx = rng.integers(0, n_bets, size=(n_paths, n_bets))
+            growth = np.log1p(stake_pct[idx] * hist_ret[idx])
+        else:
+            # Sorteia cada resultado pela probabilidade do modelo
+            win = rng.random((n_paths, n_bets)) < prob
+            growth = np.log1p(stake_pct * np.where(win, unit_win, -1.0))
+
+        log_bank = np.cumsum(growth, axis=1)
+        peak = np.maximum(np.maximum.accumulate(log_bank, axis=1), 0.0)
+        max_dd = (1 - np.exp(log_bank - peak)).max(axis=1)
+        # copy(): a fatia seria uma view que mantém a matriz (caminhos x apostas) inteira viva
+        return log_bank[:, -1].copy(), max_dd, np.minimum(log_bank.min(axis=1), 0.0)
+
+    @staticmethod
+    @Profiler.timed()
+    def simulate(probabilities, odds, outcomes=None, n_paths=100_000, mode='model',
+                 fraction=0.25, max_cap=0.05, initial_bankroll=1000.0, ruin_level=0.5,
+                 max_cells=1_000_000, n_jobs=1, seed=42):
+        """
+        Simula n_paths curvas de banca sobre a sequência de oportunidades.
+        mode='model' sorteia pela probabilidade do modelo; mode='bootstrap' reamostra
+        os resultados históricos (outcomes: True para vitória do mandante).
+        ruin_level: fração da banca inicial abaixo da qual o caminho conta como ruína.
+        Cada bloco tem no máximo max_cells células (caminhos x apostas): a memória de pico não cresce
+        com o tamanho do histórico. n_jobs > 1 espalha os blocos entre processos.
+        """
+        prob = np.asarray(probabilities, dtype=float)
+        odds = np.asarray(odds, dtype=float)
+        stake_pct = RiskManager.stake_fractions(prob, odds, fraction, max_cap)
+
+        # Jogos sem aposta não mexem na banca
+        placed = stake_pct > 0
+        stake_pct, prob, odds = stake_pct[placed], prob[placed], odds[placed]
+        unit_win = odds - 1
+
+        hist_ret = None
+        if mode == 'bootstrap':
+            if outcomes is None:
+                raise ValueError("mode='bootstrap' exige os resultados históricos (outcomes).")
+            won = np.asarray(outcomes, dtype=bool)[placed]
+            hist_ret = np.where(won, unit_win, -1.0)
+        elif mode != 'model':
+            raise ValueError(f"Modo desconhecido: {mode}")
+
+        n_bets = len(stake_pct)
+        if n_bets == 0:
+            log_final = np.zeros(n_paths)
+            max_dd = np.zeros(n_paths)
+            log_min = np.zeros(n_paths)
+        else:
+            # Caminhos por bloco pelo orçamento de células; sementes independentes por bloco:
+            # resultado idêntico com 1 ou N processos
+            chunk_size = max(1, int(max_cells) // n_bets)
+            sizes = [min(chunk_size, n_paths - i) for i in range(0, n_paths, chunk_size)]
+            seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+            tasks = [(s, n, stake_pct, prob, unit_win, hist_ret, mode) for s, n in zip(seeds, sizes)]
+
+            if n_jobs == 1:
+                parts = list(map(MonteCarloSimulator._simulate_chunk, tasks))
+            else:
+                with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                    parts = list(pool.map(MonteCarloSimulator._simulate_chunk, tasks))
+
+            log_final = np.concatenate([p[0] for p in parts])
+            max_dd = np.concatenate([p[1] for p in parts])
+            log_min = np.concatenate([p[2] for p in parts])
+
+        final_bank = initial_bankroll * np.exp(log_final)
+        qs = MonteCarloSimulator.QUANTILES
+
+        return {
+            'n_paths': n_paths,
+            'n_bets': n_bets,
+            'mode': mode,
+            'ruin_prob': float(np.mean(log_min <= np.log(ruin_level))),
+            'loss_prob': float(np.mean(final_bank < initial_bankroll)),
+            'mean_final_bankroll': float(final_bank.mean()),
+            'final_bankroll_quantiles': dict(zip(qs, np.quantile(final_bank, qs))),
+            'max_drawdown_quantiles': dict(zip(qs, np.quantile(max_dd, qs)))
+        }
+
+    @staticmethod
+    def from_audit(history: pd.DataFrame, **kwargs):
+        """Atalho: simula a partir do log do Backtester.run_cfo_audit (Model_Prob, Odds, Result)."""
+        return MonteCarloSimulator.simulate(history['Model_Prob'].to_numpy(), history['Odds'].to_numpy(),
+                                            outcomes=(history['Result'] == 'H').to_numpy(), **kwargs)
+
+    @staticmethod
+    def summary_table(result: dict) -> pd.DataFrame:
+        """Tabela de quantis para exibição no dashboard."""
+        return pd.DataFrame({
+            'Banca Final (R$)': result['final_bankroll_quantiles'],
+            'Drawdown Máximo': result['max_drawdown_quantiles']
+        }).rename_axis('Quantil')
@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import pandas as pd
+
+from src.history_store import HistoryStore
+
+class PartitionedHistory:
+    """
+    Histórico particionado por liga e temporada: {root}/league={L}/season={S}/ (cada partição é um HistoryStore).
+    Nada é carregado até ser pedido; leitura por partição, por colunas e por intervalo de datas via memory-map.
+    """
+
+    ROOT = os.path.join(".betsight_cache", "partitions")
+
+    def __init__(self, root=None):
+        self.root = root or self.ROOT
+
+    def path(self, league, season):
+        return os.path.join(self.root, f"league={league}", f"season={season}")
+
+    def write(self, league, season, df: pd.DataFrame):
+        os.makedirs(os.path.dirname(self.path(league, season)), exist_ok=True)
+        HistoryStore.write(df, self.path(league, season))
+
+    def exists(self, league, season):
+        return HistoryStore.exists(self.path(league, season))
+
+    def drop(self, league, season=None):
+        target = self.path(league, season) if season is not None else os.path.join(self.root, f"league={league}")
+        shutil.rmtree(target, ignore_errors=True)
+
+    @staticmethod
+    def _listdir(path, prefix):
+        if not os.path.isdir(path):
+            return []
+        return sorted(name[len(prefix):] for name in os.listdir(path) if name.startswith(prefix))
+
+    def leagues(self):
+        return self._listdir(self.root, "league=")
+
+    def seasons(self, league):
+        folder = os.path.join(self.root, f"league={league}")
+        return [s for s in self._listdir(folder, "season=") if self.exists(league, s)]
+
+    def partitions(self, leagues=None, seasons=None):
+        """Lista (liga, temporada) disponíveis, filtrada por ligas e temporadas (só lê diretórios)."""
+        out = []
+        for league in (leagues or self.leagues()):
+            for season in self.seasons(league):
+                if seasons is None or season in seasons:
+                    out.append((league, season))
+        return out
+
+    def read(self, league, season, columns=None, start=None, end=None) -> pd.DataFrame:
+        return HistoryStore.read(self.path(league, season), columns, start, end)
+
+    def iter_partitions(self, leagues=None, seasons=None, columns=None):
+        """Gerador preguiçoso: uma partição em memória por vez."""
+        for league, season in self.partitions(leagues, seasons):
+            yield league, season, self.read(league, season, columns)
+
+    def read_many(self, leagues=None, seasons=None, columns=None) -> pd.DataFrame:
+        """Concatena só as partições (e colunas) pedidas, com League e Season."""
+        frames = [df.assign(League=league, Season=season)
+                  for league, season, df in self.iter_partitions(leagues, seasons, columns)]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
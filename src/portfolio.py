@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from src.finance import RiskManager
+
+class PortfolioAllocator:
+    """
+    Kelly de Portfólio para apostas simultâneas (mesma rodada / mesmo dia).
+    Maximiza o crescimento logarítmico esperado de todas as apostas juntas,
+    com teto por aposta e teto de exposição total da rodada.
+    Jogos independentes: cada cenário é uma combinação de vitórias/derrotas.
+    """
+
+    EXACT_MAX_BETS = 12       # Até 2^12 = 4096 cenários: enumeração exata
+    N_SAMPLES = 10_000        # Acima disso: cenários sorteados
+    MAX_ITER = 5000
+    TOL = 1e-10
+
+    @staticmethod
+    def _scenarios(prob, n_samples, seed):
+        """Matriz de vitórias (cenários x apostas) e peso de cada cenário."""
+        k = len(prob)
+        if k <= PortfolioAllocator.EXACT_MAX_BETS:
+            wins = ((np.arange(2 ** k)[:, None] >> np.arange(k)) & 1).astype(bool)
+            weights = np.prod(np.where(wins, prob, 1 - prob), axis=1)
+        else:
+            rng = np.random.default_rng(seed)
+            wins = rng.random((n_samples, k)) < prob
+            weights = np.full(n_samples, 1.0 / n_samples)
+        return wins, weights
+
+    @staticmethod
+    def _project(f, upper, total):
+        """Projeção euclidiana em {0 <= f <= upper, soma(f) <= total} (bisseção no multiplicador)."""
+        clipped = np.clip(f, 0.0, upper)
+        if clipped.sum() <= total:
+            return clipped
+        # O multiplicador sai do vetor original: recortar antes de subtrair não é a projeção
+        lo, hi = 0.0, float(f.max())
+        for _ in range(60):
+            lam = 0.5 * (lo + hi)
+            if np.clip(f - lam, 0.0, upper).sum() > total:
+                lo = lam
+            else:
+                hi = lam
+        return np.clip(f - hi, 0.0, upper)
+
+    @staticmethod
+    def _growth(f, returns, weights):
+        wealth = 1.0 + returns @ f
+        if np.any(wealth <= 0):
+            return -np.inf, wealth
+        return float(weights @ np.log(wealth)), wealth
+
+    @staticmethod
+    def _solve(prob, odds, upper, total, n_samples, seed):
+        """Subida de gradiente projetada em E[log(1 + R f)] com busca de passo (Armijo)."""
+        wins, weights = PortfolioAllocator._scenarios(prob, n_samples, seed)
+        returns = np.where(wins, odds - 1, -1.0)
+
+        # Ponto de partida: Kelly individual projetado no conjunto viável
+        kelly_full = ((odds - 1) * prob - (1 - prob)) / (odds - 1)
+        f = PortfolioAllocator._project(kelly_full, upper, total)
+        value, wealth = PortfolioAllocator._growth(f, returns, weights)
+        while not np.isfinite(value):
+            f = f * 0.5
+            value, wealth = PortfolioAllocator._growth(f, returns, weights)
+
+        step = 1.0
+        for _ in range(PortfolioAllocator.MAX_ITER):
+            grad = returns.T @ (weights / wealth)
+            while True:
+                candidate = PortfolioAllocator._project(f + step * grad, upper, total)
+                delta = candidate - f
+                new_value, new_wealth = PortfolioAllocator._growth(candidate, returns, weights)
+                if new_value >= value + 1e-4 * (grad @ delta) or step < 1e-12:
+                    break
+                step *= 0.5
+            if not np.isfinite(new_value) or new_value < value:
+                break
+            f, value, wealth = candidate, new_value, new_wealth
+            if np.abs(delta).max() < PortfolioAllocator.TOL:
+                break
+            step *= 2.0
+        return f
+
+    @staticmethod
+    def allocate(probability, odds, fraction=0.25, max_cap=0.05, max_total=0.25,
+                 n_samples=None, seed=42) -> np.ndarray:
+        """
+        % da banca para cada aposta de uma mesma rodada (sem arredondar).
+        Resolve o Kelly cheio com limites max_cap/fraction e max_total/fraction e escala por fraction,
+        assim uma aposta sozinha recebe exatamente o mesmo stake do RiskManager.
+        A exposição total fica em min(max_total, fraction): o Kelly cheio nunca aposta 100% da banca.
+        """
+        p = np.asarray(probability, dtype=float).ravel()
+        odds = np.asarray(odds, dtype=float).ravel()
+        out = np.zeros(len(p))
+
+        # Só entram apostas com EV positivo (as demais nunca aumentam o crescimento)
+        candidates = np.flatnonzero(RiskManager.stake_fractions(p, odds, 1.0, np.inf) > 0)
+        if len(candidates) == 0 or fraction <= 0:
+            return out
+
+        upper = max_cap / fraction
+        # Exposição total < 100% da banca no problema de Kelly cheio (log definido em todos os cenários)
+        total = min(max_total / fraction, 1.0 - 1e-9)
+        pc, oc = p[candidates], odds[candidates]
+
+        if len(candidates) == 1:
+            kelly_full = ((oc - 1) * pc - (1 - pc)) / (oc - 1)
+            f = np.minimum(kelly_full, min(upper, total))
+        else:
+            f = PortfolioAllocator._solve(pc, oc, upper, total,
+                                          n_samples or PortfolioAllocator.N_SAMPLES, seed)
+        out[candidates] = f * fraction
+        return out
+
+    @staticmethod
+    def allocate_by_group(probability, odds, groups, fraction=0.25, max_cap=0.05, max_total=0.25,
+                          n_samples=None, seed=42) -> np.ndarray:
+        """Aloca cada grupo (ex: Date) como uma rodada independente. Retorna % da banca por linha."""
+        p = np.asarray(probability, dtype=float)
+        odds = np.asarray(odds, dtype=float)
+        codes, _ = pd.factorize(np.asarray(groups))
+        out = np.zeros(len(p))
+
+        # Grupos sem nenhuma aposta de EV positivo nem chegam ao otimizador
+        active = RiskManager.stake_fractions(p, odds, 1.0, np.inf) > 0
+        order = np.argsort(codes, kind='stable')
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        for rows in np.split(order, bounds):
+            if active[rows].any():
+                out[rows] = PortfolioAllocator.allocate(p[rows], odds[rows], fraction, max_cap, max_total,
+                                                        n_samples, seed)
+        return out
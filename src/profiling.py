@@ -0,0 +1,179 @@
+import contextlib
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import pandas as pd
+
+class Profiler:
+    """
+    Instrumentação leve por etapa (tempo de parede + número de chamadas).
+    Desligado por padrão: stage() devolve um contexto nulo e timed() chama a função direto,
+    então o custo em produção é uma checagem de atributo. Liga com BETSIGHT_PROFILE=1 ou Profiler.enable().
+    Para medir só uma sessão (ex.: um rerun do Streamlit) use begin_session()/end_session(): a coleta fica
+    na thread atual e não mexe no estado global compartilhado pelas outras sessões.
+    """
+
+    ENV_ENABLED = os.environ.get("BETSIGHT_PROFILE", "") not in ("", "0")
+    enabled = ENV_ENABLED
+    _stats = {}     # etapa -> [chamadas, tempo total (s), maior tempo (s)]
+    _lock = threading.Lock()
+    _null = contextlib.nullcontext()
+    _local = threading.local()  # Coleta da sessão da thread atual (begin_session)
+
+    @staticmethod
+    def enable(flag=True):
+        Profiler.enabled = bool(flag)
+
+    @staticmethod
+    def reset():
+        with Profiler._lock:
+            Profiler._stats = {}
+
+    @staticmethod
+    def begin_session():
+        """Liga a coleta só para a thread atual; devolve o dicionário de etapas da sessão."""
+        stats = {}
+        Profiler._local.stats = stats
+        return stats
+
+    @staticmethod
+    def end_session():
+        Profiler._local.stats = None
+
+    @staticmethod
+    def _active():
+        return Profiler.enabled or getattr(Profiler._local, 'stats', None) is not None
+
+    @staticmethod
+    def _add(stats, name, seconds):
+        entry = stats.get(name)
+        if entry is None:
+            stats[name] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    @staticmethod
+    def record(name, seconds):
+        session = getattr(Profiler._local, 'stats', None)
+        if session is not None:
+            Profiler._add(session, name, seconds)
+        if Profiler.enabled:
+            with Profiler._lock:
+                Profiler._add(Profiler._stats, name, seconds)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _measure(name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            Profiler.record(name, time.perf_counter() - start)
+
+    @staticmethod
+    def stage(name):
+        """Context manager: with Profiler.stage('scoring'): ..."""
+        if not Profiler._active():
+            return Profiler._null
+        return Profiler._measure(name)
+
+    @staticmethod
+    def timed(name=None):
+        """Decorator: registra cada chamada da função na etapa name (padrão: Classe.método)."""
+        def decorator(fn):
+            label = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not Profiler._active():
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    Profiler.record(label, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def report(stats=None) -> pd.DataFrame:
+        """Tabela por etapa, ordenada pelo tempo total (stats: dicionário de begin_session; padrão: global)."""
+        with Profiler._lock:
+            source = Profiler._stats if stats is None else stats
+            rows = [(k, v[0], v[1] * 1000, v[1] * 1000 / v[0], v[2] * 1000) for k, v in source.items()]
+        df = pd.DataFrame(rows, columns=['Stage', 'Calls', 'Total_ms', 'Mean_ms', 'Max_ms'])
+        return df.sort_values('Total_ms', ascending=False).reset_index(drop=True)
+
+
+class SamplingProfiler:
+    """
+    Profiler por amostragem (só stdlib): uma thread lê a pilha da thread alvo a cada interval segundos.
+    Custo proporcional à frequência de amostragem, não ao número de chamadas.
+    Uso: with SamplingProfiler() as sp: ...; sp.top()
+    """
+
+    def __init__(self, interval=0.005, thread_id=None, max_depth=30):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.max_depth = max_depth
+        self.self_counts = Counter()     # Função no topo da pilha (tempo próprio)
+        self.total_counts = Counter()    # Função em qualquer nível da pilha (tempo acumulado)
+        self.n_samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.n_samples += 1
+            self.self_counts[self._label(frame)] += 1
+            seen = set()
+            depth = 0
+            while frame is not None and depth < self.max_depth:
+                label = self._label(frame)
+                if label not in seen:
+                    self.total_counts[label] += 1
+                    seen.add(label)
+                frame = frame.f_back
+                depth += 1
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def top(self, n=20) -> pd.DataFrame:
+        """Funções mais amostradas: % de tempo próprio e acumulado."""
+        total = max(self.n_samples, 1)
+        rows = [(label, self.self_counts[label] / total, count / total)
+                for label, count in self.total_counts.most_common()]
+        df = pd.DataFrame(rows, columns=['Function', 'Self', 'Cumulative'])
+        return df.sort_values(['Self', 'Cumulative'], ascending=False).head(n).reset_index(drop=True)
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.forest import FlatForest
+
+# Matriz de treino compartilhada com os workers (enviada uma vez no initializer)
+_WORKER_X = None
+_WORKER_Y = None
+
+def _init_worker(X, y):
+    global _WORKER_X, _WORKER_Y
+    _WORKER_X, _WORKER_Y = X, y
+
+def _fit_window(args):
+    """Treina a janela [0, n_train) da matriz compartilhada e devolve a floresta achatada."""
+    from sklearn.ensemble import RandomForestClassifier
+    n_train, params, feature_names = args
+    model = RandomForestClassifier(**params)
+    model.fit(pd.DataFrame(_WORKER_X[:n_train], columns=feature_names), _WORKER_Y[:n_train])
+    return FlatForest.from_sklearn(model, [], feature_names)
+
+
+class WalkForwardTrainer:
+    """
+    Walk-Forward de verdade: janela expansiva com retreino.
+    Antes de cada bloco (temporada ou rodada) o modelo é refeito com todos os jogos anteriores
+    e só então pontua o bloco seguinte. Fits em paralelo e cacheados em disco por janela.
+    """
+
+    FEATURES = ['Implied_Prob_H', 'Implied_Prob_A', 'Market_Diff', 'HomeTeam_Code', 'AwayTeam_Code']
+    DEFAULT_PARAMS = {'n_estimators': 100, 'max_depth': 5, 'random_state': 42}
+    CACHE_DIR = os.path.join(".betsight_cache", "walk_forward")
+
+    def __init__(self, block='season', min_train_rows=380, params=None, cache_dir=None, n_jobs=None):
+        if block not in ('season', 'matchweek'):
+            raise ValueError(f"Bloco desconhecido: {block}")
+        self.block = block
+        self.min_train_rows = min_train_rows
+        self.params = dict(self.DEFAULT_PARAMS, **(params or {}))
+        self.cache_dir = cache_dir or self.CACHE_DIR
+        self.n_jobs = n_jobs or os.cpu_count()
+
+    def _block_ids(self, df):
+        """Rótulo do bloco de cada jogo (df já em ordem cronológica)."""
+        if self.block == 'season':
+            return df['Season_ID'].astype(str).to_numpy()
+        # Rodada = semana do calendário (sábado-sexta cobre um fim de semana de Premier League)
+        return df['Date'].dt.to_period('W-FRI').astype(str).to_numpy()
+
+    def windows(self, df):
+        """Lista de (inicio, fim) dos blocos pontuados no df ordenado; o treino é tudo antes do inicio."""
+        ids = self._block_ids(df)
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        ends = np.r_[starts[1:], len(ids)]
+        return [(int(s), int(e)) for s, e in zip(starts, ends) if s >= self.min_train_rows]
+
+    def _cache_key(self, X, y, n_train):
+        h = hashlib.sha256(json.dumps(self.params, sort_keys=True).encode())
+        h.update(np.ascontiguousarray(X[:n_train]).tobytes())
+        h.update(np.ascontiguousarray(y[:n_train]).tobytes())
+        return h.hexdigest()[:32]
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def fit_windows(self, X, y, windows):
+        """Retorna {n_train: FlatForest}; só as janelas sem cache são treinadas (em paralelo)."""
+        models, pending = {}, {}
+        for n_train, _ in windows:
+            key = self._cache_key(X, y, n_train)
+            path = self._cache_path(key)
+            if os.path.exists(path):
+                models[n_train] = FlatForest.load(path)
+            else:
+                pending[n_train] = path
+
+        if pending:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tasks = [(n, self.params, self.FEATURES) for n in pending]
+            if self.n_jobs == 1 or len(tasks) == 1:
+                _init_worker(X, y)
+                fitted = list(map(_fit_window, tasks))
+            else:
+                with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker, initargs=(X, y)) as pool:
+                    fitted = list(pool.map(_fit_window, tasks))
+            for (n_train, path), forest in zip(pending.items(), fitted):
+                forest.save(path)
+                models[n_train] = forest
+        return models
+
+    def predict(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Pontua cada bloco com o modelo treinado só no passado.
+        Retorna o df ordenado (apenas jogos pontuados) com H, D, A e a coluna Window (tamanho do treino).
+        """
+        df = df.sort_values('Date', kind='stable').reset_index(drop=True)
+        X = df[self.FEATURES].to_numpy(dtype=np.float64)
+        y = df['Target'].to_numpy(dtype=np.int64)
+
+        windows = self.windows(df)
+        models = self.fit_windows(X, y, windows)
+
+        probs = np.full((len(df), 3), np.nan)
+        window_id = np.full(len(df), -1)
+        for start, end in windows:
+            probs[start:end] = models[start].predict_proba(X[start:end])
+            window_id[start:end] = start
+
+        out = df.copy()
+        out['H'], out['D'], out['A'] = probs[:, 0], probs[:, 1], probs[:, 2]
+        out['Window'] = window_id
+        return out[window_id >= 0].reset_index(drop=True)
@@ -0,0 +1,52 @@
+import sys
+import threading
+
+from src.cache import LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1          # 'a' passa a ser o mais recente
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_zero_size_cache_never_holds_entries():
+    cache = LRUCache(max_size=0)
+    cache.put('a', 1)
+    assert len(cache) == 0 and cache.get('a') is None
+
+
+def test_concurrent_get_put_with_evictions():
+    # Cache pequeno + muitas chaves: put de uma thread remove chaves que outra está lendo
+    cache = LRUCache(max_size=64)
+    errors = []
+
+    def worker(seed):
+        try:
+            for i in range(20_000):
+                key = (seed * 7 + i) % 256
+                if cache.get(key) is None:
+                    cache.put(key, key)
+        except Exception as e:  # Ex.: KeyError no move_to_end se outra thread removeu a chave
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in range(8)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)     # Troca de thread frequente: expõe a janela entre get e move_to_end
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    assert len(cache) <= 64
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == 8 * 20_000
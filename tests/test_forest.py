@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.forest import FlatForest
+
+
+@pytest.fixture(scope="module")
+def trained():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 5))
+    y = np.where(X[:, 0] + 0.5 * X[:, 1] > 0.3, 0, np.where(X[:, 2] > 0, 1, 2))
+    model = RandomForestClassifier(n_estimators=25, max_depth=7, min_samples_leaf=3, random_state=0)
+    model.fit(X, y)
+    names = [f"f{i}" for i in range(X.shape[1])]
+    X_test = rng.normal(size=(300, 5))
+    return model, FlatForest.from_sklearn(model, [], names), X_test
+
+
+def test_predict_proba_matches_sklearn(trained):
+    model, flat, X = trained
+    np.testing.assert_allclose(flat.predict_proba(X, chunk_size=64), model.predict_proba(X), atol=1e-12)
+
+
+def test_saabas_contributions_sum_to_prediction(trained):
+    _, flat, X = trained
+    bias, contrib = flat.contributions(X, chunk_size=64)
+    assert contrib.shape == (len(X), 5, 3)
+    np.testing.assert_allclose(bias + contrib.sum(axis=1), flat.predict_proba(X), atol=1e-12)
+
+
+def test_save_load_roundtrip(trained, tmp_path):
+    _, flat, X = trained
+    path = tmp_path / "forest.npz"
+    flat.save(path)
+    loaded = FlatForest.load(path)
+    np.testing.assert_array_equal(loaded.predict_proba(X), flat.predict_proba(X))
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from src.backtest import Backtester
+from src.history_store import HistoryStore
+
+
+def _history():
+    return pd.DataFrame({
+        'Date': pd.to_datetime(['2024-08-10', '2024-08-10', '2024-08-17', '2024-08-17', '2024-08-24']),
+        'HomeTeam': ['Arsenal', 'Chelsea', 'Everton', 'Fulham', 'Wolves'],
+        'AwayTeam': ['Wolves', 'Fulham', 'Arsenal', 'Chelsea', 'Everton'],
+        'FTR': ['H', 'D', 'A', 'H', 'H'],
+        'B365H': [1.3, 2.1, 3.75, 2.05, 1.91],
+        'B365A': [9.0, 3.4, 1.95, 3.6, 4.2],
+    })
+
+
+def test_last_rows_compact_then_exact(tmp_path):
+    path = tmp_path / 'h.store'
+    HistoryStore.write(_history(), path)
+
+    exact = HistoryStore.read(path)
+    compact = HistoryStore.read(path, last=3, exact=False)
+    assert len(compact) == 3 and compact['B365H'].dtype == 'float32'
+    assert compact.attrs['float_decimals'] == {'B365H': 2, 'B365A': 2}
+
+    restored = HistoryStore.restore_floats(compact)
+    expected = exact.tail(3).reset_index(drop=True)
+    pd.testing.assert_frame_equal(restored, expected)
+    assert restored['B365H'].tolist() == [3.75, 2.05, 1.91]
+
+
+def test_select_window_restores_only_the_window(tmp_path):
+    path = tmp_path / 'h.store'
+    HistoryStore.write(_history(), path)
+    full = HistoryStore.read(path, columns=Backtester.AUDIT_COLUMNS)
+    compact = HistoryStore.read(path, columns=Backtester.AUDIT_COLUMNS, exact=False)
+    for window in (2, 4, None, ('2024-08-17', None)):
+        got = Backtester.select_window(compact, window)
+        assert got['B365H'].dtype == 'float64'
+        pd.testing.assert_frame_equal(got, Backtester.select_window(full, window))
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features import TeamFormEngine
+from src.history_store import HistoryStore
+from src.incremental import IncrementalHistory
+
+TEAMS = ['Arsenal', 'Chelsea', 'Everton', 'Fulham', 'Leeds', 'Liverpool', 'Spurs', 'Wolves']
+
+
+def _season(season_id, start, rounds, seed):
+    """Temporada sintética já limpa (como o download_seasons): uma rodada por semana, todos jogam."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for r in range(rounds):
+        date = pd.Timestamp(start) + pd.Timedelta(weeks=r)
+        teams = rng.permutation(TEAMS)
+        for home, away in zip(teams[::2], teams[1::2]):
+            hg, ag = rng.integers(0, 4, 2)
+            rows.append({'Date': date, 'HomeTeam': home, 'AwayTeam': away, 'FTHG': hg, 'FTAG': ag,
+                         'FTR': 'H' if hg > ag else 'A' if ag > hg else 'D',
+                         'B365H': round(rng.uniform(1.3, 4.5), 2), 'B365D': round(rng.uniform(3.0, 4.2), 2),
+                         'B365A': round(rng.uniform(1.5, 7.0), 2), 'Season_ID': season_id})
+    return pd.DataFrame(rows)
+
+
+def _full_build(raw, folder):
+    """Mesmo caminho do run_pipeline: features de mercado, códigos, forma numa passada, CSV + Store."""
+    csv, store = str(folder / 'history.csv'), str(folder / 'history.store')
+    df = IncrementalHistory(csv, team_classes=sorted(TEAMS)).derive(raw)
+    form = TeamFormEngine()
+    df[TeamFormEngine.FEATURES] = form.transform(df)
+    df.to_csv(csv, index=False)
+    HistoryStore.write(df, store)
+    return csv, store, form
+
+
+@pytest.fixture
+def seasons():
+    return _season('2324', '2023-08-12', 20, seed=1), _season('2425', '2024-08-10', 6, seed=2)
+
+
+def _assert_same_history(folder, expected_folder):
+    with open(folder / 'history.csv', 'rb') as a, open(expected_folder / 'history.csv', 'rb') as b:
+        assert a.read() == b.read()
+    pd.testing.assert_frame_equal(HistoryStore.read(str(folder / 'history.store')),
+                                  HistoryStore.read(str(expected_folder / 'history.store')))
+
+
+def test_append_matches_full_rebuild(tmp_path, seasons):
+    old, new = seasons
+    (tmp_path / 'inc').mkdir(), (tmp_path / 'full').mkdir()
+    csv, store, form = _full_build(old, tmp_path / 'inc')
+    _full_build(pd.concat([old, new], ignore_index=True), tmp_path / 'full')
+
+    history = IncrementalHistory(csv, store, team_classes=sorted(TEAMS), form=form)
+    stats = history.update(new)
+    assert stats['new'] == len(new) and stats['corrected'] == 0
+    assert stats['rewritten_rows'] == len(new) and not stats['form_recomputed']
+    _assert_same_history(tmp_path / 'inc', tmp_path / 'full')
+
+
+def test_correction_matches_full_rebuild(tmp_path, seasons):
+    old, new = seasons
+    (tmp_path / 'inc').mkdir(), (tmp_path / 'full').mkdir()
+    csv, store, form = _full_build(old, tmp_path / 'inc')
+
+    # Placar corrigido no meio da temporada: a forma é recalculada desde o início
+    fixed = pd.concat([old, new], ignore_index=True)
+    fixed.loc[30, ['FTHG', 'FTAG', 'FTR']] = [5, 0, 'H']
+    _full_build(fixed, tmp_path / 'full')
+
+    stats = IncrementalHistory(csv, store, team_classes=sorted(TEAMS), form=form).update(fixed)
+    assert stats['new'] == len(new) and stats['corrected'] == 1 and stats['form_recomputed']
+    _assert_same_history(tmp_path / 'inc', tmp_path / 'full')
+
+
+def test_update_without_changes_touches_nothing(tmp_path, seasons):
+    old, new = seasons
+    csv, store, form = _full_build(pd.concat([old, new], ignore_index=True), tmp_path)
+    history = IncrementalHistory(csv, store, team_classes=sorted(TEAMS), form=form)
+    history.build_index()
+
+    listing = sorted(os.listdir(store))
+    paths = [csv, history.index_path] + [os.path.join(store, f) for f in listing]
+    before = {p: (os.stat(p).st_mtime_ns, open(p, 'rb').read()) for p in paths}
+    stats = history.update(new)
+    assert stats == {'new': 0, 'corrected': 0, 'unchanged': len(new), 'rewritten_rows': 0,
+                     'form_recomputed': False}
+    assert {p: (os.stat(p).st_mtime_ns, open(p, 'rb').read()) for p in paths} == before
+    assert sorted(os.listdir(store)) == listing
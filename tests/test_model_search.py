@@ -0,0 +1,60 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.model_search import ModelSearch
+
+
+def test_pareto_fronts():
+    log_loss = [1.00, 0.98, 0.99, 1.02, 0.98]
+    roi = [0.05, 0.01, 0.03, 0.04, 0.00]
+    # 0.98/0.01, 0.99/0.03 e 1.00/0.05 não se dominam; 1.02/0.04 perde para 1.00/0.05; 0.98/0.00 para 0.98/0.01
+    assert ModelSearch.pareto_fronts(log_loss, roi).tolist() == [1, 1, 1, 2, 2]
+
+
+def test_rank_uses_roi_inside_log_loss_margin():
+    board = pd.DataFrame({
+        'cand_id': [0, 1, 2, 3],
+        'log_loss': [0.980, 0.985, 1.050, 0.970],
+        'roi': [0.01, 0.06, 0.20, 0.02],
+        'bets': [10, 10, 10, 10],
+        'folds': [3, 3, 3, 2],
+    })
+    ranked = ModelSearch(prune_margin=0.01).rank(board)
+    # Candidato 3 não passou por todos os folds; 1 empata no log-loss com 0 e tem ROI maior;
+    # 2 está na frente de Pareto mas longe no log-loss
+    assert ranked['cand_id'].tolist() == [1, 0, 2, 3]
+    assert ranked['front'].tolist()[:3] == [1, 1, 1]
+
+
+def _data(n_seasons=3, per_season=120, seed=0):
+    rng = np.random.default_rng(seed)
+    n = n_seasons * per_season
+    X = rng.normal(size=(n, 4))
+    y = rng.integers(0, 3, n)
+    seasons = np.repeat([f"s{i}" for i in range(n_seasons)], per_season)
+    odds_h = rng.uniform(1.5, 3.5, n)
+    return X, y, seasons, odds_h
+
+
+def test_concurrent_runs_use_separate_arrays(tmp_path):
+    grid = {'n_estimators': [10], 'max_depth': [2, 4]}
+    data = [_data(seed=0), _data(seed=1)]
+    expected = [ModelSearch(grid=grid, n_jobs=1, cache_dir=str(tmp_path)).run(*d, verbose=False) for d in data]
+
+    results = [None, None]
+
+    def search(i):
+        results[i] = ModelSearch(grid=grid, n_jobs=1, cache_dir=str(tmp_path)).run(*data[i], verbose=False)
+
+    threads = [threading.Thread(target=search, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for got, want in zip(results, expected):
+        pd.testing.assert_frame_equal(got.drop(columns='params'), want.drop(columns='params'))
+    assert os.listdir(tmp_path) == []      # Pastas temporárias removidas ao fim de cada busca
@@ -0,0 +1,33 @@
+import tracemalloc
+
+import numpy as np
+
+from src.monte_carlo import MonteCarloSimulator
+
+
+def _opportunities(n, seed=0):
+    rng = np.random.default_rng(seed)
+    prob = rng.uniform(0.3, 0.7, n)
+    odds = 1 / prob * rng.uniform(0.95, 1.2, n)
+    return prob, odds, rng.random(n) < prob
+
+
+def test_peak_memory_bounded_by_cell_budget():
+    prob, odds, outcomes = _opportunities(3000)
+    max_cells = 200_000
+    for mode in ('model', 'bootstrap'):
+        tracemalloc.start()
+        result = MonteCarloSimulator.simulate(prob, odds, outcomes, n_paths=2000, mode=mode, max_cells=max_cells)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert result['n_bets'] > 1000
+        # Poucos temporários float64 do tamanho do bloco; a matriz inteira (2000 x n_bets) teria ~40 MB
+        assert peak < 12 * max_cells * 8
+
+
+def test_same_result_across_processes():
+    prob, odds, outcomes = _opportunities(300, seed=1)
+    kwargs = dict(n_paths=5000, mode='bootstrap', max_cells=100_000, seed=7)
+    single = MonteCarloSimulator.simulate(prob, odds, outcomes, n_jobs=1, **kwargs)
+    multi = MonteCarloSimulator.simulate(prob, odds, outcomes, n_jobs=2, **kwargs)
+    assert single == multi
@@ -0,0 +1,87 @@
+import itertools
+
+import numpy as np
+import pytest
+from scipy.optimize import minimize
+
+from src.finance import RiskManager
+from src.portfolio import PortfolioAllocator
+
+
+def _round(k, seed):
+    rng = np.random.default_rng(seed)
+    prob = rng.uniform(0.35, 0.7, k)
+    odds = 1 / prob * rng.uniform(1.02, 1.25, k)     # Todas com EV positivo
+    return prob, odds
+
+
+@pytest.mark.parametrize("max_total", [0.02, 0.05, 0.1, 0.25, 0.5])
+def test_total_exposure_respects_cap(max_total):
+    prob, odds = _round(8, seed=3)
+    fraction, max_cap = 0.25, 0.05
+    stakes = PortfolioAllocator.allocate(prob, odds, fraction, max_cap, max_total)
+    assert np.all(stakes >= 0)
+    assert np.all(stakes <= max_cap + 1e-12)
+    assert stakes.sum() <= min(max_total, fraction) + 1e-9
+
+
+@pytest.mark.parametrize("prob, odds", [(0.55, 2.1), (0.4, 3.0), (0.7, 1.6), (0.3, 2.5)])
+@pytest.mark.parametrize("fraction, max_cap", [(0.25, 0.05), (0.5, 0.2), (0.1, 0.5)])
+def test_single_bet_matches_risk_manager(prob, odds, fraction, max_cap):
+    expected = RiskManager.stake_fractions(np.array([prob]), np.array([odds]), fraction, max_cap)
+    got = PortfolioAllocator.allocate([prob], [odds], fraction, max_cap, max_total=1.0)
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-12)
+
+
+def test_negative_ev_bets_get_nothing():
+    stakes = PortfolioAllocator.allocate([0.55, 0.2], [2.1, 3.0], 0.25, 0.05, 0.2)
+    assert stakes[1] == 0.0 and stakes[0] > 0
+
+
+def _exact_problem(prob, odds):
+    """Crescimento E[log(1 + R f)] e gradiente sobre os 2^k resultados enumerados com itertools."""
+    wins = np.array(list(itertools.product((False, True), repeat=len(prob))))
+    weights = np.prod(np.where(wins, prob, 1 - prob), axis=1)
+    returns = np.where(wins, odds - 1, -1.0)
+    # Piso na riqueza: o SLSQP pode testar pontos fora do domínio do log
+    growth = lambda f: float(weights @ np.log(np.maximum(1 + returns @ f, 1e-300)))
+    gradient = lambda f: returns.T @ (weights / (1 + returns @ f))
+    return growth, gradient
+
+
+@pytest.mark.parametrize("k", [2, 5, 8, 12])
+def test_scenarios_are_exact_enumeration(k):
+    prob, _ = _round(k, seed=k)
+    wins, weights = PortfolioAllocator._scenarios(prob, n_samples=None, seed=0)
+    assert len(wins) == 2 ** k and len({row.tobytes() for row in wins}) == 2 ** k
+    np.testing.assert_allclose(weights, np.prod(np.where(wins, prob, 1 - prob), axis=1))
+    assert weights.sum() == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("max_total", [0.15, 0.3])
+@pytest.mark.parametrize("k", [2, 4, 7, 12])
+def test_allocation_matches_exact_optimum(k, max_total):
+    prob, odds = _round(k, seed=10 + k)
+    fraction, max_cap = 0.25, 0.05
+    stakes = PortfolioAllocator.allocate(prob, odds, fraction, max_cap, max_total)
+    growth, gradient = _exact_problem(prob, odds)
+    upper, total = max_cap / fraction, min(max_total / fraction, 1 - 1e-9)
+    f = stakes / fraction
+
+    # Nenhuma solução viável do SLSQP sobre a enumeração exata cresce mais
+    res = minimize(lambda x: -growth(x), np.full(k, total / k / 2), method="SLSQP",
+                   bounds=[(0, upper)] * k,
+                   constraints=[{"type": "ineq", "fun": lambda x: total - x.sum()}],
+                   options={"ftol": 1e-12, "maxiter": 500})
+    assert growth(f) >= -res.fun - 1e-7
+
+    # KKT: apostas livres têm o mesmo gradiente (multiplicador da exposição total),
+    # zeradas não passam dele e as no teto não ficam abaixo
+    g = gradient(f)
+    free = (f > 1e-9) & (f < upper - 1e-9)
+    mu = g[free].mean() if free.any() else 0.0
+    if f.sum() < total - 1e-9:
+        assert mu == pytest.approx(0.0, abs=1e-6)
+    np.testing.assert_allclose(g[free], mu, atol=1e-6)
+    assert np.all(g[f <= 1e-9] <= mu + 1e-6)
+    assert np.all(g[f >= upper - 1e-9] >= mu - 1e-6)
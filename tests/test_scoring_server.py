@@ -0,0 +1,59 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scoring_server import make_server
+
+MATCH = {"HomeTeam": "Arsenal", "AwayTeam": "Chelsea", "B365H": 2.1, "B365A": 3.4}
+
+
+@pytest.fixture
+def server():
+    server, batcher, _ = make_server(port=0, max_wait_ms=5.0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, batcher
+    server.shutdown()
+    server.server_close()
+
+
+def _post(port, path, body):
+    req = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=json.dumps(body).encode())
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return resp.status, json.loads(resp.read())
+
+
+@pytest.mark.parametrize("n_clients", [32, 64])
+def test_concurrent_clients_without_resets(server, n_clients):
+    srv, batcher = server
+    port = srv.server_address[1]
+    n_requests = 600
+
+    def call(i):
+        # Uma conexão nova por requisição: é a rajada de connect() que estoura a fila do listen()
+        try:
+            return _post(port, '/predict', {"matches": [dict(MATCH, B365H=1.5 + (i % 50) / 10)]})[0]
+        except OSError as e:
+            return type(e).__name__
+
+    with ThreadPoolExecutor(max_workers=n_clients) as pool:
+        statuses = list(pool.map(call, range(n_requests)))
+
+    assert statuses == [200] * n_requests
+    assert batcher.stats()['batches'] <= n_requests
+
+
+def test_invalid_payloads_return_400(server):
+    port = server[0].server_address[1]
+    bad = [('/predict', {"matches": [dict(MATCH, B365H="abc")]}),
+           ('/predict', {"matches": [dict(MATCH, B365A=None)]}),
+           ('/stake', [MATCH]),
+           ('/stake', {"bankroll": "x", "matches": [MATCH]})]
+    for path, body in bad:
+        with pytest.raises(urllib.error.HTTPError) as err:
+            _post(port, path, body)
+        assert err.value.code == 400
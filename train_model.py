@@ -1,33 +1,55 @@
 # train_model.py
 # Script de Automação de Treino (Data Master Pipeline)
 
+import os
+import numpy as np
 import pandas as pd
-import requests
-import io
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
+from src.ingest import SeasonDownloader
+from src.history_store import HistoryStore
+from src.forest import FlatForest
+from src.features import TeamFormEngine
+from src.profiling import Profiler
+from src.model_search import ModelSearch
+from src.league_pipeline import LeaguePipeline
+from src.incremental import IncrementalHistory
 
 # Configuração
 SEASONS = ['2021', '2122', '2223', '2324', '2425']
-BASE_URL = "https://www.football-data.co.uk/mmz4281/{}/E0.csv"
+LEAGUE = 'E0'
 MODEL_FILENAME = "betsight_model_v1.pkl"
 ENCODER_FILENAME = "team_encoder_v1.pkl"
+FOREST_FILENAME = "betsight_model_v1.npz"
 DATA_FILENAME = "betsight_history.csv"
+STORE_DIRNAME = "betsight_history.store"
+FORM_STATE_FILENAME = "team_state_v1.json"
 
-def run_pipeline():
-    print("🚀 [1/4] Baixando dados da Inglaterra...")
+# Atualização incremental (--update): só a temporada em andamento é baixada de novo
+UPDATE_SEASONS = SEASONS[-1:]
+
+# Features do modelo congelado (a forma dos times entra com --form)
+BASE_FEATURES = ['Implied_Prob_H', 'Implied_Prob_A', 'Market_Diff', 'HomeTeam_Code', 'AwayTeam_Code']
+
+# Configuração padrão da floresta (substituída pela melhor da busca com --search)
+DEFAULT_PARAMS = {'n_estimators': 100, 'max_depth': 5, 'random_state': 42}
+
+def download_seasons(seasons):
+    """Baixa e limpa as temporadas (Date como datetime, ordenado por data, com Season_ID)."""
     dfs = []
-    for season in SEASONS:
-        url = BASE_URL.format(season)
-        try:
-            s = requests.get(url).content
-            df = pd.read_csv(io.StringIO(s.decode('unicode_escape')))
+    # Download paralelo com cache em disco (só a temporada atual é revalidada)
+    downloader = SeasonDownloader(league=LEAGUE)
+    with Profiler.stage('pipeline.download'):
+        frames = downloader.load(seasons)
+    for season in seasons:
+        if season in frames:
+            df = frames[season]
             df['Season_ID'] = season
             dfs.append(df)
             print(f"   -> Temporada {season}: OK")
-        except Exception as e:
-            print(f"   -> Erro {season}: {e}")
+        else:
+            print(f"   -> Erro {season}: {downloader.errors.get(season)}")
             
     full_df = pd.concat(dfs, ignore_index=True)
     
@@ -38,7 +60,21 @@ def run_pipeline():
     full_df = full_df[cols_exist].dropna()
     
     full_df['Date'] = pd.to_datetime(full_df['Date'], dayfirst=True, errors='coerce')
-    full_df = full_df.sort_values('Date').reset_index(drop=True)
+    return full_df.sort_values('Date').reset_index(drop=True)
+
+def save_artifacts(model, le, features, form=None):
+    joblib.dump(model, MODEL_FILENAME)
+    joblib.dump(le, ENCODER_FILENAME)
+    # Floresta compilada em arrays (cold start rápido no app, sem sklearn)
+    FlatForest.from_sklearn(model, le.classes_, features).save(FOREST_FILENAME)
+    # Estado final dos times: o BetModel calcula a forma de jogos novos em O(1)
+    if form is not None:
+        form.save(FORM_STATE_FILENAME)
+
+@Profiler.timed('train_model.run_pipeline')
+def run_pipeline(use_form=False, search=False, n_iter=None, n_jobs=None):
+    print("🚀 [1/4] Baixando dados da Inglaterra...")
+    full_df = download_seasons(SEASONS)
     
     print(f"📊 [2/4] Dataset Bruto: {len(full_df)} jogos.")
 
@@ -58,17 +94,34 @@ def run_pipeline():
     df_feat['HomeTeam_Code'] = le.transform(df_feat['HomeTeam'].astype(str))
     df_feat['AwayTeam_Code'] = le.transform(df_feat['AwayTeam'].astype(str))
 
+    # Forma dos times (Elo, gols EWM, descanso): uma única passada cronológica, O(n)
+    form = TeamFormEngine()
+    with Profiler.stage('pipeline.form_features'):
+        df_feat[TeamFormEngine.FEATURES] = form.transform(df_feat)
+
     # Treino (Split)
     train_df = df_feat[df_feat['Season_ID'] != '2425']
     test_df = df_feat[df_feat['Season_ID'] == '2425']
     
-    features = ['Implied_Prob_H', 'Implied_Prob_A', 'Market_Diff', 'HomeTeam_Code', 'AwayTeam_Code']
+    features = BASE_FEATURES + (TeamFormEngine.FEATURES if use_form else [])
     X_train = train_df[features]
     y_train = train_df['Target']
     
-    print(f"🤖 [3/4] Treinando Random Forest ({len(train_df)} amostras)...")
-    model = RandomForestClassifier(n_estimators=100, max_depth=5, random_state=42)
-    model.fit(X_train, y_train)
+    params = DEFAULT_PARAMS
+    if search:
+        # CV temporal por temporada só nas temporadas de treino (a atual segue como validação final)
+        print("🔎 [3/4] Buscando hiperparâmetros (CV por temporada, log-loss + ROI)...")
+        searcher = ModelSearch(n_iter=n_iter, n_jobs=n_jobs)
+        with Profiler.stage('pipeline.search'):
+            board = searcher.run(X_train, y_train, train_df['Season_ID'], train_df['B365H'])
+        board.to_csv(os.path.join(searcher.cache_dir, "leaderboard.csv"), index=False)
+        print(board.head(5)[['log_loss', 'roi', 'bets', 'folds', 'params']].to_string(index=False))
+        params = searcher.best_params
+
+    print(f"🤖 [3/4] Treinando Random Forest ({len(train_df)} amostras) com {params}...")
+    model = RandomForestClassifier(**params)
+    with Profiler.stage('pipeline.train'):
+        model.fit(X_train, y_train)
     
     # Validação
     if not test_df.empty:
@@ -77,11 +130,116 @@ def run_pipeline():
 
     # Exportação
     print("💾 [4/4] Salvando Artefatos (.pkl e .csv)...")
-    joblib.dump(model, MODEL_FILENAME)
-    joblib.dump(le, ENCODER_FILENAME)
-    df_feat.to_csv(DATA_FILENAME, index=False)
+    with Profiler.stage('pipeline.export'):
+        save_artifacts(model, le, features, form)
+        df_feat.to_csv(DATA_FILENAME, index=False)
+        HistoryStore.write(df_feat, STORE_DIRNAME)
     
     print("✅ PIPELINE CONCLUÍDO. PRONTO PARA DEPLOY.")
 
+@Profiler.timed('train_model.run_update')
+def run_update(use_form=None):
+    """
+    Atualização semanal: só jogos novos ou corrigidos entram no histórico (índice por hash da chave do jogo,
+    merge-insert na cauda do CSV/Store); depois retreina com os hiperparâmetros e as features do modelo atual.
+    use_form=None herda as features do artefato; True/False força com/sem as features de forma.
+    """
+    if not (os.path.exists(DATA_FILENAME) and os.path.exists(ENCODER_FILENAME)):
+        print("⚠️ Histórico ou encoder não encontrados: rodando o pipeline completo.")
+        return run_pipeline(use_form=bool(use_form))
+
+    print(f"🔄 [1/3] Baixando temporada em andamento ({', '.join(UPDATE_SEASONS)})...")
+    raw = download_seasons(UPDATE_SEASONS)
+
+    le = joblib.load(ENCODER_FILENAME)
+    form = TeamFormEngine.load(FORM_STATE_FILENAME) if os.path.exists(FORM_STATE_FILENAME) else None
+    history = IncrementalHistory(DATA_FILENAME, STORE_DIRNAME, team_classes=le.classes_, form=form)
+    with Profiler.stage('update.merge'):
+        stats = history.update(raw)
+    print(f"📊 [2/3] {stats['new']} jogos novos, {stats['corrected']} corrigidos, {stats['unchanged']} sem mudança "
+          f"({stats['rewritten_rows']} linhas reescritas{', forma recalculada' if stats['form_recomputed'] else ''})")
+    if not (stats['new'] or stats['corrected']):
+        print("✅ Histórico já atualizado. Nada para retreinar.")
+        return
+
+    # Times novos ganham códigos no fim: os códigos antigos (e o histórico) não mudam
+    le.classes_ = np.asarray(history.team_classes, dtype=object)
+    if HistoryStore.exists(STORE_DIRNAME):
+        df_feat = HistoryStore.read(STORE_DIRNAME)
+    else:
+        df_feat = pd.read_csv(DATA_FILENAME, float_precision='round_trip')
+    season = df_feat['Season_ID'].astype(str)
+    train_df = df_feat[season != SEASONS[-1]]
+    test_df = df_feat[season == SEASONS[-1]]
+
+    current = joblib.load(MODEL_FILENAME) if os.path.exists(MODEL_FILENAME) else None
+    params = current.get_params() if current is not None else DEFAULT_PARAMS
+    names = getattr(current, 'feature_names_in_', None)
+    if use_form is None and names is not None:
+        features = list(names)
+    else:
+        features = BASE_FEATURES + (TeamFormEngine.FEATURES if use_form else [])
+    missing = [f for f in features if f not in df_feat.columns]
+    if missing:
+        print(f"⚠️ Histórico sem as colunas {missing}: rode o pipeline completo (python train_model.py --form).")
+        return
+    print(f"🤖 [3/3] Retreinando Random Forest ({len(train_df)} amostras)...")
+    model = RandomForestClassifier(**params)
+    with Profiler.stage('update.train'):
+        model.fit(train_df[features], train_df['Target'])
+    if not test_df.empty:
+        print(f"🏆 Acurácia Temporada Atual: {model.score(test_df[features], test_df['Target']):.2%}")
+
+    with Profiler.stage('update.export'):
+        save_artifacts(model, le, features, history.form)
+    print("✅ ATUALIZAÇÃO CONCLUÍDA.")
+
+def run_league_pipeline(leagues=None, first_season=2005, last_season=2024, mode='per_league',
+                        use_form=False, n_jobs=None):
+    """Pipeline multi-liga: partições por liga/temporada, features em paralelo, modelos por liga ou global."""
+    pipeline = LeaguePipeline(leagues=leagues, seasons=LeaguePipeline.season_range(first_season, last_season),
+                              n_jobs=n_jobs, use_form=use_form)
+    print(f"🚀 [1/3] Baixando {len(pipeline.leagues)} ligas x {len(pipeline.seasons)} temporadas...")
+    with Profiler.stage('leagues.ingest'):
+        written = pipeline.ingest()
+    print(f"   -> {sum(written.values())} jogos gravados em partições; {len(pipeline.errors)} partições com erro")
+
+    print("🧮 [2/3] Features por liga (em paralelo)...")
+    with Profiler.stage('leagues.features'):
+        encoders = pipeline.build_features()
+    print(f"   -> {len(encoders)} ligas, {sum(len(t) for t in encoders.values())} times")
+
+    print(f"🤖 [3/3] Treinando ({mode})...")
+    with Profiler.stage('leagues.train'):
+        scores = pipeline.train(mode)
+    for name, acc in scores.items():
+        print(f"   -> {name}: " + (f"{acc:.2%}" if acc is not None else "sem temporada de teste"))
+    print(f"✅ Modelos em {pipeline.models_dir}/")
+
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Pipeline de treino do BetSight")
+    parser.add_argument("--form", action=argparse.BooleanOptionalAction,
+                        help="Treina também com as features de forma (Elo, gols, descanso); "
+                             "no --update, o padrão é manter as features do modelo atual")
+    parser.add_argument("--update", action="store_true", help="Atualização incremental: só jogos novos/corrigidos")
+    parser.add_argument("--search", action="store_true", help="Busca de hiperparâmetros antes do treino final")
+    parser.add_argument("--n-iter", type=int, help="Amostra aleatória de N combinações (padrão: grade completa)")
+    parser.add_argument("--jobs", type=int, help="Processos da busca (padrão: todos os núcleos)")
+    parser.add_argument("--leagues", nargs='+', help="Pipeline multi-liga (códigos football-data, ou 'all')")
+    parser.add_argument("--first-season", type=int, default=2005, help="Ano inicial (multi-liga)")
+    parser.add_argument("--last-season", type=int, default=2024, help="Ano final (multi-liga)")
+    parser.add_argument("--league-mode", choices=['per_league', 'global'], default='per_league')
+    parser.add_argument("--profile", action="store_true", help="Mostra o tempo de cada etapa ao final")
+    args = parser.parse_args()
+    if args.profile:
+        Profiler.enable()
+    if args.leagues:
+        run_league_pipeline(None if args.leagues == ['all'] else args.leagues, args.first_season,
+                            args.last_season, args.league_mode, bool(args.form), args.jobs)
+    elif args.update:
+        run_update(use_form=args.form)
+    else:
+        run_pipeline(use_form=bool(args.form), search=args.search, n_iter=args.n_iter, n_jobs=args.jobs)
+    if args.profile:
+        print(Profiler.report().to_string(index=False))
\ No newline at end of file